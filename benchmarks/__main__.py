@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import quiet_logging
+
+BENCHMARKS = ("tweet", "rephrase", "media", "export", "startup", "reparse")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline_path, report):
+    """Print the speed ratio of each benchmark against a previous report"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"{'benchmark':<32}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, current in report["results"].items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["seconds"], current["seconds"]
+        ratio = after / before if before else float("nan")
+        flag = "  REGRESSION" if ratio > 1.1 else ""
+        print(f"{name:<32}{before:>11.3f}s{after:>11.3f}s{ratio:>8.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmarks [option] ...",
+        description="Offline micro-benchmarks for the scraper's hot paths. No network access is needed.",
+    )
+    parser.add_argument("--only", type=str, default=",".join(BENCHMARKS), help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--cards", type=int, default=200, help="Tweet cards in the generated timeline fixture (default: 200)")
+    parser.add_argument("--reparse-cards", type=int, default=2000, help="Archived cards for the offline reparse benchmark (default: 2000)")
+    parser.add_argument("--fixture", type=str, default=None, help="Saved timeline HTML to extract from instead of the generated one")
+    parser.add_argument("--rephrase-calls", type=int, default=50, help="Rephrase calls per latency setting (default: 50)")
+    parser.add_argument("--rephrase-latency", type=str, default="0,0.05", help="Comma-separated fake Ollama latencies in seconds (default: 0,0.05)")
+    parser.add_argument("--export-sizes", type=str, default="10000,100000,1000000", help="Comma-separated CSV row counts (default: 10000,100000,1000000)")
+    parser.add_argument("--output", type=str, default=None, help="Result JSON path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=str, default=None, help="Previous result JSON to compare against")
+    args = parser.parse_args()
+
+    quiet_logging()
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    results = {}
+
+    for name in selected:
+        print(f"Running {name} benchmark...")
+        if name == "tweet":
+            import bench_tweet
+            results.update(bench_tweet.run(cards=args.cards, fixture=args.fixture))
+        elif name == "rephrase":
+            import bench_rephrase
+            latencies = tuple(float(value) for value in args.rephrase_latency.split(","))
+            results.update(bench_rephrase.run(calls=args.rephrase_calls, latencies=latencies))
+        elif name == "media":
+            import bench_media
+            results.update(bench_media.run())
+        elif name == "export":
+            import bench_export
+            sizes = tuple(int(value) for value in args.export_sizes.split(","))
+            results.update(bench_export.run(sizes=sizes))
+        elif name == "startup":
+            import bench_startup
+            results.update(bench_startup.run())
+        elif name == "reparse":
+            import bench_reparse
+            results.update(bench_reparse.run(cards=args.reparse_cards))
+        else:
+            parser.error(f"Unknown benchmark: {name}")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    for name, record in results.items():
+        print(f"  {name:<32}{record['seconds']:>10.3f}s  {record['items_per_second'] or 0:>12.1f} items/s")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
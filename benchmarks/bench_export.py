@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+from common import timed, result
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def synthetic_tweets(count):
+    return [
+        {
+            "user": f"User {i % 500}",
+            "handle": f"@user{i % 500}",
+            "content": f"Tweet number {i} with a #hashtag, a mention @someone and a link https://t.co/{i:08x}",
+            "tweet_link": f"https://twitter.com/user{i % 500}/status/{1700000000000000000 + i}",
+            "tweet_id": str(1700000000000000000 + i),
+        }
+        for i in range(count)
+    ]
+
+
+def run(sizes=DEFAULT_SIZES):
+    from tweet_export import write_tweets_csv
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            tweets = synthetic_tweets(size)
+            file_path, seconds = timed(write_tweets_csv, tweets, file_path=os.path.join(tmp_dir, f"{size}.csv"))
+            results[f"export_csv_{size}"] = result(size, seconds, rows=size, bytes=os.path.getsize(file_path))
+            os.remove(file_path)
+    return results
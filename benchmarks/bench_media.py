@@ -0,0 +1,51 @@
+import os
+import tempfile
+from http.server import BaseHTTPRequestHandler
+
+from common import LocalServer, timed, result
+
+
+def media_handler(image_bytes, video_bytes):
+    """Serve deterministic image and video payloads of fixed sizes"""
+    image = bytes(range(256)) * (image_bytes // 256)
+    video = bytes(range(256)) * (video_bytes // 256)
+
+    class MediaHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body, content_type = (video, "video/mp4") if self.path.startswith("/video/") else (image, "image/jpeg")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MediaHandler
+
+
+def run(images=40, image_kb=300, videos=5, video_mb=8):
+    from twitter_downloader import MediaDownloader, download_video
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir, LocalServer(media_handler(image_kb * 1024, video_mb * 1024 * 1024)) as server:
+        # MediaDownloader writes under ./images
+        os.chdir(tmp_dir)
+        try:
+            urls = [f"{server.url}/media/bench{i}.jpg" for i in range(images)]
+            _, seconds = timed(MediaDownloader(urls).download, "bench", "1")
+            total_mb = images * image_kb / 1024
+            results["media_images"] = result(images, seconds, files=images, file_kb=image_kb, mb_per_second=round(total_mb / seconds, 2))
+
+            def download_videos():
+                for i in range(videos):
+                    download_video(f"{server.url}/video/bench{i}.mp4", os.path.join(tmp_dir, f"bench{i}.mp4"))
+
+            _, seconds = timed(download_videos)
+            total_mb = videos * video_mb
+            results["media_videos"] = result(videos, seconds, files=videos, file_mb=video_mb, mb_per_second=round(total_mb / seconds, 2))
+        finally:
+            os.chdir(cwd)
+    return results
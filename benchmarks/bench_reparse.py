@@ -0,0 +1,34 @@
+import re
+import tempfile
+
+from common import timed, result
+from bench_tweet import timeline_fixture
+
+_ARTICLE_RE = re.compile(r"<article.*?</article>", re.S)
+
+
+def run(cards=2000, chunk_bytes=256 * 1024):
+    """
+    Time offline re-extraction of archived cards (the `reparse` command) over
+    the same generated timeline markup the browser extraction benchmark uses.
+    """
+    from card_archive import CardArchive
+    from card_parser import reparse_archive
+
+    articles = _ARTICLE_RE.findall(timeline_fixture(cards))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive = CardArchive(tmp_dir, chunk_bytes=chunk_bytes)
+
+        def archive_all():
+            for html in articles:
+                archive.append(html)
+            archive.flush()
+
+        _, archive_seconds = timed(archive_all)
+        (tweets, parsed_cards), seconds = timed(reparse_archive, tmp_dir)
+        chunks = len(archive.chunks())
+
+    return {
+        "card_archive_append": result(len(articles), archive_seconds, cards=len(articles)),
+        "card_reparse": result(parsed_cards, seconds, cards=parsed_cards, tweets=len(tweets), chunks=chunks),
+    }
@@ -0,0 +1,46 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+from common import LocalServer, timed, result
+
+
+def fake_ollama_handler(latency):
+    """Ollama /api/generate stand-in that answers after a fixed latency"""
+    class FakeOllamaHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            tweet = payload.get("prompt", "").rsplit("Here is the tweet: ", 1)[-1]
+            body = json.dumps({"model": payload.get("model"), "response": f"Rephrased: {tweet}", "done": True}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeOllamaHandler
+
+
+def run(calls=50, latencies=(0.0, 0.05)):
+    import twitter_rephraser
+
+    results = {}
+    for latency in latencies:
+        with LocalServer(fake_ollama_handler(latency)) as server:
+            twitter_rephraser.OLLAMA_API_URL = f"{server.url}/api/generate"
+
+            def rephrase_all():
+                for i in range(calls):
+                    twitter_rephraser.rephrase_text_with_ollama(f"Benchmark tweet number {i} about something")
+
+            _, seconds = timed(rephrase_all)
+        overhead = seconds - calls * latency
+        results[f"rephrase_latency_{int(latency * 1000)}ms"] = result(
+            calls, seconds, calls=calls, server_latency_s=latency, client_overhead_s=round(overhead, 6)
+        )
+    return results
@@ -0,0 +1,38 @@
+import sys
+import subprocess
+
+from common import SCRAPER_DIR, timed, result
+
+COMMANDS = ("scrape", "download", "rephrase", "post", "run")
+
+
+def import_time(modules):
+    """Seconds a fresh interpreter spends importing the given scraper modules"""
+    code = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]); started = time.perf_counter(); "
+        + "".join(f"import {module}; " for module in modules)
+        + "print(time.perf_counter() - started)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code, SCRAPER_DIR], text=True, stderr=subprocess.DEVNULL)
+    return float(output.strip().splitlines()[-1])
+
+
+def run(repeats=3):
+    from pipeline import STAGE_MODULES
+
+    results = {}
+    for command in COMMANDS:
+        # Parsing arguments only loads the light modules every command shares
+        seconds = min(
+            timed(subprocess.run, [sys.executable, SCRAPER_DIR, command, "--help"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)[1]
+            for _ in range(repeats)
+        )
+        results[f"startup_help_{command}"] = result(1, seconds, command=command)
+
+        # Importing the stages is the cost a command pays before doing any work
+        try:
+            seconds = min(import_time(STAGE_MODULES[command]) for _ in range(repeats))
+        except (subprocess.CalledProcessError, ValueError):
+            continue
+        results[f"startup_imports_{command}"] = result(1, seconds, command=command, modules=STAGE_MODULES[command])
+    return results
@@ -0,0 +1,83 @@
+import os
+import html
+import tempfile
+
+from common import timed, result
+
+CARD_TEMPLATE = """
+<div><div><div>
+<article data-testid="tweet">
+  <div data-testid="User-Name">
+    <a href="/user{n}"><div><span>User {n}</span></div></a>
+    <a href="/user{n}"><span>@user{n}</span></a>
+    <a href="/user{n}/status/{status_id}"><time datetime="2024-05-01T12:{minute:02d}:00.000Z">May 1</time></a>
+  </div>
+  <div data-testid="tweetText">
+    <span>{text}</span>
+    <a href="/hashtag/bench?src=hashtag_click">#bench</a>
+    <span> and more words after the hashtag</span>
+  </div>
+  <div data-testid="tweetPhoto"><img src="https://pbs.twimg.com/media/Bench{n}?format=jpg&amp;name=small"></div>
+</article>
+</div></div></div>
+"""
+
+
+def timeline_fixture(cards):
+    """Synthetic timeline page using the same data-testid structure as the live site"""
+    body = "".join(
+        CARD_TEMPLATE.format(
+            n=n,
+            status_id=1700000000000000000 + n,
+            minute=n % 60,
+            text=html.escape(f"Benchmark tweet {n} with some text to extract"),
+        )
+        for n in range(cards)
+    )
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'></head><body>{body}</body></html>"
+
+
+def headless_driver():
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        options = webdriver.FirefoxOptions()
+        options.add_argument("--headless")
+        return webdriver.Firefox(options=options)
+    except WebDriverException:
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        return webdriver.Chrome(options=options)
+
+
+def run(cards=200, fixture=None):
+    """
+    Time Tweet extraction over a saved timeline page (`fixture`) or a
+    generated one with `cards` tweets, loaded via file:// in a headless browser.
+    """
+    from selenium.webdriver.common.action_chains import ActionChains
+    from tweet import Tweet
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if fixture is None:
+            fixture = os.path.join(tmp_dir, "timeline.html")
+            with open(fixture, "w", encoding="utf-8") as f:
+                f.write(timeline_fixture(cards))
+
+        driver = headless_driver()
+        try:
+            driver.get(f"file://{os.path.abspath(fixture)}")
+            card_elements = driver.find_elements("xpath", '//article[@data-testid="tweet" and not(@disabled)]')
+            actions = ActionChains(driver)
+
+            def extract_all():
+                return [Tweet(card=card, driver=driver, actions=actions) for card in card_elements]
+
+            tweets, seconds = timed(extract_all)
+        finally:
+            driver.quit()
+
+    parsed = sum(1 for tweet in tweets if not tweet.error)
+    return {"tweet_extraction": result(len(card_elements), seconds, cards=len(card_elements), parsed=parsed, fixture=os.path.basename(fixture))}
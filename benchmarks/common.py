@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import socket
+import threading
+from http.server import ThreadingHTTPServer
+
+# The scraper modules import each other as top-level modules
+SCRAPER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scraper")
+if SCRAPER_DIR not in sys.path:
+    sys.path.insert(0, SCRAPER_DIR)
+
+
+def quiet_logging():
+    """Keep benchmark output free of per-item log rendering"""
+    import logging
+    from logger import configure_logging
+    configure_logging(log_file=None, level=logging.WARNING, rich=False)
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn once and return (result, elapsed seconds)"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def result(items, seconds, **params):
+    """Uniform result record for the JSON report"""
+    return {
+        "params": params,
+        "items": items,
+        "seconds": round(seconds, 6),
+        "per_item_ms": round(1000 * seconds / items, 4) if items else None,
+        "items_per_second": round(items / seconds, 2) if seconds else None,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """Run a ThreadingHTTPServer on a free localhost port for the duration of a with-block"""
+    def __init__(self, handler_class):
+        self.server = ThreadingHTTPServer(("127.0.0.1", free_port()), handler_class)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
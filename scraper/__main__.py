@@ -1,18 +1,27 @@
 import os
 import sys
 import argparse
-from pprint import pprint
-import logging
-import getpass
-import re
+from functools import partial
 sys.stdout.reconfigure(encoding='utf-8')
 
-from twitter_scraper import Twitter_Scraper
-from twitter_downloader import download_twitter_video
-from twitter_poster import post_tweets_with_selenium, Twitter_Poster
-from logger import Logger
+# Only lightweight modules are imported here; selenium, pandas, bs4 and the
+# stage modules are loaded by the subcommands that need them (see pipeline.py).
+import pipeline
+from logger import Logger, configure_logging, batch_enabled
+from metrics import registry as metrics, start_metrics_server
+from driver_profiler import profiler
 
-from selenium.webdriver.chrome.options import Options
+# Exit codes, so cron and container runs can tell failures apart
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_LOGIN_FAILED = 3
+EXIT_POST_FAILED = 4
+EXIT_INTERRUPTED = 130
+
+# Posting flags a job submitted to `serve` may set in its params
+POST_JOB_OPTIONS = ("delay", "burst", "jitter", "keep_media", "fast_post", "text_entry", "optimize_media")
+
+SUBCOMMANDS = ("scrape", "download", "rephrase", "post", "reparse", "run", "daemon", "serve", "query")
 
 logger = Logger("AppLogger", "app.log")
 try:
@@ -25,162 +34,544 @@ except Exception as e:
     sys.exit(1)
 
 
-def main():
+def write_metrics_summary(path):
+    """Write the end-of-run metrics summary with a few derived rates"""
+    summary = metrics.summary()
+
+    def histogram_sum(name):
+        return sum(series["sum"] for series in summary.get(name, {}).values())
+
+    def counter_total(name, **labels):
+        metric = metrics.metrics.get(name)
+        return metric.total(**labels) if metric else 0
+
+    download_seconds = histogram_sum("media_download_seconds")
+    rephrase_count = sum(series["count"] for series in summary.get("rephrase_latency_seconds", {}).values())
+    post_attempts = counter_total("poster_posts_total")
+    prep_before = counter_total("media_prep_bytes_before_total")
+    prep_after = counter_total("media_prep_bytes_after_total")
+    image_uploads = summary.get("poster_upload_wait_seconds", {}).get('{type="image"}', {})
+    uploaded_image_bytes = counter_total("poster_upload_bytes_total", type="image")
+    extra = {
+        "derived": {
+            "tweets_per_second": summary.get("scraper_tweets_per_second", {}).get("total", 0),
+            "download_mb_per_second": round(counter_total("media_download_bytes_total") / 1e6 / download_seconds, 3) if download_seconds else 0,
+            "rephrase_mean_latency_seconds": round(histogram_sum("rephrase_latency_seconds") / rephrase_count, 3) if rephrase_count else 0,
+            "post_success_rate": round(counter_total("poster_posts_total", status="ok") / post_attempts, 3) if post_attempts else None,
+            "media_prep_bytes_saved": prep_before - prep_after,
+            "mean_image_upload_wait_seconds": image_uploads.get("mean", 0),
+            # Upload wait scales roughly with size, so estimate what the original bytes would have cost
+            "estimated_upload_seconds_saved": round(image_uploads["sum"] * (prep_before - prep_after) / uploaded_image_bytes, 1) if uploaded_image_bytes and image_uploads else 0,
+        }
+    }
+    if profiler.enabled and profiler.stats:
+        extra["driver_profile"] = profiler.summary()
+    metrics.write_summary(path, extra=extra)
+    logger.info(f"Metrics summary written to {path}")
+
+
+def common_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--log-file", type=str, default="app.log", help="Rotating JSON-lines log file (default: app.log)")
+    parser.add_argument("--log-format", choices=["json", "text"], default="json", help="Log file format (default: json)")
+    parser.add_argument("--no-rich", action="store_true", help="Plain console logging without Rich rendering, tables or progress bars")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on 127.0.0.1:<port>/metrics while running")
+    parser.add_argument("--metrics-summary", type=str, default="metrics_summary.json", help="End-of-run metrics summary file (default: metrics_summary.json)")
+    parser.add_argument("--profile-driver", action="store_true", help="Count and time every WebDriver command; report them at the end and in the metrics summary")
+    parser.add_argument("--batch", action="store_true", help="Non-interactive: never prompt, log one-line progress summaries instead of tables and panels, and exit with a status code on failure")
+    return parser
+
+
+def credential_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--mail", type=str, default=os.getenv("TWITTER_MAIL"), help="Your Twitter mail.")
+    parser.add_argument("--user", type=str, default=os.getenv("TWITTER_USERNAME"), help="Your Twitter username.")
+    parser.add_argument("--password", type=str, default=os.getenv("TWITTER_PASSWORD"), help="Your Twitter password.")
+    return parser
+
+
+def target_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-t", "--tweets", type=int, default=50, help="Number of tweets to scrape (default: 50)")
+    parser.add_argument("-u", "--username", type=str, default=None, help="Twitter username to scrape.")
+    parser.add_argument("-ht", "--hashtag", type=str, default=None, help="Twitter hashtag to scrape.")
+    parser.add_argument("-ntl", "--no_tweets_limit", nargs="?", default=False, help="Scrape tweets without limit.")
+    parser.add_argument("-q", "--query", type=str, default=None, help="Scrape tweets from a query or search.")
+    parser.add_argument("-a", "--add", type=str, default="", help="Additional data to scrape and save in CSV.")
+    parser.add_argument("--latest", action="store_true", help="Scrape latest tweets")
+    parser.add_argument("--top", action="store_true", help="Scrape top tweets")
+    parser.add_argument("--no-dedup", action="store_true", help="Don't drop near-duplicate tweets after scraping")
+    parser.add_argument("--dedup-threshold", type=float, default=0.9, help="Similarity (0-1) above which tweets count as near-duplicates (default: 0.9)")
+    parser.add_argument("--sync", action="store_true", help="Only scrape tweets newer than the last --sync run for this target (marks in ./state/sync_state.json)")
+    parser.add_argument("--sync-overlap", type=int, default=3, help="Already-seen tweets in a row that end a --sync scrape; tolerates pinned and out-of-order tweets (default: 3)")
+    parser.add_argument("--since", type=str, default=None, help="Shard a --query or --hashtag into since:/until: date windows starting at YYYY-MM-DD")
+    parser.add_argument("--until", type=str, default=None, help="End of the sharded date range, exclusive (default: tomorrow)")
+    parser.add_argument("--window-days", type=int, default=7, help="Days per date window when sharding (default: 7)")
+    parser.add_argument("--window-tweets", type=int, default=200, help="Tweets to scrape per date window (default: 200)")
+    parser.add_argument("--no-adaptive", action="store_true", help="Don't split date windows that fill their --window-tweets budget")
+    parser.add_argument("--shard-workers", type=int, default=2, help="Browsers scraping date windows in parallel (default: 2)")
+    parser.add_argument("--archive-cards", action="store_true", help="Keep every card's raw HTML in ./state/card_archive for offline re-parsing")
+    return parser
+
+
+def storage_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--storage", choices=["csv", "sqlite", "both"], default="csv", help="Save scraped tweets to a new CSV, upsert them into the SQLite archive, or both (default: csv)")
+    parser.add_argument("--db", type=str, default="./state/tweets.db", help="SQLite tweet archive (default: ./state/tweets.db)")
+    return parser
+
+
+def network_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--proxies", type=str, default=os.getenv("REPHRASEX_PROXIES"), help="File with one proxy URL per line, or a comma-separated list; browsers and download sessions are spread across them")
+    parser.add_argument("--proxy-max-failures", type=int, default=3, help="Retire a proxy after this many consecutive failures (default: 3)")
+    return parser
+
+
+def media_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--browsers", type=int, default=4, help="Headless browsers extracting media in parallel, capped by REPHRASEX_MAX_BROWSERS (default: 4)")
+    parser.add_argument("--download-workers", type=int, default=4, help="Concurrent media downloads (default: 4)")
+    return parser
+
+
+def post_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--delay", type=int, default=60, help="Delay between posting tweets (seconds)")
+    parser.add_argument("--burst", type=int, default=1, help="Number of tweets that may be posted back to back before pacing kicks in (default: 1)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random extra delay as a fraction of --delay (default: 0.1)")
+    parser.add_argument("--keep-media", action="store_true", help="Don't delete media files after posting")
+    parser.add_argument("--fast-post", action="store_true", help="Reuse the compose dialog between posts instead of reloading the home page")
+    parser.add_argument("--text-entry", choices=["insert", "paste", "keys"], default="insert", help="How tweet text is entered: one insertText event, a synthetic paste, or per-key send_keys (default: insert)")
+    parser.add_argument("--repost", action="store_true", help="Process tweets even if the ledger says they were already posted")
+    parser.add_argument("--max-post-attempts", type=int, default=3, help="Give up on a tweet after this many failed posts (default: 3)")
+    parser.add_argument("--accounts", type=str, default=None, help="JSON file of posting accounts; posts are spread across them concurrently")
+    parser.add_argument("--dispatch", choices=["round-robin", "affinity"], default="round-robin", help="How posts are assigned to accounts (default: round-robin)")
+    parser.add_argument("--optimize-media", action="store_true", help="Downscale and recompress images before upload, stripping metadata (needs Pillow)")
+    parser.add_argument("--media-max-side", type=int, default=2048, help="Longest image side after --optimize-media, in pixels (default: 2048)")
+    parser.add_argument("--media-quality", type=int, default=82, help="JPEG quality for --optimize-media (default: 82)")
+    parser.add_argument("--media-target-kb", type=int, default=None, help="Lower JPEG quality until images fit this size, in KB (default: no target)")
+    parser.add_argument("--media-workers", type=int, default=None, help="Processes recompressing images (default: one per CPU)")
+    return parser
+
+
+def input_arguments():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-i", "--input", type=str, default=None, help="CSV from a previous run, the SQLite archive (.db), a file of tweet URLs, or '-' for URLs on stdin (default: newest CSV in ./tweets)")
+    return parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        add_help=True,
+        usage="python scraper [command] [option] ... [arg] ...",
+        description="Twitter Scraper is a tool that allows you to scrape tweets from Twitter without using Twitter's API.",
+    )
+    subparsers = parser.add_subparsers(dest="command", prog="python scraper", metavar="{" + ",".join(SUBCOMMANDS) + "}")
+    common = common_arguments()
+
+    scrape = subparsers.add_parser("scrape", parents=[common, credential_arguments(), target_arguments(), storage_arguments(), network_arguments()], help="Scrape tweets and save them to CSV or SQLite")
+    scrape.set_defaults(handler=cmd_scrape)
+
+    download = subparsers.add_parser("download", parents=[common, input_arguments(), network_arguments(), media_arguments()], help="Download media for tweets from a CSV or URL list")
+    download.set_defaults(handler=cmd_download)
+
+    rephrase = subparsers.add_parser("rephrase", parents=[common, input_arguments()], help="Rephrase tweets from a CSV with Ollama")
+    rephrase.add_argument("-o", "--output", type=str, default=None, help="CSV to write (default: overwrite an input CSV, otherwise a new file in ./tweets)")
+    rephrase.set_defaults(handler=cmd_rephrase)
+
+    post = subparsers.add_parser("post", parents=[common, credential_arguments(), input_arguments(), post_arguments()], help="Post tweets from a CSV")
+    post.set_defaults(handler=cmd_post)
+
+    reparse = subparsers.add_parser("reparse", parents=[common], help="Re-extract tweets offline from the raw card archive")
+    reparse.add_argument("--archive", type=str, default="./state/card_archive", help="Card archive directory (default: ./state/card_archive)")
+    reparse.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU, at most one per chunk)")
+    reparse.add_argument("--parser", type=str, default="html.parser", help="BeautifulSoup parser, e.g. html.parser or lxml (default: html.parser)")
+    reparse.add_argument("-o", "--output", type=str, default=None, help="CSV to write (default: a new file in ./tweets)")
+    reparse.set_defaults(handler=cmd_reparse)
+
+    run = subparsers.add_parser("run", parents=[common, credential_arguments(), target_arguments(), storage_arguments(), network_arguments(), media_arguments(), post_arguments()], help="Scrape, download, rephrase and post (default)")
+    run.add_argument("--no-post", action="store_true", help="Only scrape and rephrase, don't post tweets")
+    run.add_argument("--no-media", action="store_true", help="Skip downloading media from tweets")
+    run.set_defaults(handler=cmd_run)
+
+    daemon = subparsers.add_parser("daemon", parents=[common, credential_arguments(), storage_arguments(), network_arguments(), media_arguments(), post_arguments()], help="Keep a logged-in browser running and run cycles on a schedule")
+    daemon.add_argument("--config", type=str, required=True, help="JSON file with the targets and schedule (see daemon.py)")
+    daemon.set_defaults(handler=cmd_daemon)
+
+    serve = subparsers.add_parser("serve", parents=[common, credential_arguments(), storage_arguments(), network_arguments(), media_arguments(), post_arguments()], help="Run a local HTTP/JSON API that queues and runs pipeline jobs")
+    serve.add_argument("--port", type=int, default=8765, help="Port to listen on, on 127.0.0.1 only (default: 8765)")
+    serve.add_argument("--workers", type=int, default=1, help="Jobs run at once, each with its own browser (default: 1)")
+    serve.set_defaults(handler=cmd_serve)
+
+    query = subparsers.add_parser("query", parents=[common], help="Look up tweets in the SQLite archive")
+    query.add_argument("--db", type=str, default="./state/tweets.db", help="SQLite tweet archive (default: ./state/tweets.db)")
+    query.add_argument("--handle", type=str, default=None, help="Only tweets by this @handle")
+    query.add_argument("--since", type=str, default=None, help="Only tweets on or after this date (YYYY-MM-DD)")
+    query.add_argument("--until", type=str, default=None, help="Only tweets before this date (YYYY-MM-DD)")
+    query.add_argument("--contains", type=str, default=None, help="Only tweets whose text contains this string")
+    query.add_argument("--rephrased", choices=["yes", "no"], default=None, help="Only tweets with (yes) or without (no) a stored rephrase")
+    query.add_argument("--limit", type=int, default=50, help="Maximum number of tweets, newest first; 0 for all (default: 50)")
+    query.add_argument("--json", action="store_true", help="Print the tweets as JSON lines instead of a table")
+    query.add_argument("-o", "--output", type=str, default=None, help="Also write the tweets to this CSV, e.g. as input for post")
+    query.set_defaults(handler=cmd_query)
+
+    return parser
+
+
+def require_credentials(args):
+    """Return (mail, username, password), prompting for anything missing unless in batch mode"""
+    user = args.user
+    password = args.password
+
+    if user is None and not batch_enabled():
+        user = input("Twitter Username:")
+
+    if password is None and not batch_enabled():
+        password = input("Enter Password:")
+
+    if not user or not password:
+        logger.error("Missing Twitter username or password environment variables. Please check your .env file.")
+        sys.exit(EXIT_USAGE)
+    return args.mail, user, password
+
+
+def validate_target(args):
+    logger.info("Validating scraping parameters...")
+    targets = [target for target in (args.username, args.hashtag, args.query) if target]
+    if len(targets) > 1:
+        logger.error("Please specify only one of --username, --hashtag, or --query.")
+        sys.exit(EXIT_USAGE)
+
+    if args.latest and args.top:
+        logger.error("Please specify either --latest or --top, not both.")
+        sys.exit(EXIT_USAGE)
+
+    if args.since and not (args.query or args.hashtag):
+        logger.error("--since shards a search, so it needs --query or --hashtag.")
+        sys.exit(EXIT_USAGE)
+
+
+def load_input_tweets(path):
+    """Read tweets from a CSV, a file of tweet URLs, or URLs on stdin"""
+    from tweet_export import latest_tweets_csv, read_tweets_csv, tweet_id_from_link
+
+    if path is None:
+        path = latest_tweets_csv()
+        if path is None:
+            logger.error("No input given and no CSV found in ./tweets/.")
+            sys.exit(EXIT_USAGE)
+        logger.info(f"Using newest CSV: {path}")
+
+    if path != "-" and path.lower().endswith(".csv"):
+        return read_tweets_csv(path)
+
+    if path.lower().endswith((".db", ".sqlite")):
+        from tweet_store import TweetStore
+        with TweetStore(path) as store:
+            return store.query(oldest_first=True)
+
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    with stream:
+        urls = [line.strip() for line in stream if line.strip() and not line.startswith("#")]
+    return [{"tweet_link": url, "tweet_id": tweet_id_from_link(url), "user": "", "content": ""} for url in urls]
+
+
+def scrape_from_args(args, scraper, create_worker=None):
+    if args.since:
+        return pipeline.scrape_sharded(
+            scraper,
+            create_worker,
+            query=args.query or f"#{args.hashtag}",
+            since=args.since,
+            until=args.until,
+            window_days=args.window_days,
+            workers=args.shard_workers,
+            window_tweets=args.window_tweets,
+            adaptive=not args.no_adaptive,
+            latest=not args.top,
+        )
+
+    additional_data = args.add.split(",")
+    with profiler.phase("scrape"):
+        return pipeline.scrape(
+            scraper,
+            max_tweets=args.tweets,
+            no_tweets_limit=args.no_tweets_limit if args.no_tweets_limit is not None else True,
+            username=args.username,
+            hashtag=args.hashtag,
+            query=args.query,
+            latest=args.latest,
+            top=args.top,
+            poster_details="pd" in additional_data,
+            sync=args.sync,
+            sync_overlap=args.sync_overlap,
+        )
+
+
+def post_from_args(args, tweets_data, credentials, ledger, driver=None):
+    accounts = None
+    if args.accounts:
+        from multi_account import load_accounts
+        accounts = load_accounts(args.accounts)
+
+    mail, user, password = credentials
+    media_prep = pipeline.create_media_prep(args.optimize_media, args.media_workers, args.media_max_side, args.media_quality, args.media_target_kb)
     try:
-        parser = argparse.ArgumentParser(
-            add_help=True,
-            usage="python scraper [option] ... [arg] ...",
-            description="Twitter Scraper is a tool that allows you to scrape tweets from Twitter without using Twitter's API.",
+        pipeline.post(
+            tweets_data,
+            username=user,
+            password=password,
+            mail=mail,
+            driver=driver,
+            accounts=accounts,
+            dispatch=args.dispatch,
+            delay=args.delay,
+            burst=args.burst,
+            jitter=args.jitter,
+            keep_media=args.keep_media,
+            fast_post=args.fast_post,
+            text_entry=args.text_entry,
+            ledger=ledger,
+            media_prep=media_prep,
+        )
+    finally:
+        if media_prep is not None:
+            media_prep.close()
+
+
+def cmd_scrape(args):
+    validate_target(args)
+    mail, user, password = require_credentials(args)
+    proxy_pool = pipeline.create_proxy_pool(args.proxies, args.proxy_max_failures)
+    scraper = pipeline.create_scraper(mail, user, password, None if args.no_dedup else args.dedup_threshold, args.archive_cards, proxy_pool)
+    create_worker = partial(pipeline.create_scraper, mail, user, password, None, False, proxy_pool)
+    with profiler.phase("login"):
+        scraper.login()
+    tweets = scrape_from_args(args, scraper, create_worker)
+    pipeline.show_tweets(tweets)
+    pipeline.save_tweets(scraper, args.storage, args.db)
+    if not scraper.interrupted:
+        scraper.quit()
+
+
+def cmd_download(args):
+    tweets = load_input_tweets(args.input)
+    logger.info("Starting media download process...")
+    with profiler.phase("media"):
+        pipeline.download_media(
+            tweets,
+            pipeline.create_proxy_pool(args.proxies, args.proxy_max_failures),
+            browsers=args.browsers,
+            download_workers=args.download_workers,
+        )
+
+
+def cmd_rephrase(args):
+    from tweet_export import write_tweets_csv
+
+    tweets = load_input_tweets(args.input)
+    pipeline.rephrase(tweets)
+    if args.input and args.input.lower().endswith((".db", ".sqlite")) and args.output is None:
+        from tweet_store import TweetStore
+        with TweetStore(args.input) as store:
+            logger.info(f"Stored {store.upsert(tweets)} rephrased tweets in {args.input}")
+        return
+    output = args.output
+    if output is None and args.input and args.input.lower().endswith(".csv"):
+        output = args.input
+    for tweet in tweets:
+        for key in ("user", "handle", "content", "tweet_link"):
+            tweet.setdefault(key, "")
+    logger.info(f"Rephrased CSV saved: {write_tweets_csv(tweets, file_path=output)}")
+
+
+def cmd_post(args):
+    from post_ledger import PostLedger
+
+    credentials = (args.mail, args.user, args.password) if args.accounts else require_credentials(args)
+    ledger = PostLedger(max_attempts=args.max_post_attempts, enforce=not args.repost)
+    tweets = pipeline.filter_with_ledger(load_input_tweets(args.input), ledger)
+    post_from_args(args, pipeline.to_post_data(tweets), credentials, ledger)
+
+
+def cmd_reparse(args):
+    from time import perf_counter
+    from card_parser import reparse_archive
+    from tweet_export import write_tweets_csv
+
+    started = perf_counter()
+    tweets, cards = reparse_archive(args.archive, workers=args.workers, parser=args.parser, logger=logger)
+    elapsed = perf_counter() - started
+    if not cards:
+        logger.error(f"No archived cards found in {args.archive}. Scrape with --archive-cards first.")
+        sys.exit(1)
+    logger.info(f"Reparsed {cards} cards into {len(tweets)} tweets in {elapsed:.2f}s ({cards / max(elapsed, 0.001):.0f} cards/s)")
+    pipeline.show_tweets(tweets, title="Reparsed Tweets Summary")
+    logger.info(f"CSV Saved: {write_tweets_csv(tweets, file_path=args.output)}")
+
+
+def cmd_query(args):
+    import json
+    from tweet_store import TweetStore
+    from tweet_export import write_tweets_csv
+
+    if not os.path.exists(args.db):
+        logger.error(f"No tweet archive at {args.db}. Scrape with --storage sqlite first.")
+        sys.exit(1)
+    with TweetStore(args.db) as store:
+        tweets = store.query(
+            handle=args.handle,
+            since=args.since,
+            until=args.until,
+            contains=args.contains,
+            rephrased=None if args.rephrased is None else args.rephrased == "yes",
+            limit=args.limit or None,
         )
+        total = store.count()
+
+    if args.json:
+        for tweet in tweets:
+            print(json.dumps(tweet, ensure_ascii=False))
+    else:
+        pipeline.show_tweets(tweets, title=f"{len(tweets)} of {total} archived tweets")
+    if args.output:
+        logger.info(f"CSV Saved: {write_tweets_csv(tweets, file_path=args.output)}")
+
+
+def cmd_run(args):
+    from post_ledger import PostLedger
+
+    validate_target(args)
+    credentials = require_credentials(args)
+    mail, user, password = credentials
+
+    # Step 1: Scrape Tweets
+    proxy_pool = pipeline.create_proxy_pool(args.proxies, args.proxy_max_failures)
+    scraper = pipeline.create_scraper(mail, user, password, None if args.no_dedup else args.dedup_threshold, args.archive_cards, proxy_pool)
+    create_worker = partial(pipeline.create_scraper, mail, user, password, None, False, proxy_pool)
+    scraper.idle_work = pipeline.IdleWork(scraper.get_tweets, download=not args.no_media, rephrase=not args.no_post, proxy_pool=proxy_pool)
+    with profiler.phase("login"):
+        scraper.login()
+    scraped_tweets = scrape_from_args(args, scraper, create_worker)
+    pipeline.show_tweets(scraped_tweets)
+    pipeline.save_tweets(scraper, args.storage, args.db)
+
+    # Skip tweets the ledger already has an outcome for
+    ledger = PostLedger(max_attempts=args.max_post_attempts, enforce=not args.repost)
+    scraped_tweets = pipeline.filter_with_ledger(scraped_tweets, ledger)
+
+    # Step 2: Download media from tweet links
+    if not args.no_media:
+        logger.info("Starting media download process...")
+        with profiler.phase("media"):
+            pipeline.download_media(scraped_tweets, proxy_pool, browsers=args.browsers, download_workers=args.download_workers)
+    else:
+        logger.info("Skipping media download (--no-media flag provided).")
+
+    # Step 3: Rephrase and Post Tweets
+    tweets_data = pipeline.to_post_data(scraped_tweets)
+    if not args.no_post:
+        driver = scraper.driver if not scraper.interrupted else None
+        post_from_args(args, tweets_data, credentials, ledger, driver=driver)
+    else:
+        logger.info("Skipping posting (--no-post flag provided).")
+
+    if not scraper.interrupted:
+        scraper.quit()
+
+
+def cmd_daemon(args):
+    from daemon import Daemon, load_daemon_config
+
+    config = load_daemon_config(args.config)
+    credentials = require_credentials(args)
+    mail, user, password = credentials
+    proxy_pool = pipeline.create_proxy_pool(args.proxies, args.proxy_max_failures)
+    Daemon(
+        config,
+        create_scraper=partial(pipeline.create_scraper, mail, user, password, config.get("dedup_threshold", 0.9), config.get("archive_cards", False), proxy_pool),
+        post_tweets=lambda tweets_data, ledger, driver: post_from_args(args, tweets_data, credentials, ledger, driver=driver),
+        proxy_pool=proxy_pool,
+        browsers=args.browsers,
+        download_workers=args.download_workers,
+        max_post_attempts=args.max_post_attempts,
+        repost=args.repost,
+        storage=args.storage,
+        db_path=args.db,
+    ).run()
 
-        parser.add_argument("--mail", type=str, default=os.getenv("TWITTER_MAIL"), help="Your Twitter mail.")
-        parser.add_argument("--user", type=str, default=os.getenv("TWITTER_USERNAME"), help="Your Twitter username.")
-        parser.add_argument("--password", type=str, default=os.getenv("TWITTER_PASSWORD"), help="Your Twitter password.")
-        parser.add_argument("-t", "--tweets", type=int, default=50, help="Number of tweets to scrape (default: 50)")
-        parser.add_argument("-u", "--username", type=str, default=None, help="Twitter username to scrape.")
-        parser.add_argument("-ht", "--hashtag", type=str, default=None, help="Twitter hashtag to scrape.")
-        parser.add_argument("-ntl", "--no_tweets_limit", nargs="?", default=False, help="Scrape tweets without limit.")
-        parser.add_argument("-q", "--query", type=str, default=None, help="Scrape tweets from a query or search.")
-        parser.add_argument("-a", "--add", type=str, default="", help="Additional data to scrape and save in CSV.")
-        parser.add_argument("--latest", action="store_true", help="Scrape latest tweets")
-        parser.add_argument("--top", action="store_true", help="Scrape top tweets")
-        parser.add_argument("--no-post", action="store_true", help="Only scrape and rephrase, don't post tweets")
-        parser.add_argument("--delay", type=int, default=60, help="Delay between posting tweets (seconds)")
-        parser.add_argument("--no-media", action="store_true", help="Skip downloading media from tweets")
-        parser.add_argument("--keep-media", action="store_true", help="Don't delete media files after posting")
-
-        args = parser.parse_args()
-
-        # Load user credentials
-        USER_MAIL = args.mail
-        USER_UNAME = args.user
-        USER_PASSWORD = args.password
-
-        if USER_UNAME is None:
-            USER_UNAME = input("Twitter Username:")
-
-        if USER_PASSWORD is None:
-            USER_PASSWORD = input("Enter Password:")
-
-        logger.info("Validating scraping parameters...")
-        tweet_type_args = []
-        if args.username:
-            tweet_type_args.append(args.username)
-        if args.hashtag:
-            tweet_type_args.append(args.hashtag)
-        if args.query:
-            tweet_type_args.append(args.query)
-
-        additional_data = args.add.split(",")
-
-        if len(tweet_type_args) > 1:
-            logger.error("Please specify only one of --username, --hashtag, or --query.")
-            sys.exit(1)
-
-        if args.latest and args.top:
-            logger.error("Please specify either --latest or --top, not both.")
-            sys.exit(1)
-
-        # Step 1: Scrape Tweets
-        if USER_UNAME and USER_PASSWORD:
-            scraper = Twitter_Scraper(
-                mail=USER_MAIL, username=USER_UNAME, password=USER_PASSWORD
-            )
-            scraper.login()
-            scraper.scrape_tweets(
-                max_tweets=args.tweets,
-                no_tweets_limit=args.no_tweets_limit if args.no_tweets_limit is not None else True,
-                scrape_username=args.username,
-                scrape_hashtag=args.hashtag,
-                scrape_query=args.query,
-                scrape_latest=args.latest,
-                scrape_top=args.top,
-                scrape_poster_details="pd" in additional_data,
-            )
-
-            scraped_tweets = scraper.get_tweets()
-
-            table_rows = []
-            for tweet in scraped_tweets:
-                user = tweet.get('user', '')
-                content = tweet.get('content', '')
-                tweet_link = tweet.get('tweet_link', '')
-                table_rows.append([user, content, tweet_link])
-            
-            headers = ["User", "Content", "Tweet Link"]
-            logger.log_table(headers, table_rows, title="Scraped Tweets Summary")
-
-            scraper.save_to_csv()
-
-            # Step 2: Download media from tweet links
-            if not args.no_media:
-                logger.info("Starting media download process...")
-                tweet_links = [tweet.get('tweet_link', '') for tweet in scraped_tweets if tweet.get('tweet_link', '')]
-                users = [tweet.get('user', '') for tweet in scraped_tweets if tweet.get('user', '')]
-                download_twitter_video(tweet_links, users)
-            else:
-                logger.info("Skipping media download (--no-media flag provided).")
-
-            # Step 3: Rephrase and Post Tweets
-            tweets_data = []
-            for tweet in scraped_tweets:
-                content = tweet.get('content', '')
-                tweet_link = tweet.get('tweet_link', '')
-                tweet_id = None
-                if tweet_link:
-                    match = re.search(r'/status/(\d+)', tweet_link)
-                    if match:
-                        tweet_id = match.group(1)
-                tweet_data = {
-                    "text": content,
-                    "media_urls": [],
-                    "user": tweet.get('user', ''),
-                    "tweet_link": tweet_link
-                }
-                if tweet_id:
-                    tweet_data["tweet_id"] = tweet_id
-                tweets_data.append(tweet_data)
-
-            if not args.no_post:
-                if not scraper.interrupted and hasattr(scraper, 'driver'):
-                    poster = Twitter_Poster(
-                        driver=scraper.driver,
-                        username=USER_UNAME,
-                        password=USER_PASSWORD,
-                        mail=USER_MAIL
-                    )
-                    poster.logged_in = True
-                else:
-                    poster = Twitter_Poster(
-                        username=USER_UNAME,
-                        password=USER_PASSWORD,
-                        mail=USER_MAIL
-                    )
-                    poster.login()
-
-                post_tweets_with_selenium(
-                    poster,
-                    tweets_data,
-                    delay_between_tweets=args.delay,
-                    keep_media=args.keep_media
-                )
-            else:
-                logger.info("Skipping posting (--no-post flag provided).")
-
-            if not scraper.interrupted and hasattr(scraper, 'driver'):
-                scraper.driver.close()
-        else:
-            logger.error("Missing Twitter username or password environment variables. Please check your .env file.")
-            sys.exit(1)
+
+def cmd_serve(args):
+    from job_api import JobAPI
+
+    credentials = require_credentials(args)
+    mail, user, password = credentials
+    if args.workers > 1:
+        # Rich allows only one live progress display, and jobs run in parallel
+        configure_logging(log_file=args.log_file, rich=False, json_lines=args.log_format == "json")
+    proxy_pool = pipeline.create_proxy_pool(args.proxies, args.proxy_max_failures)
+
+    def post_tweets(tweets_data, ledger, driver, params):
+        # Jobs may override the posting flags the server was started with, e.g. {"delay": 30}
+        job_args = argparse.Namespace(**{**vars(args), **{key: value for key, value in params.items() if key in POST_JOB_OPTIONS}})
+        post_from_args(job_args, tweets_data, credentials, ledger, driver=driver)
+
+    JobAPI(
+        create_scraper=partial(pipeline.create_scraper, mail, user, password, 0.9, False, proxy_pool),
+        post_tweets=post_tweets,
+        workers=args.workers,
+        port=args.port,
+        proxy_pool=proxy_pool,
+        browsers=args.browsers,
+        download_workers=args.download_workers,
+        storage=args.storage,
+        db_path=args.db,
+    ).serve()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Flags without a subcommand keep the original single-command behaviour
+    if not argv or argv[0] not in SUBCOMMANDS + ("-h", "--help"):
+        argv = ["run"] + list(argv)
+
+    args = build_parser().parse_args(argv)
+    configure_logging(
+        log_file=args.log_file,
+        rich=False if args.no_rich else None,
+        json_lines=args.log_format == "json",
+        batch=args.batch,
+    )
+    if args.profile_driver:
+        profiler.enable()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+        logger.info(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+
+    try:
+        args.handler(args)
+        if args.metrics_summary:
+            write_metrics_summary(args.metrics_summary)
+        profiler.report(logger)
 
     except KeyboardInterrupt:
         logger.warning("Script Interrupted by user. Exiting...")
-        sys.exit(1)
+        sys.exit(EXIT_INTERRUPTED if args.batch else EXIT_ERROR)
     except Exception as e:
+        if isinstance(e, pipeline.LoginError):
+            logger.error(f"Login failed: {e}")
+            sys.exit(EXIT_LOGIN_FAILED)
         logger.error(f"Error: {e}", exc_info=True)
-        import traceback
-        traceback.print_exc()
-        sys.exit(1)
+        if not args.batch:
+            import traceback
+            traceback.print_exc()
+        sys.exit(EXIT_ERROR)
+
+    post_failures = metrics.metrics.get("poster_posts_total")
+    if args.batch and post_failures is not None and post_failures.total(status="failed"):
+        logger.error(f"{post_failures.total(status='failed'):.0f} posts failed.")
+        sys.exit(EXIT_POST_FAILED)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import hashlib
+import threading
+
+from logger import Logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CARD_ARCHIVE_DIR = "./state/card_archive"
+CHUNK_BYTES = 64 * 1024 * 1024
+FLUSH_RECORDS = 200
+
+_STATUS_ID_RE = re.compile(r'/status/(\d+)')
+
+
+def card_key(html, tweet_id=None):
+    """Archive key for a card: its status ID, or a content hash for cards without one (ads)"""
+    if tweet_id:
+        return str(tweet_id)
+    match = _STATUS_ID_RE.search(html or "")
+    if match:
+        return match.group(1)
+    return "sha1:" + hashlib.sha1((html or "").encode("utf-8")).hexdigest()
+
+
+class CardArchive:
+    """
+    Append-only archive of raw tweet card HTML.
+
+    Records are buffered and written as one compressed member (gzip) or frame
+    (zstd, when `zstandard` is installed) per flush, appended to the current
+    chunk file; a new chunk is started once it passes `chunk_bytes`. Both
+    formats decode concatenated members as one stream, so chunks can be read
+    front to back. `index.jsonl` maps each card key to the chunk and byte
+    offset of the member holding it for single-card lookups.
+    """
+    def __init__(self, directory=CARD_ARCHIVE_DIR, compression=None, chunk_bytes=CHUNK_BYTES, flush_records=FLUSH_RECORDS):
+        self.logger = Logger("CardArchive", "card_archive.log")
+        self.directory = directory
+        self.compression = compression or ("zstd" if zstandard is not None else "gzip")
+        if self.compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs the 'zstandard' package")
+        self.chunk_bytes = chunk_bytes
+        self.flush_records = flush_records
+        self.extension = ".jsonl.zst" if self.compression == "zstd" else ".jsonl.gz"
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self.buffer = []
+        self.written = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.chunk_path = self._current_chunk()
+
+    def _current_chunk(self):
+        chunks = sorted(glob.glob(os.path.join(self.directory, f"cards-*{self.extension}")))
+        if chunks and os.path.getsize(chunks[-1]) < self.chunk_bytes:
+            return chunks[-1]
+        return os.path.join(self.directory, f"cards-{len(chunks) + 1:05d}{self.extension}")
+
+    def _compress(self, data):
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def append(self, html, tweet_id=None, source=None):
+        """Buffer one card's outerHTML; written out every `flush_records` cards"""
+        record = {
+            "id": card_key(html, tweet_id),
+            "captured_at": time.time(),
+            "source": source,
+            "html": html,
+        }
+        with self._lock:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.flush_records:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.buffer:
+            return
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self.buffer)
+        member = self._compress(payload.encode("utf-8"))
+
+        if os.path.exists(self.chunk_path) and os.path.getsize(self.chunk_path) >= self.chunk_bytes:
+            self.chunk_path = self._current_chunk()
+        offset = os.path.getsize(self.chunk_path) if os.path.exists(self.chunk_path) else 0
+        with open(self.chunk_path, "ab") as f:
+            f.write(member)
+
+        chunk_name = os.path.basename(self.chunk_path)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            for record in self.buffer:
+                f.write(json.dumps({"id": record["id"], "chunk": chunk_name, "offset": offset, "length": len(member)}) + "\n")
+
+        self.written += len(self.buffer)
+        self.logger.debug(f"Archived {len(self.buffer)} cards to {chunk_name} ({len(member)} bytes)")
+        self.buffer = []
+
+    def chunks(self):
+        return archive_chunks(self.directory)
+
+    def lookup(self, key):
+        """Raw record for one card key, or None (the newest capture wins)"""
+        entry = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    candidate = json.loads(line)
+                    if candidate["id"] == key:
+                        entry = candidate
+        if entry is None:
+            return None
+
+        found = None
+        for record in read_member(self.directory, entry["chunk"], entry["offset"], entry["length"]):
+            if record["id"] == key:
+                found = record
+        return found
+
+    def close(self):
+        self.flush()
+
+
+def _decode_records(data, name):
+    if name.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"Reading {name} needs the 'zstandard' package")
+        with zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True) as reader:
+            data = reader.read()
+    else:
+        data = gzip.decompress(data)
+    for line in data.decode("utf-8").splitlines():
+        if line:
+            yield json.loads(line)
+
+
+def archive_chunks(directory=CARD_ARCHIVE_DIR):
+    """Chunk files of an archive, oldest first; reading never creates anything"""
+    return sorted(glob.glob(os.path.join(directory, "cards-*.jsonl.*")))
+
+
+def archive_members(directory=CARD_ARCHIVE_DIR):
+    """
+    Every compressed member listed in the index, in write order, as
+    (chunk, offset, length, cards) tuples; empty when there is no index.
+    """
+    index_path = os.path.join(directory, "index.jsonl")
+    members = {}
+    if os.path.exists(index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                key = (entry["chunk"], entry["offset"], entry["length"])
+                members[key] = members.get(key, 0) + 1
+    return [(chunk, offset, length, cards) for (chunk, offset, length), cards in members.items()]
+
+
+def read_member(directory, chunk, offset, length):
+    """Yield the records of one compressed member"""
+    with open(os.path.join(directory, chunk), "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    yield from _decode_records(data, chunk)
+
+
+def read_chunk(path):
+    """Yield every record in one chunk file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    yield from _decode_records(data, path)
@@ -0,0 +1,128 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from card_archive import archive_chunks, archive_members, read_member, read_chunk, CARD_ARCHIVE_DIR
+
+TWITTER_BASE_URL = "https://twitter.com"
+# Cards per reparse task; a chunk holds many members, so batches keep every worker busy
+CARDS_PER_TASK = 1000
+
+
+def _own_text(tag):
+    return "".join(tag.find_all(string=True, recursive=False))
+
+
+def parse_card_html(html, parser="html.parser"):
+    """
+    Extract a tweet dict from a card's outerHTML with BeautifulSoup.
+
+    Mirrors the lookups in tweet.Tweet so archived cards can be re-extracted
+    without a browser; returns None for ads and cards missing a user or handle.
+    Update both places when the markup changes.
+    """
+    from bs4 import BeautifulSoup
+
+    card = BeautifulSoup(html, parser)
+
+    user = card.select_one('div[data-testid="User-Name"] span')
+    handle = card.find(lambda tag: tag.name == "span" and "@" in _own_text(tag))
+    time_tag = card.find("time")
+    if user is None or handle is None or time_tag is None:
+        return None
+
+    content = ""
+    tweet_text = card.select_one('div[data-testid="tweetText"]')
+    if tweet_text is not None:
+        parts = [child.get_text().strip() for child in tweet_text.find_all(["span", "a"], recursive=False)]
+        content = " ".join(parts).strip() or tweet_text.get_text()
+
+    tweet_link = ""
+    tweet_id = ""
+    status_link = card.find("a", href=lambda href: href and "/status/" in href)
+    if status_link is not None:
+        tweet_link = status_link["href"]
+        if tweet_link.startswith("/"):
+            tweet_link = TWITTER_BASE_URL + tweet_link
+        tweet_id = str(tweet_link.split("/")[-1])
+
+    media_urls = [img["src"] for img in card.find_all("img", src=lambda src: src and "pbs.twimg.com/media" in src)]
+
+    return {
+        'user': user.get_text(),
+        'handle': handle.get_text(),
+        'content': content,
+        'tweet_link': tweet_link,
+        'tweet_id': tweet_id,
+        'media_urls': media_urls,
+        'date_time': time_tag.get("datetime"),
+    }
+
+
+def _parse_records(records, parser):
+    tweets = []
+    cards = 0
+    for record in records:
+        cards += 1
+        tweet = parse_card_html(record["html"], parser)
+        if tweet is not None:
+            tweets.append(tweet)
+    return tweets, cards
+
+
+def reparse_chunk(path, parser="html.parser"):
+    """Re-extract every card in one archive chunk; runs in a worker process"""
+    return _parse_records(read_chunk(path), parser)
+
+
+def reparse_members(directory, members, parser="html.parser"):
+    """Re-extract the cards in a batch of (chunk, offset, length, cards) members; runs in a worker process"""
+    def records():
+        for chunk, offset, length, _ in members:
+            yield from read_member(directory, chunk, offset, length)
+    return _parse_records(records(), parser)
+
+
+def member_batches(members, cards_per_task=CARDS_PER_TASK):
+    """Group consecutive members into batches of about `cards_per_task` cards"""
+    batches, batch, cards = [], [], 0
+    for member in members:
+        batch.append(member)
+        cards += member[3]
+        if cards >= cards_per_task:
+            batches.append(batch)
+            batch, cards = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def reparse_archive(directory=CARD_ARCHIVE_DIR, workers=None, parser="html.parser", logger=None, cards_per_task=CARDS_PER_TASK):
+    """
+    Re-run extraction over the whole archive with a process pool, split by
+    the index's member offsets into tasks of about `cards_per_task` cards
+    (whole chunks when there is no index). Only reads the archive.
+    Returns the tweets, deduplicated by status ID (the newest capture wins),
+    and the number of archived cards read.
+    """
+    members = archive_members(directory)
+    if members:
+        tasks = [(reparse_members, directory, batch) for batch in member_batches(members, cards_per_task)]
+    else:
+        tasks = [(reparse_chunk, path) for path in archive_chunks(directory)]
+    if not tasks:
+        return [], 0
+
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    tweets_by_id = {}
+    cards = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Submitted in write order and consumed in that order, so later captures overwrite earlier ones
+        futures = [executor.submit(*task, parser) for task in tasks]
+        for done, future in enumerate(futures, 1):
+            tweets, task_cards = future.result()
+            cards += task_cards
+            for tweet in tweets:
+                tweets_by_id[tweet['tweet_id'] or tweet['tweet_link'] or id(tweet)] = tweet
+            if logger:
+                logger.info(f"Reparsed batch {done}/{len(tasks)}: {len(tweets)}/{task_cards} cards extracted")
+    return list(tweets_by_id.values()), cards
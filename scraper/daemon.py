@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import signal
+import threading
+
+from logger import Logger
+from sync_state import sync_target_key
+
+DAEMON_STATE_PATH = "./state/daemon.json"
+DAEMON_COOKIES_PATH = "./state/daemon_cookies.json"
+# Wait before retrying a failed login, doubled per failure up to the maximum
+LOGIN_RETRY_SECONDS = 60
+LOGIN_RETRY_MAX_SECONDS = 3600
+
+
+def load_daemon_config(path):
+    """
+    Load the daemon's targets and schedule from a JSON file, e.g.
+
+        {
+            "interval_minutes": 60,
+            "download": true,
+            "post": true,
+            "targets": [
+                {"username": "elonmusk", "tweets": 20},
+                {"hashtag": "python", "top": true, "every_minutes": 180},
+                {"query": "selenium python", "sync": false}
+            ]
+        }
+
+    A target without username, hashtag or query scrapes the home timeline.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not config.get("targets"):
+        raise ValueError(f"{path} has no targets")
+    for target in config["targets"]:
+        if sum(1 for kind in ("username", "hashtag", "query") if target.get(kind)) > 1:
+            raise ValueError(f"Target in {path} sets more than one of username, hashtag and query: {target}")
+    config.setdefault("interval_minutes", 60)
+    config.setdefault("download", True)
+    config.setdefault("post", True)
+    return config
+
+
+def write_json(path, data, private=False):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    if private:
+        os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+
+
+def restore_session(scraper, path=DAEMON_COOKIES_PATH):
+    """Log a fresh browser in from saved cookies; True if it ends up authenticated"""
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        scraper.import_cookies(json.load(f))
+    return any(cookie["name"] == "auth_token" for cookie in scraper.driver.get_cookies())
+
+
+def save_session(scraper, path=DAEMON_COOKIES_PATH):
+    """Save a logged-in browser's cookies, readable only by the current user"""
+    write_json(path, scraper.export_cookies(), private=True)
+
+
+def target_key(target):
+    """Same key the sync state uses for the target, so both stay in step"""
+    tab = "Top" if target.get("top") else "Latest"
+    if target.get("username"):
+        details = {"type": "Username", "username": target["username"]}
+    elif target.get("hashtag"):
+        details = {"type": "Hashtag", "hashtag": str(target["hashtag"]).replace("#", ""), "tab": tab}
+    elif target.get("query"):
+        details = {"type": "Query", "query": target["query"], "tab": tab}
+    else:
+        details = {"type": "Home"}
+    return sync_target_key(details)
+
+
+class Daemon:
+    """
+    Runs scrape → download → rephrase → post cycles on a schedule from one
+    long-lived process.
+
+    The scraper's browser is logged in once and reused for every target and
+    for posting. Its session cookies are saved so a restart skips the login.
+    Each target's last and next run times are persisted to ./state, so a
+    restart resumes the schedule instead of running everything at once.
+    Logins never prompt; when one fails, due targets are marked failed and
+    the login is retried with exponential backoff. SIGTERM or Ctrl+C stops
+    the daemon after the current stage; a second signal interrupts the stage
+    itself.
+    """
+    def __init__(self, config, create_scraper, post_tweets, proxy_pool=None, browsers=4, download_workers=4,
+                 max_post_attempts=3, repost=False, storage="csv", db_path=None, state_path=DAEMON_STATE_PATH,
+                 cookies_path=DAEMON_COOKIES_PATH):
+        self.logger = Logger("Daemon", "daemon.log")
+        self.config = config
+        self.create_scraper = create_scraper
+        self.post_tweets = post_tweets
+        self.proxy_pool = proxy_pool
+        self.browsers = browsers
+        self.download_workers = download_workers
+        self.max_post_attempts = max_post_attempts
+        self.repost = repost
+        self.storage = storage
+        self.db_path = db_path
+        self.state_path = state_path
+        self.cookies_path = cookies_path
+        self.scraper = None
+        self.login_failures = 0
+        self.login_retry_at = 0
+        self.stopping = threading.Event()
+        self.state = {"targets": {}}
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def save_state(self):
+        write_json(self.state_path, self.state)
+
+    def stop(self, signum=None, frame=None):
+        if self.stopping.is_set():
+            raise KeyboardInterrupt
+        self.logger.info("Shutdown requested, stopping after the current stage...")
+        self.stopping.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.state["started_at"] = time.time()
+        try:
+            self._warm_up()
+            while not self.stopping.is_set():
+                due = self._due_targets()
+                if not due:
+                    wait = self._next_run() - time.time()
+                    self.logger.info(f"Next cycle in {max(wait, 0) / 60:.1f} minutes")
+                    self.stopping.wait(max(wait, 1))
+                    continue
+                for target in due:
+                    if self.stopping.is_set():
+                        break
+                    self._run_target(target)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self.state["stopped_at"] = time.time()
+        self.save_state()
+        if self.scraper is not None:
+            self._save_cookies()
+            self.scraper.quit()
+            self.scraper = None
+        if self.proxy_pool is not None:
+            self.proxy_pool.save()
+        self.logger.info("Daemon stopped.")
+
+    def _warm_up(self):
+        self._ensure_browser()
+        if self.config["post"]:
+            from twitter_rephraser import warm_up
+            if warm_up(self.config.get("ollama_keep_alive", "30m")):
+                self.logger.info("Ollama model loaded.")
+
+    def _ensure_browser(self):
+        """Start and log in a browser if there is none; False while logins are failing"""
+        if self.scraper is not None:
+            return True
+        if time.time() < self.login_retry_at:
+            return False
+        from selenium.common.exceptions import WebDriverException
+        from pipeline import LoginError
+
+        scraper = self.create_scraper()
+        try:
+            if restore_session(scraper, self.cookies_path):
+                self.logger.info("Restored the saved browser session, skipping login.")
+            else:
+                # Nobody is there to answer a prompt
+                scraper.login(interactive=False)
+        except (LoginError, WebDriverException) as e:
+            # A page that fails to load while restoring the session counts as a failed login
+            if isinstance(e, WebDriverException):
+                scraper.record_proxy_failure()
+            self.login_failures += 1
+            wait = min(LOGIN_RETRY_SECONDS * 2 ** (self.login_failures - 1), LOGIN_RETRY_MAX_SECONDS)
+            self.login_retry_at = time.time() + wait
+            self.logger.error(f"Login failed ({e}), retrying in {wait / 60:.0f} minutes")
+            scraper.quit()
+            return False
+        self.scraper = scraper
+        self.login_failures = 0
+        self.login_retry_at = 0
+        self._save_cookies()
+        return True
+
+    def _save_cookies(self):
+        try:
+            save_session(self.scraper, self.cookies_path)
+        except Exception as e:
+            self.logger.warning(f"Could not save the browser session: {e}")
+
+    def _browser_alive(self):
+        try:
+            self.scraper.driver.title
+            return True
+        except Exception:
+            return False
+
+    def _target_state(self, target):
+        return self.state["targets"].setdefault(target_key(target), {"runs": 0, "failures": 0, "tweets": 0})
+
+    def _interval(self, target):
+        return 60 * target.get("every_minutes", self.config["interval_minutes"])
+
+    def _due_targets(self):
+        now = time.time()
+        return [target for target in self.config["targets"] if self._target_state(target).get("next_run", 0) <= now]
+
+    def _next_run(self):
+        next_run = min(self._target_state(target).get("next_run", 0) for target in self.config["targets"])
+        return max(next_run, self.login_retry_at)
+
+    def _run_target(self, target):
+        key = target_key(target)
+        target_state = self._target_state(target)
+        started = time.time()
+        if not self._ensure_browser():
+            target_state["failures"] += 1
+            target_state["last_error"] = "login failed"
+            target_state["next_run"] = max(self.login_retry_at, started + 1)
+            self.save_state()
+            return
+        self.logger.info(f"Cycle for {key} starting")
+        try:
+            tweets = self._cycle(target)
+            target_state["tweets"] += len(tweets)
+            target_state["last_error"] = None
+            self.logger.info(f"Cycle for {key} done in {time.time() - started:.0f}s: {len(tweets)} new tweets")
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            target_state["failures"] += 1
+            target_state["last_error"] = str(e)
+            self.logger.error(f"Cycle for {key} failed: {e}", exc_info=True)
+            if not self._browser_alive():
+                self.logger.warning("Browser is gone, a new one starts with the next cycle.")
+                self.scraper.record_proxy_failure()
+                self.scraper.quit()
+                self.scraper = None
+        target_state["runs"] += 1
+        target_state["last_run"] = started
+        target_state["next_run"] = started + self._interval(target)
+        self.save_state()
+
+    def _cycle(self, target):
+        import pipeline
+        from post_ledger import PostLedger
+        from post_queue import PostQueue
+
+        tweets = pipeline.scrape(
+            self.scraper,
+            max_tweets=target.get("tweets", 50),
+            no_tweets_limit=False,
+            username=target.get("username"),
+            hashtag=target.get("hashtag"),
+            query=target.get("query"),
+            latest=not target.get("top"),
+            top=bool(target.get("top")),
+            sync=target.get("sync", True),
+        )
+        if tweets:
+            pipeline.save_tweets(self.scraper, self.storage, self.db_path)
+
+        ledger = PostLedger(max_attempts=self.max_post_attempts, enforce=not self.repost)
+        tweets = pipeline.filter_with_ledger(tweets, ledger)
+        if self.stopping.is_set():
+            return tweets
+
+        if self.config["download"] and tweets:
+            pipeline.download_media(tweets, self.proxy_pool, browsers=self.browsers, download_workers=self.download_workers)
+        if self.stopping.is_set():
+            return tweets
+
+        # Also drains tweets an interrupted earlier cycle left in the post queue
+        if self.config["post"] and (tweets or PostQueue().depth()):
+            self.post_tweets(pipeline.to_post_data(tweets), ledger, self.scraper.driver)
+        return tweets
@@ -0,0 +1,160 @@
+import os
+import re
+import json
+import hashlib
+from urllib.parse import urlparse
+
+from logger import Logger
+
+DEDUP_INDEX_PATH = "./state/dedup_index.json"
+FINGERPRINT_BITS = 64
+BAND_BITS = 8
+
+logger = Logger("NearDuplicateFilter", "dedup.log")
+
+_URL_RE = re.compile(r"https?://\S+")
+_RETWEET_PREFIX_RE = re.compile(r"^rt\s+@\w+:?\s*")
+_TOKEN_RE = re.compile(r"[#@]?\w+")
+
+
+def normalize_url(url):
+    """Strip scheme, query string and fragment so tracking params don't change the fingerprint"""
+    parsed = urlparse(url)
+    return f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}"
+
+
+def extract_features(content, media_urls=None):
+    """Turn tweet content and media URLs into a list of shingles for fingerprinting"""
+    text = (content or "").lower()
+    text = _RETWEET_PREFIX_RE.sub("", text)
+
+    features = [f"url:{normalize_url(url)}" for url in _URL_RE.findall(text)]
+    text = _URL_RE.sub(" ", text)
+
+    tokens = _TOKEN_RE.findall(text)
+    if len(tokens) < 3:
+        features.extend(tokens)
+    else:
+        features.extend(" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2))
+
+    for media_url in media_urls or []:
+        features.append(f"media:{normalize_url(media_url)}")
+
+    return features
+
+
+def simhash(features):
+    """Compute a 64-bit SimHash fingerprint over a list of string features"""
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def similarity(a, b):
+    """Fraction of matching bits between two fingerprints"""
+    return 1 - bin(a ^ b).count("1") / FINGERPRINT_BITS
+
+
+class NearDuplicateIndex:
+    """
+    Persistent SimHash index used to drop near-identical tweets (retweet chains,
+    copypasta, links that differ only by tracking params) right after extraction.
+
+    Fingerprints are split into 8-bit bands; any two fingerprints within 7 bits
+    of each other share at least one band, so lookups only compare against the
+    candidates in matching bands instead of the whole index.
+    """
+    def __init__(self, path=DEDUP_INDEX_PATH, threshold=0.9):
+        self.path = path
+        self.threshold = threshold
+        self.max_distance = int(FINGERPRINT_BITS * (1 - threshold))
+        self.fingerprints = {}
+        self.bands = {}
+        self.skipped = 0
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for key, fingerprint in stored.get("fingerprints", {}).items():
+                self._insert(key, int(fingerprint, 16))
+            logger.info(f"Loaded {len(self.fingerprints)} fingerprints from {self.path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load dedup index {self.path}: {e}")
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "threshold": self.threshold,
+                    "fingerprints": {key: f"{fp:016x}" for key, fp in self.fingerprints.items()},
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _band_keys(self, fingerprint):
+        return [
+            (band, fingerprint >> (band * BAND_BITS) & ((1 << BAND_BITS) - 1))
+            for band in range(FINGERPRINT_BITS // BAND_BITS)
+        ]
+
+    def _insert(self, key, fingerprint):
+        self.fingerprints[key] = fingerprint
+        for band_key in self._band_keys(fingerprint):
+            self.bands.setdefault(band_key, set()).add(key)
+
+    def _candidates(self, fingerprint):
+        # Banding only guarantees recall up to (bands - 1) differing bits
+        if self.max_distance >= FINGERPRINT_BITS // BAND_BITS:
+            return self.fingerprints.keys()
+        candidates = set()
+        for band_key in self._band_keys(fingerprint):
+            candidates.update(self.bands.get(band_key, ()))
+        return candidates
+
+    def find_duplicate(self, fingerprint):
+        """Return the key of a stored fingerprint within the threshold, if any"""
+        for key in self._candidates(fingerprint):
+            if similarity(fingerprint, self.fingerprints[key]) >= self.threshold:
+                return key
+        return None
+
+    def check_and_add(self, key, content, media_urls=None):
+        """
+        Check a tweet against the index and record it if it is new.
+
+        Returns the key of the matching tweet when it is a near-duplicate,
+        otherwise None.
+        """
+        features = extract_features(content, media_urls)
+        if not features:
+            return None
+
+        fingerprint = simhash(features)
+        duplicate_of = self.find_duplicate(fingerprint)
+        if duplicate_of is not None and duplicate_of != key:
+            self.skipped += 1
+            return duplicate_of
+
+        self._insert(key, fingerprint)
+        self._dirty = True
+        return None
@@ -0,0 +1,107 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class DriverProfiler:
+    """
+    Opt-in profiler for Selenium round-trips.
+
+    Every WebDriver and WebElement command (find_element, execute_script,
+    get_attribute, .text, get, ...) goes through the driver's `execute`
+    method, so wrapping that one method on an instance counts and times all
+    of them. Each command is tagged with the calling thread's current phase.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self):
+        self.enabled = True
+
+    @property
+    def current_phase(self):
+        return getattr(self._local, "phase", "other")
+
+    @contextmanager
+    def phase(self, name):
+        """Tag commands issued by this thread inside the block with `name`"""
+        previous = getattr(self._local, "phase", None)
+        self._local.phase = name
+        try:
+            yield
+        finally:
+            self._local.phase = previous or "other"
+
+    def instrument(self, driver):
+        """Wrap a driver's execute method; a no-op unless profiling is enabled"""
+        if not self.enabled or driver is None or getattr(driver, "_profiled", False):
+            return driver
+
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            started = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                self.record(driver_command, time.perf_counter() - started)
+
+        driver.execute = execute
+        driver._profiled = True
+        return driver
+
+    def record(self, command, seconds):
+        key = (self.current_phase, command)
+        with self._lock:
+            stat = self.stats.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    def rows(self, top=20):
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return [
+            [phase, command, count, f"{total:.2f}s", f"{1000 * total / count:.1f}ms", f"{1000 * slowest:.0f}ms"]
+            for (phase, command), (count, total, slowest) in items
+        ]
+
+    def phase_totals(self):
+        """(command count, total seconds) per phase"""
+        totals = {}
+        with self._lock:
+            for (phase, _), (count, total, _) in self.stats.items():
+                phase_count, phase_time = totals.get(phase, (0, 0.0))
+                totals[phase] = (phase_count + count, phase_time + total)
+        return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+    def summary(self, top=20):
+        """Per-command and per-phase timings for the metrics summary file"""
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            "commands": [
+                {"phase": phase, "command": command, "count": count, "total_seconds": round(total, 3),
+                 "mean_ms": round(1000 * total / count, 1), "max_ms": round(1000 * slowest, 1)}
+                for (phase, command), (count, total, slowest) in items
+            ],
+            "phases": {phase: {"count": count, "total_seconds": round(total, 3)} for phase, (count, total) in self.phase_totals().items()},
+        }
+
+    def report(self, logger, top=20):
+        """Log the top commands by total time, with per-phase totals"""
+        if not self.enabled or not self.stats:
+            return
+
+        logger.log_table(
+            ["Phase", "Command", "Count", "Total", "Mean", "Max"],
+            self.rows(top),
+            title="WebDriver commands by total time",
+        )
+        for phase, (count, total) in self.phase_totals().items():
+            logger.info(f"WebDriver phase '{phase}': {count} commands, {total:.2f}s")
+
+profiler = DriverProfiler()
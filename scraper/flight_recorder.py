@@ -0,0 +1,122 @@
+import io
+import os
+import json
+import time
+import glob
+import uuid
+from collections import deque
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# One round-trip that captures everything a snapshot needs
+SNAPSHOT_SCRIPT = """
+const root = document.querySelector('[role="dialog"]') || document.body;
+return [location.href, document.title, root ? root.outerHTML.slice(0, arguments[0]) : ''];
+"""
+
+
+class FlightRecorder:
+    """
+    Keeps a bounded ring buffer of lightweight browser snapshots (URL, DOM
+    excerpt, timings) in memory. Nothing touches the disk until a failure is
+    dumped, and the dump directory is pruned to stay within its retention limits.
+    """
+    def __init__(
+        self,
+        directory="./debug_screenshots",
+        capacity=50,
+        excerpt_chars=2000,
+        max_files=40,
+        max_bytes=50 * 1024 * 1024,
+        logger=None,
+    ):
+        self.directory = directory
+        self.snapshots = deque(maxlen=capacity)
+        self.excerpt_chars = excerpt_chars
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.started_at = time.time()
+        self.last_at = self.started_at
+
+    def mark(self):
+        """Start timing a new operation (e.g. one post)"""
+        self.started_at = self.last_at = time.time()
+
+    def record(self, driver, label, capture_dom=True, **details):
+        """Append a snapshot to the ring buffer"""
+        now = time.time()
+        snapshot = {
+            "label": label,
+            "time": now,
+            "elapsed": round(now - self.started_at, 3),
+            "step": round(now - self.last_at, 3),
+        }
+        snapshot.update(details)
+        self.last_at = now
+
+        if capture_dom and driver is not None:
+            try:
+                url, title, excerpt = driver.execute_script(SNAPSHOT_SCRIPT, self.excerpt_chars)
+                snapshot.update(url=url, title=title, dom_excerpt=excerpt)
+            except Exception as e:
+                snapshot["snapshot_error"] = str(e)
+
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def dump(self, driver, label):
+        """
+        Persist the buffered snapshots plus a compressed screenshot for a failure.
+
+        Returns the path of the written JSON report.
+        """
+        self.record(driver, label)
+        os.makedirs(self.directory, exist_ok=True)
+        # Millisecond timestamp plus a random suffix, so dumps from a retry loop never overwrite each other
+        stem = os.path.join(self.directory, f"{label}_{time.time() * 1000:.0f}_{uuid.uuid4().hex[:6]}")
+
+        screenshot_path = None
+        if driver is not None:
+            try:
+                screenshot_path = self._write_screenshot(driver.get_screenshot_as_png(), stem)
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Could not capture failure screenshot: {e}")
+
+        report_path = f"{stem}.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"label": label, "screenshot": screenshot_path, "snapshots": list(self.snapshots)}, f, indent=2)
+
+        self.prune()
+        if self.logger:
+            self.logger.info(f"Flight recorder dumped {len(self.snapshots)} snapshots to {report_path}")
+        return report_path
+
+    def _write_screenshot(self, png_bytes, stem):
+        if Image is None:
+            path = f"{stem}.png"
+            with open(path, "wb") as f:
+                f.write(png_bytes)
+            return path
+
+        path = f"{stem}.jpg"
+        image = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+        image.thumbnail((1280, 1280))
+        image.save(path, "JPEG", quality=60, optimize=True)
+        return path
+
+    def prune(self):
+        """Delete the oldest dumps beyond the file count and size limits"""
+        files = sorted(glob.glob(os.path.join(self.directory, "*")), key=os.path.getmtime, reverse=True)
+        total_bytes = 0
+        for i, path in enumerate(files):
+            total_bytes += os.path.getsize(path)
+            if i >= self.max_files or total_bytes > self.max_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
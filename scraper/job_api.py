@@ -0,0 +1,405 @@
+import os
+import json
+import time
+import hmac
+import uuid
+import secrets
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger import Logger
+from daemon import write_json, restore_session, save_session
+from metrics import registry as metrics
+
+JOBS_PATH = "./state/jobs.json"
+TOKEN_PATH = "./state/api_token"
+
+# Stages each job type runs, in order
+JOB_STAGES = {
+    "scrape": ["scrape"],
+    "download": ["download"],
+    "rephrase": ["rephrase"],
+    "post": ["post"],
+    "run": ["scrape", "download", "rephrase", "post"],
+}
+
+JOBS = metrics.counter("api_jobs_total", "Jobs finished by the job API, by type and status")
+JOB_SECONDS = metrics.histogram("api_job_seconds", "Time from a job starting to finishing, by type")
+
+
+def write_token(path=TOKEN_PATH):
+    """Create a fresh API token for this run, readable only by the current user"""
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, path)
+    return token
+
+
+class JobStore:
+    """
+    Persistent job queue stored as a JSON file.
+
+    Jobs are kept in submission order with their status (queued, running,
+    done, failed or cancelled), per-stage progress and result. Jobs still
+    marked running when the store is loaded were interrupted by a restart
+    and go back to the queue. Only the newest `history_size` finished jobs
+    are kept.
+    """
+    def __init__(self, path=JOBS_PATH, history_size=500):
+        self.path = path
+        self.history_size = history_size
+        self.jobs = {}
+        self._changed = threading.Condition()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for job in json.load(f):
+                    if job["status"] == "running":
+                        job["status"] = "queued"
+                    self.jobs[job["id"]] = job
+
+    def save(self):
+        finished = [job for job in self.jobs.values() if job["status"] in ("done", "failed", "cancelled")]
+        for job in finished[:max(0, len(finished) - self.history_size)]:
+            del self.jobs[job["id"]]
+        write_json(self.path, list(self.jobs.values()))
+
+    def submit(self, job_type, params):
+        if job_type not in JOB_STAGES:
+            raise ValueError(f"Unknown job type '{job_type}', expected one of {', '.join(JOB_STAGES)}")
+        if not isinstance(params, dict):
+            raise ValueError("Job params must be a JSON object")
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "type": job_type,
+            "params": params,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {stage: {"status": "pending", "done": 0, "total": None} for stage in JOB_STAGES[job_type]},
+            "result": None,
+            "error": None,
+        }
+        with self._changed:
+            self.jobs[job["id"]] = job
+            self.save()
+            self._changed.notify()
+        return dict(job)
+
+    def get(self, job_id):
+        with self._changed:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def list(self, status=None):
+        with self._changed:
+            return [
+                {key: job[key] for key in ("id", "type", "status", "created_at", "started_at", "finished_at")}
+                for job in self.jobs.values() if status is None or job["status"] == status
+            ]
+
+    def counts(self):
+        with self._changed:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+    def cancel(self, job_id):
+        """Cancel a queued job; returns its status afterwards, or None if unknown"""
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued":
+                job["status"] = "cancelled"
+                job["finished_at"] = time.time()
+                self.save()
+            return job["status"]
+
+    def take(self, stopping, timeout=1.0):
+        """Claim the oldest queued job, waiting up to `timeout`; None if there is none"""
+        with self._changed:
+            while not stopping.is_set():
+                for job in self.jobs.values():
+                    if job["status"] == "queued":
+                        job["status"] = "running"
+                        job["started_at"] = time.time()
+                        self.save()
+                        return job
+                if not self._changed.wait(timeout):
+                    return None
+            return None
+
+    def update(self, job, **fields):
+        with self._changed:
+            job.update(fields)
+            self.save()
+
+    def progress(self, job, stage, **fields):
+        with self._changed:
+            job["progress"][stage].update(fields)
+            self.save()
+
+
+class JobWorker(threading.Thread):
+    """
+    Runs jobs from the store one at a time.
+
+    Scrape and post stages reuse this worker's browser, which is started and
+    logged in on first use (from the saved session cookies when they are
+    still valid) and then kept open between jobs.
+    """
+    def __init__(self, store, stopping, create_scraper, post_tweets, login_lock, name, proxy_pool=None, browsers=4, download_workers=4,
+                 storage="csv", db_path=None):
+        super().__init__(name=name, daemon=True)
+        self.logger = Logger("JobWorker", "job_api.log")
+        self.store = store
+        self.stopping = stopping
+        self.create_scraper = create_scraper
+        self.post_tweets = post_tweets
+        self.login_lock = login_lock
+        self.proxy_pool = proxy_pool
+        self.browsers = browsers
+        self.download_workers = download_workers
+        self.storage = storage
+        self.db_path = db_path
+        self.scraper = None
+
+    def run(self):
+        while not self.stopping.is_set():
+            job = self.store.take(self.stopping)
+            if job is not None:
+                self._run_job(job)
+        if self.scraper is not None:
+            self.scraper.quit()
+
+    def _browser(self):
+        if self.scraper is None:
+            # Only one interactive login at a time; later workers reuse its cookies
+            with self.login_lock:
+                scraper = self.create_scraper()
+                scraper.show_progress = False
+                if not restore_session(scraper):
+                    scraper.login()
+                    save_session(scraper)
+            self.scraper = scraper
+        return self.scraper
+
+    def _run_job(self, job):
+        self.logger.info(f"Job {job['id']} ({job['type']}) started")
+        started = time.perf_counter()
+        try:
+            result = self._run_stages(job)
+            self.store.update(job, status="done", result=result, finished_at=time.time())
+            self.logger.info(f"Job {job['id']} done in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            self.logger.error(f"Job {job['id']} failed: {e}", exc_info=True)
+            self.store.update(job, status="failed", error=str(e), finished_at=time.time())
+            if self.scraper is not None:
+                try:
+                    self.scraper.driver.title
+                except Exception:
+                    self.scraper.record_proxy_failure()
+                    self.scraper.quit()
+                    self.scraper = None
+        JOBS.inc(type=job["type"], status=job["status"])
+        JOB_SECONDS.observe(time.perf_counter() - started, type=job["type"])
+
+    def _run_stages(self, job):
+        import pipeline
+
+        params = job["params"]
+        result = {}
+        tweets = self._input_tweets(params)
+        for stage in JOB_STAGES[job["type"]]:
+            self.store.progress(job, stage, status="running", total=None if stage == "scrape" else len(tweets))
+            if stage == "scrape":
+                scraper = self._browser()
+                tweets = pipeline.scrape(
+                    scraper,
+                    max_tweets=params.get("tweets", 50),
+                    username=params.get("username"),
+                    hashtag=params.get("hashtag"),
+                    query=params.get("query"),
+                    latest=not params.get("top"),
+                    top=bool(params.get("top")),
+                    sync=params.get("sync", False),
+                )
+                if tweets:
+                    result["csv"] = pipeline.save_tweets(scraper, params.get("storage", self.storage), self.db_path)
+            elif stage == "download":
+                pipeline.download_media(tweets, self.proxy_pool, browsers=params.get("browsers", self.browsers), download_workers=self.download_workers)
+            elif stage == "rephrase":
+                pipeline.rephrase(tweets, on_progress=lambda done, total: self.store.progress(job, stage, done=done))
+            elif stage == "post":
+                result["posted"] = self._post(tweets, params)
+            self.store.progress(job, stage, status="done", done=len(tweets), total=len(tweets))
+
+        result["tweets"] = [
+            {key: tweet.get(key) for key in ("tweet_id", "tweet_link", "user", "content", "rephrased") if tweet.get(key) is not None}
+            for tweet in tweets
+        ]
+        return result
+
+    def _input_tweets(self, params):
+        """Tweets given inline, as tweet URLs, or as a CSV path"""
+        from tweet_export import read_tweets_csv, tweet_id_from_link
+
+        if params.get("tweets_data"):
+            return [dict(tweet) for tweet in params["tweets_data"]]
+        if params.get("links"):
+            return [{"tweet_link": url, "tweet_id": tweet_id_from_link(url), "user": "", "content": ""} for url in params["links"]]
+        if params.get("input") and not os.path.isfile(params["input"]):
+            raise ValueError(f"Input file {params['input']} does not exist")
+        if params.get("input", "").lower().endswith((".db", ".sqlite")):
+            from tweet_store import TweetStore
+            with TweetStore(params["input"]) as store:
+                return store.query(handle=params.get("handle"), since=params.get("since"), until=params.get("until"), oldest_first=True)
+        if params.get("input"):
+            return read_tweets_csv(params["input"])
+        return []
+
+    def _post(self, tweets, params):
+        import pipeline
+        from post_ledger import PostLedger
+
+        ledger = PostLedger(max_attempts=params.get("max_post_attempts", 3), enforce=not params.get("repost"))
+        tweets_data = pipeline.to_post_data(pipeline.filter_with_ledger(tweets, ledger))
+        self.post_tweets(tweets_data, ledger, self._browser().driver, params)
+        return sum(1 for tweet in tweets_data if ledger.status(tweet) == "posted")
+
+
+class JobAPI:
+    """
+    Local HTTP/JSON API for submitting pipeline jobs and following their progress.
+
+        POST   /jobs        {"type": "scrape", "params": {...}}, or a list of them
+        GET    /jobs        all jobs, optionally ?status=queued
+        GET    /jobs/<id>   status, per-stage progress and result
+        DELETE /jobs/<id>   cancel a queued job
+        GET    /health      worker count and jobs per status
+
+    Jobs run on a pool of `workers` threads, each keeping its own logged-in
+    browser warm between jobs. The server only listens on localhost, and
+    since any web page can send requests there, every request must carry the
+    per-run token from ./state/api_token as `Authorization: Bearer <token>`
+    and a localhost Host header, and POSTs must be `application/json`, which
+    browsers can't send cross-origin without a CORS preflight.
+    """
+    def __init__(self, create_scraper, post_tweets, workers=1, port=8765, host="127.0.0.1", path=JOBS_PATH, proxy_pool=None, browsers=4,
+                 download_workers=4, storage="csv", db_path=None, token_path=TOKEN_PATH):
+        self.logger = Logger("JobAPI", "job_api.log")
+        self.store = JobStore(path)
+        self.stopping = threading.Event()
+        login_lock = threading.Lock()
+        self.workers = [
+            JobWorker(self.store, self.stopping, create_scraper, post_tweets, login_lock, f"job-worker-{i}", proxy_pool, browsers, download_workers, storage, db_path)
+            for i in range(1, max(1, workers) + 1)
+        ]
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        port = self.server.server_address[1]
+        self.allowed_hosts = {f"127.0.0.1:{port}", f"localhost:{port}"}
+        self.token_path = token_path
+        self.token = write_token(token_path)
+
+    def serve(self):
+        for worker in self.workers:
+            worker.start()
+        host, port = self.server.server_address[:2]
+        self.logger.info(f"Job API listening on http://{host}:{port} with {len(self.workers)} workers ({self.store.counts().get('queued', 0)} queued jobs)")
+        self.logger.info(f"API token written to {self.token_path}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.logger.info("Stopping job workers after their current jobs...")
+            self.stopping.set()
+            self.server.server_close()
+            for worker in self.workers:
+                worker.join()
+
+    def _handler(self):
+        api = self
+
+        class JobHandler(BaseHTTPRequestHandler):
+            def _send(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _authorized(self):
+                """Reject foreign Host headers and missing or wrong tokens; sends the error response"""
+                if self.headers.get("Host", "").lower() not in api.allowed_hosts:
+                    self._send(403, {"error": "Host not allowed"})
+                    return False
+                scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+                if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode("utf-8"), api.token.encode("utf-8")):
+                    self._send(401, {"error": "Missing or invalid API token"})
+                    return False
+                return True
+
+            def _job_id(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                path, _, query = self.path.partition("?")
+                path = path.rstrip("/")
+                if path == "/health":
+                    self._send(200, {"workers": len(api.workers), "jobs": api.store.counts()})
+                elif path == "/jobs":
+                    status = parse_qs(query).get("status", [None])[0]
+                    self._send(200, api.store.list(status))
+                elif self._job_id():
+                    job = api.store.get(self._job_id())
+                    if job is None:
+                        self._send(404, {"error": "No such job"})
+                    else:
+                        self._send(200, job)
+                else:
+                    self._send(404, {"error": "Not found"})
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                if self.path.rstrip("/") != "/jobs":
+                    self._send(404, {"error": "Not found"})
+                    return
+                if self.headers.get("Content-Type", "").split(";")[0].strip().lower() != "application/json":
+                    self._send(415, {"error": "Content-Type must be application/json"})
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+                    submissions = body if isinstance(body, list) else [body]
+                    jobs = [api.store.submit(submission.get("type"), submission.get("params", {})) for submission in submissions]
+                except (ValueError, AttributeError) as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                self._send(202, jobs if isinstance(body, list) else jobs[0])
+
+            def do_DELETE(self):
+                if not self._authorized():
+                    return
+                status = api.store.cancel(self._job_id()) if self._job_id() else None
+                if status is None:
+                    self._send(404, {"error": "No such job"})
+                elif status != "cancelled":
+                    self._send(409, {"error": f"Job is {status} and can no longer be cancelled"})
+                else:
+                    self._send(200, {"id": self._job_id(), "status": status})
+
+            def log_message(self, format, *args):
+                pass
+
+        return JobHandler
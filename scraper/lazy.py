@@ -0,0 +1,23 @@
+import sys
+import importlib.util
+
+
+def lazy_import(name):
+    """
+    Return a module object whose real import is deferred until the first
+    attribute access, so heavy optional dependencies (pandas,
+    webdriver_manager, ...) only cost startup time for the commands that use them.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
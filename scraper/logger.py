@@ -1,120 +1,354 @@
-import logging
+import os
+import re
 import sys
+import copy
+import gzip
+import json
 import time
-from typing import List, Any, Optional, Union, Dict, Callable
+import queue
+import atexit
+import shutil
+import logging
+import threading
+import logging.handlers
+from typing import List, Any, Optional
 from contextlib import contextmanager
 
-from rich.logging import RichHandler
-from rich.console import Console
-from rich.table import Table
-from rich.progress import (
-    Progress, 
-    TextColumn, 
-    BarColumn, 
-    TaskProgressColumn, 
-    TimeRemainingColumn,
-    TimeElapsedColumn,
-    SpinnerColumn
-)
+DEFAULT_LOG_FILE = os.getenv("REPHRASEX_LOG_FILE", "app.log")
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+# Seconds between one-line progress summaries in batch mode
+SUMMARY_INTERVAL = 30.0
+
+TAG_MARKUP = {
+    "INFO": "[cyan][INFO][/cyan]",
+    "WARNING": "[yellow][WARNING][/yellow]",
+    "ERROR": "[red][ERROR][/red]",
+    "DEBUG": "[dim][DEBUG][/dim]",
+    "SUCCESS": "[green][SUCCESS][/green]",
+    "CRITICAL": "[white on red][CRITICAL][/white on red]",
+}
+
+_MARKUP_RE = re.compile(r"\[/?[a-z ]+\]")
+
+_config_lock = threading.Lock()
+_listener = None
+_settings = {"rich": os.getenv("REPHRASEX_NO_RICH", "") in ("", "0"), "console": None, "batch": False}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line, with Rich markup stripped"""
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": getattr(record, "tag", record.levelname),
+            "logger": record.name,
+            "message": _MARKUP_RE.sub("", record.getMessage()),
+            "thread": record.threadName,
+            "source": f"{record.filename}:{record.lineno}",
+        }
+        if getattr(record, "table", None) is not None:
+            entry["table"] = record.table
+        if getattr(record, "row", None) is not None:
+            entry["row"] = record.row
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for an in-process queue: records keep their exc_info and
+    stack_info instead of being flattened into the message, so every handler
+    on the listener formats tracebacks its own way
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class PlainFormatter(logging.Formatter):
+    """Classic text lines, with Rich markup stripped"""
+    def format(self, record):
+        message = super().format(record)
+        return _MARKUP_RE.sub("", message)
+
+
+class TagMarkupFormatter(logging.Formatter):
+    """Prefix the message with the colored tag when rendering through Rich"""
+    def format(self, record):
+        tag = getattr(record, "tag", record.levelname)
+        return f"{TAG_MARKUP.get(tag, '')} {record.getMessage()}"
+
+
+class RenderableHandler(logging.Handler):
+    """
+    Console handler for Rich mode, run on the listener thread: records that
+    carry a Rich renderable (tables, panels) are printed as that renderable,
+    table rows already shown in their table are dropped, and everything else
+    goes to the wrapped RichHandler.
+    """
+    def __init__(self, handler, console):
+        super().__init__(handler.level)
+        self.handler = handler
+        self.console = console
+
+    def emit(self, record):
+        renderable = getattr(record, "renderable", None)
+        if renderable is not None:
+            self.console.print(renderable)
+        elif getattr(record, "row", None) is None:
+            self.handler.handle(record)
+
+
+def _gzip_namer(name):
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source, dest):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def configure_logging(
+    log_file: str = DEFAULT_LOG_FILE,
+    level: int = logging.DEBUG,
+    rich: Optional[bool] = None,
+    json_lines: bool = True,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    batch: Optional[bool] = None,
+) -> None:
+    """
+    Configure process-wide logging once.
+
+    Records are put on an in-memory queue by a QueueHandler on the root logger
+    and rendered/written by a QueueListener thread, so the scraping and posting
+    loops never block on console rendering or disk I/O. The log file rotates
+    by size and rotated files are gzip-compressed. Calling this again replaces
+    the previous configuration. `batch` turns off Rich and per-item panels and
+    reports progress bars as periodic one-line summaries.
+    """
+    global _listener
+
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+
+        if rich is not None:
+            _settings["rich"] = rich
+        if batch is not None:
+            _settings["batch"] = batch
+        if _settings["batch"]:
+            # Batch runs log plain lines only: no tables, panels or live displays
+            _settings["rich"] = False
+
+        handlers = []
+        if _settings["rich"]:
+            from rich.logging import RichHandler
+
+            rich_handler = RichHandler(
+                rich_tracebacks=True,
+                console=get_console(),
+                markup=True,
+                show_level=False,
+                show_path=True
+            )
+            rich_handler.setFormatter(TagMarkupFormatter())
+            handlers.append(RenderableHandler(rich_handler, get_console()))
+        else:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(PlainFormatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+            handlers.append(stream_handler)
+
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            file_handler.namer = _gzip_namer
+            file_handler.rotator = _gzip_rotator
+            file_handler.setFormatter(
+                JsonLinesFormatter() if json_lines else PlainFormatter("%(asctime)s - %(levelname)s - %(message)s")
+            )
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(LocalQueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def rich_enabled() -> bool:
+    return _settings["rich"]
+
+
+def batch_enabled() -> bool:
+    return _settings["batch"]
+
+
+def get_console():
+    """Shared Rich console, or None when Rich rendering is turned off"""
+    if not _settings["rich"]:
+        return None
+    if _settings["console"] is None:
+        from rich.console import Console
+        _settings["console"] = Console()
+    return _settings["console"]
+
 
 class Logger:
     """
-    An enhanced logger using the Rich library for beautiful, colorized console 
+    An enhanced logger using the Rich library for beautiful, colorized console
     output, file logging, and integrated progress tracking.
+
+    All instances share the single queue-based configuration created by
+    configure_logging(); `log_file` is only kept for backwards compatibility.
     """
     def __init__(
-        self, 
-        name: str = "Application", 
-        log_file: str = "application.log", 
+        self,
+        name: str = "Application",
+        log_file: Optional[str] = None,
         level: int = logging.DEBUG,
-        console: Optional[Console] = None
+        console: Optional[Any] = None
     ):
-        # Configure the logging system with a RichHandler for console output
-        self.console = console or Console()
-        
-        # Create a custom formatter for file logs
-        file_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        
-        # Create handlers
-        rich_handler = RichHandler(
-            rich_tracebacks=True,
-            console=self.console,
-            markup=True,
-            show_level=False,
-            show_path=True
-        )
-        
-        file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
-        file_handler.setFormatter(file_formatter)
-        
-        # Configure root logger
-        logging.basicConfig(
-            level=level,
-            format="%(message)s",
-            datefmt="[%Y-%m-%d %H:%M:%S]",
-            handlers=[rich_handler, file_handler]
-        )
-        
+        if console is not None:
+            _settings["console"] = console
+        if _listener is None:
+            configure_logging(level=level)
+
         self.logger = logging.getLogger(name)
 
+    @property
+    def console(self):
+        return get_console()
+
     def info(self, message: str) -> None:
         """Log an info level message."""
-        self.logger.info(f"[cyan][INFO][/cyan] {message}", stacklevel=2)
+        self.logger.info(message, extra={"tag": "INFO"}, stacklevel=2)
 
     def warning(self, message: str, exc_info: bool = False) -> None:
         """Log a warning level message with optional exception info."""
-        self.logger.warning(f"[yellow][WARNING][/yellow] {message}", exc_info=exc_info, stacklevel=2)
+        self.logger.warning(message, exc_info=exc_info, extra={"tag": "WARNING"}, stacklevel=2)
 
     def error(self, message: str, exc_info: bool = False) -> None:
         """Log an error level message with optional exception info."""
-        self.logger.error(f"[red][ERROR][/red] {message}", exc_info=exc_info, stacklevel=2)
+        self.logger.error(message, exc_info=exc_info, extra={"tag": "ERROR"}, stacklevel=2)
 
     def debug(self, message: str) -> None:
         """Log a debug level message."""
-        self.logger.debug(f"[dim][DEBUG][/dim] {message}", stacklevel=2)
+        self.logger.debug(message, extra={"tag": "DEBUG"}, stacklevel=2)
 
     def success(self, message: str) -> None:
         """
         Log a success message.
         (Success messages are logged as INFO with a distinct [SUCCESS] tag.)
         """
-        self.logger.info(f"[green][SUCCESS][/green] {message}", stacklevel=2)
-        
+        self.logger.info(message, extra={"tag": "SUCCESS"}, stacklevel=2)
+
     def critical(self, message: str, exc_info: bool = True) -> None:
         """Log a critical error message with exception info by default."""
-        self.logger.critical(f"[white on red][CRITICAL][/white on red] {message}", exc_info=exc_info, stacklevel=2)
+        self.logger.critical(message, exc_info=exc_info, extra={"tag": "CRITICAL"}, stacklevel=2)
+
+    def panel(self, text: str, title: str = "", style: str = "") -> None:
+        """
+        Render a Rich panel, or log the text as a plain line when Rich is off.
+        Batch mode skips panels entirely.
+        """
+        if batch_enabled():
+            return
+        extra = {"tag": "INFO"}
+        if rich_enabled():
+            from rich.panel import Panel
+            # Printed by the listener thread, in order with the surrounding log lines
+            extra["renderable"] = Panel(text, title=title, style=style)
+        self.logger.info(f"{_MARKUP_RE.sub('', title)}: {text}", extra=extra, stacklevel=2)
 
     def log_table(self, headers: List[str], rows: List[List[Any]], title: str = "Data Table") -> None:
         """
-        Log tabular data as a rich formatted table.
+        Log tabular data as a rich formatted table. Without Rich, the rows
+        are logged as plain lines; the JSON-lines log always gets one record
+        per row.
         """
-        table = Table(title=title, expand=True)
-        
-        for header in headers:
-            table.add_column(
-                header, 
-                justify="center", 
-                style="cyan", 
-                overflow="fold", 
-                no_wrap=False
-            )
-        
+        rows = [[str(item) for item in row] for row in rows]
+        extra = {"tag": "INFO", "table": title}
+        if rich_enabled():
+            from rich.table import Table
+
+            table = Table(title=title, expand=True)
+
+            for header in headers:
+                table.add_column(
+                    header,
+                    justify="center",
+                    style="cyan",
+                    overflow="fold",
+                    no_wrap=False
+                )
+
+            for row in rows:
+                table.add_row(*row)
+
+            # Printed by the listener thread, in order with the surrounding log lines
+            extra["renderable"] = table
+
+        self.logger.info(f"Table: {title} - {len(rows)} rows ({' | '.join(headers)})", extra=extra, stacklevel=2)
         for row in rows:
-            table.add_row(*[str(item) for item in row])
-        
-        self.console.print(table)
-        self.logger.info(f"Table: {title} - {len(rows)} rows", stacklevel=2)
+            self.logger.info(" | ".join(row), extra={"tag": "INFO", "table": title, "row": dict(zip(headers, row))}, stacklevel=2)
 
     @contextmanager
     def progress_bar(
-        self, 
-        total: Optional[int] = None, 
-        description: str = "Processing", 
-        transient: bool = True
+        self,
+        total: Optional[int] = None,
+        description: str = "Processing",
+        transient: bool = True,
+        disable: bool = False
     ):
         """
         Create and yield a progress bar context manager.
+        Rich allows one live display at a time, so work running in parallel
+        threads should pass `disable=True`. In batch mode the bar is reported
+        as periodic one-line summaries instead.
         """
+        if disable or not rich_enabled():
+            if batch_enabled() and not disable:
+                with self.progress_summary(total=total, description=description) as updater:
+                    yield updater
+            else:
+                yield _NullProgressUpdater()
+            return
+
+        from rich.progress import (
+            Progress,
+            TextColumn,
+            BarColumn,
+            TaskProgressColumn,
+            TimeRemainingColumn,
+            TimeElapsedColumn,
+            SpinnerColumn
+        )
+
         progress = Progress(
             SpinnerColumn(),
             TextColumn("[bold blue]{task.description}"),
@@ -127,35 +361,107 @@ class Logger:
             console=self.console,
             transient=transient
         )
-        
+
         with progress:
             task_id = progress.add_task(description, total=total)
-            
+
             try:
                 class ProgressUpdater:
                     def __init__(self, progress_obj, task_id):
                         self.progress = progress_obj
                         self.task_id = task_id
                         self.start_time = time.time()
-                        
+
                     def update(self, advance: int = 1, waiting: bool = False, retry_cnt: int = 0):
                         description = f"{progress.tasks[self.task_id].description}"
                         if waiting:
                             description = f"{description} (waiting, retry: {retry_cnt})"
                             self.progress.update(self.task_id, description=description)
                         self.progress.update(self.task_id, advance=advance)
-                    
+
                     def set_description(self, description: str):
                         self.progress.update(self.task_id, description=description)
-                    
+
                     def set_total(self, total: int):
                         self.progress.update(self.task_id, total=total)
-                
+
                 yield ProgressUpdater(progress, task_id)
-                
+
             finally:
                 progress.update(task_id, completed=True)
-                
-    def indeterminate_spinner(self, description: str = "Working"):
+
+    def indeterminate_spinner(self, description: str = "Working", disable: bool = False):
         """Create a spinner for operations with unknown duration."""
-        return self.progress_bar(total=None, description=description)
+        return self.progress_bar(total=None, description=description, disable=disable)
+
+    @contextmanager
+    def progress_summary(self, total: Optional[int] = None, description: str = "Processing", interval: float = SUMMARY_INTERVAL):
+        """
+        Progress reported as one log line at most every `interval` seconds,
+        plus a final line for operations that ran longer than that. Safe to
+        update from several threads.
+        """
+        updater = _SummaryProgressUpdater(self.logger, description, total, interval)
+        try:
+            yield updater
+        finally:
+            updater.finish()
+
+
+class _NullProgressUpdater:
+    """Progress updater used when Rich rendering is turned off"""
+    def update(self, advance: int = 1, waiting: bool = False, retry_cnt: int = 0):
+        pass
+
+    def set_description(self, description: str):
+        pass
+
+    def set_total(self, total: int):
+        pass
+
+
+class _SummaryProgressUpdater:
+    """Progress updater that logs periodic one-line summaries"""
+    def __init__(self, logger, description, total, interval):
+        self.logger = logger
+        self.description = description
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.waiting = False
+        self.started = time.time()
+        self.last_logged = self.started
+        self._lock = threading.Lock()
+
+    def update(self, advance: int = 1, waiting: bool = False, retry_cnt: int = 0):
+        with self._lock:
+            self.done += advance
+            self.waiting = waiting
+            finished = self.total is not None and self.done >= self.total
+            if not finished and time.time() - self.last_logged >= self.interval:
+                self._log()
+
+    def set_description(self, description: str):
+        with self._lock:
+            self.description = description
+
+    def set_total(self, total: int):
+        with self._lock:
+            self.total = total
+
+    def finish(self):
+        with self._lock:
+            if time.time() - self.started >= self.interval:
+                self._log(final=True)
+
+    def _log(self, final: bool = False):
+        now = time.time()
+        elapsed = now - self.started
+        self.last_logged = now
+        progress = f"{self.done}/{self.total} ({100 * self.done / self.total:.0f}%)" if self.total else f"{self.done}"
+        rate = self.done / elapsed if elapsed > 0 else 0
+        state = "done" if final else ("rate limited" if self.waiting else f"{rate:.1f}/s")
+        line = f"{self.description}: {progress} in {elapsed:.0f}s, {state}"
+        if not final and self.total and rate > 0:
+            line += f", ~{(self.total - self.done) / rate:.0f}s left"
+        self.logger.info(line, extra={"tag": "INFO"})
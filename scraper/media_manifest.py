@@ -0,0 +1,76 @@
+import os
+import json
+import time
+import threading
+
+MANIFEST_PATH = "./images/manifest.jsonl"
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.webm')
+
+
+def media_type_for(path):
+    return "video" if path.lower().endswith(VIDEO_EXTENSIONS) else "image"
+
+
+class MediaManifest:
+    """
+    Append-only JSON-lines index mapping tweet IDs to downloaded media.
+
+    Every download appends an "add" record and every deletion a "remove"
+    record; replaying the file on load rebuilds an in-memory dict so the
+    poster can find a tweet's media with a single lookup instead of globbing
+    the media directories.
+    """
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(record)
+
+    def _apply(self, record):
+        tweet_media = self.entries.setdefault(record["tweet_id"], {})
+        if record.get("op") == "remove":
+            tweet_media.pop(record["path"], None)
+        else:
+            tweet_media[record["path"]] = record
+
+    def _append(self, record):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._apply(record)
+
+    def add(self, tweet_id, path, user=None, media_type=None):
+        """Record a downloaded media file for a tweet"""
+        if not tweet_id:
+            return
+        self._append({
+            "op": "add",
+            "tweet_id": str(tweet_id),
+            "path": path,
+            "type": media_type or media_type_for(path),
+            "size": os.path.getsize(path) if os.path.exists(path) else 0,
+            "user": user,
+            "time": time.time(),
+        })
+
+    def remove(self, tweet_id, path):
+        """Record that a media file was deleted"""
+        self._append({"op": "remove", "tweet_id": str(tweet_id), "path": path, "time": time.time()})
+
+    def lookup(self, tweet_id):
+        """Return the manifest entries for a tweet, images first, in download order"""
+        tweet_media = self.entries.get(str(tweet_id), {})
+        return sorted(tweet_media.values(), key=lambda entry: (entry["type"] == "video", entry["time"]))
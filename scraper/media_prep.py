@@ -0,0 +1,113 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import registry as metrics
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it media is posted as downloaded
+    Image = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+PREP_BYTES_BEFORE = metrics.counter("media_prep_bytes_before_total", "Image bytes before recompression")
+PREP_BYTES_AFTER = metrics.counter("media_prep_bytes_after_total", "Image bytes after recompression")
+
+
+def optimize_image(path, max_side=2048, quality=82, target_bytes=None):
+    """
+    Downscale and recompress one image, dropping EXIF and other metadata.
+
+    Runs in a worker process. Writes `<name>.opt.jpg` (or `.opt.png` for
+    images with transparency) next to the original and returns
+    (new_path, bytes_before, bytes_after); if the result is not smaller,
+    the original path is returned unchanged.
+    """
+    bytes_before = os.path.getsize(path)
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+        base = os.path.splitext(path)[0]
+        if has_alpha:
+            out_path = f"{base}.opt.png"
+            image.save(out_path, "PNG", optimize=True)
+        else:
+            out_path = f"{base}.opt.jpg"
+            image = image.convert("RGB")
+            while True:
+                image.save(out_path, "JPEG", quality=quality, optimize=True, progressive=True)
+                if target_bytes is None or os.path.getsize(out_path) <= target_bytes or quality <= 50:
+                    break
+                quality -= 8
+
+    bytes_after = os.path.getsize(out_path)
+    if bytes_after >= bytes_before:
+        os.remove(out_path)
+        return path, bytes_before, bytes_before
+    return out_path, bytes_before, bytes_after
+
+
+class MediaPrep:
+    """
+    Recompresses a post's images in a process pool before upload.
+
+    `optimize(prepared, manifest)` is called from the poster's prefetch
+    thread, so the CPU work for the next post overlaps with the wait for the
+    current one. Optimized files replace the originals on disk and in the
+    manifest, which also keeps --keep-media copies small.
+    """
+    def __init__(self, workers=None, max_side=2048, quality=82, target_kb=None, logger=None):
+        self.available = Image is not None
+        self.max_side = max_side
+        self.quality = quality
+        self.target_bytes = target_kb * 1024 if target_kb else None
+        self.logger = logger
+        self.executor = ProcessPoolExecutor(max_workers=workers) if self.available else None
+        if not self.available and logger:
+            logger.warning("Pillow is not installed; images will be posted without recompression.")
+
+    def optimize(self, prepared, manifest):
+        """Swap a prepared post's images for optimized copies; returns bytes saved"""
+        if not self.available or not prepared or not prepared["media_files"]:
+            return 0
+
+        jobs = {
+            path: self.executor.submit(optimize_image, path, self.max_side, self.quality, self.target_bytes)
+            for path in prepared["media_files"]
+            if path.lower().endswith(IMAGE_EXTENSIONS) and ".opt." not in os.path.basename(path)
+        }
+        saved = 0
+        media_files = []
+        for path in prepared["media_files"]:
+            if path not in jobs:
+                media_files.append(path)
+                continue
+            try:
+                new_path, bytes_before, bytes_after = jobs[path].result()
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Could not optimize {path}: {e}")
+                media_files.append(path)
+                continue
+
+            PREP_BYTES_BEFORE.inc(bytes_before)
+            PREP_BYTES_AFTER.inc(bytes_after)
+            if new_path != path:
+                os.remove(path)
+                if prepared.get("tweet_id"):
+                    user = next((entry.get("user") for entry in manifest.lookup(prepared["tweet_id"]) if entry["path"] == path), None)
+                    manifest.remove(prepared["tweet_id"], path)
+                    manifest.add(prepared["tweet_id"], new_path, user=user, media_type="image")
+                saved += bytes_before - bytes_after
+            media_files.append(new_path)
+
+        prepared["media_files"] = media_files
+        if saved and self.logger:
+            self.logger.info(f"Media prep saved {saved / 1024:.0f} KB for tweet {prepared.get('tweet_id')}")
+        return saved
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
@@ -0,0 +1,228 @@
+import json
+import time
+import zlib
+import threading
+from queue import Queue
+from itertools import cycle
+
+from logger import Logger
+from media_manifest import MediaManifest
+from post_queue import PostQueue, TokenBucket
+from post_ledger import PostLedger
+from twitter_poster import Twitter_Poster, prepare_post, cleanup_media
+from driver_profiler import profiler
+
+DISPATCH_POLICIES = ("round-robin", "affinity")
+
+logger = Logger("MultiAccountPoster", "multi_account.log")
+
+
+def load_accounts(path):
+    """
+    Load posting accounts from a JSON file, e.g.
+
+        [{"username": "...", "password": "...", "mail": "...", "delay": 60, "burst": 1}]
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        accounts = json.load(f)
+    for account in accounts:
+        if not account.get("username") or not account.get("password"):
+            raise ValueError(f"Account entry in {path} is missing a username or password")
+    return accounts
+
+
+class AccountWorker(threading.Thread):
+    """
+    Posts prepared tweets for one account in its own browser session with its
+    own pacing. `ready` is set once the login has been attempted.
+    """
+    def __init__(self, account, shared, delay=60, burst=1, jitter=0.1, keep_media=False, extra_media_wait=10, fast_post=False, text_entry="insert"):
+        super().__init__(name=f"poster-{account['username']}", daemon=True)
+        self.account = account
+        self.shared = shared
+        self.keep_media = keep_media
+        self.extra_media_wait = extra_media_wait
+        self.inbox = Queue()
+        self.ready = threading.Event()
+        self.poster = Twitter_Poster(
+            username=account["username"],
+            password=account["password"],
+            mail=account.get("mail"),
+            fast_post=fast_post,
+            text_entry=text_entry,
+        )
+        self.bucket = TokenBucket(
+            rate=1 / max(account.get("delay", delay), 0.001),
+            burst=account.get("burst", burst),
+            jitter=jitter,
+        )
+        self.posted = 0
+        self.failed = 0
+        self.latencies = []
+
+    def run(self):
+        with profiler.phase("post"):
+            self._run()
+
+    def _run(self):
+        try:
+            self.poster.logged_in = bool(self.poster.login())
+        except Exception as e:
+            logger.error(f"Login error for @{self.account['username']}: {e}")
+            self.poster.logged_in = False
+        finally:
+            self.ready.set()
+        if not self.poster.logged_in:
+            logger.error(f"Login failed for @{self.account['username']}, no posts will be dispatched to it.")
+
+        while True:
+            job = self.inbox.get()
+            if job is None:
+                break
+            item, prepared = job
+
+            wait = self.bucket.wait_time()
+            if wait > 0:
+                time.sleep(wait)
+
+            started = time.time()
+            wait_time = self.extra_media_wait if prepared["has_video"] else 0
+            success = self.poster.post_tweet(
+                prepared["text"], prepared["media_files"], extra_media_wait=wait_time
+            )
+            self.latencies.append(time.time() - started)
+            self.bucket.consume()
+
+            if success:
+                self.posted += 1
+            else:
+                self.failed += 1
+            with self.shared["lock"]:
+                self.shared["ledger"].record(item["tweet"], success)
+                self.shared["queue"].mark(item, "posted" if success else "failed")
+                if not self.keep_media and prepared["media_files"]:
+                    cleanup_media(prepared, self.shared["manifest"], logger)
+
+        if self.poster.driver is not None:
+            self.poster.driver.quit()
+
+    def stats_row(self):
+        latencies = sorted(self.latencies)
+        mean = sum(latencies) / len(latencies) if latencies else 0
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0
+        attempts = self.posted + self.failed
+        success_rate = f"{100 * self.posted / attempts:.0f}%" if attempts else "-"
+        return [f"@{self.account['username']}", self.posted, self.failed, success_rate, f"{mean:.1f}s", f"{p95:.1f}s"]
+
+
+class Dispatcher:
+    """Assigns prepared posts to account workers by policy"""
+    def __init__(self, workers, policy="round-robin"):
+        if policy not in DISPATCH_POLICIES:
+            raise ValueError(f"Unknown dispatch policy: {policy}")
+        self.workers = workers
+        self.policy = policy
+        self._round_robin = cycle(workers)
+
+    def assign(self, tweet):
+        if self.policy == "affinity":
+            # The same source account always goes to the same poster
+            source = (tweet.get("user") or tweet.get("tweet_link") or "").encode("utf-8")
+            return self.workers[zlib.crc32(source) % len(self.workers)]
+        return next(self._round_robin)
+
+
+def post_tweets_multi_account(
+    accounts,
+    tweets_data,
+    policy="round-robin",
+    delay_between_tweets=60,
+    burst=1,
+    keep_media=False,
+    extra_media_wait=10,
+    jitter=0.1,
+    fast_post=False,
+    text_entry="insert",
+    manifest=None,
+    queue=None,
+    ledger=None,
+    media_prep=None,
+):
+    """
+    Post tweets concurrently from several accounts, each with its own browser
+    session and pacing, and report per-account success and latency. Posts go
+    only to accounts that logged in; if none did, the tweets stay pending in
+    the post queue for the next run without using up ledger attempts.
+    `delay_between_tweets` and `burst` are defaults for accounts that don't
+    set their own.
+    """
+    shared = {
+        "lock": threading.Lock(),
+        "manifest": manifest or MediaManifest(),
+        "queue": queue or PostQueue(),
+        "ledger": ledger or PostLedger(),
+    }
+    try:
+        from twitter_rephraser import rephrase_text_with_ollama as rephrase
+    except ImportError:
+        logger.warning("Rephrase function not available. Using original text.")
+        rephrase = None
+
+    workers = [
+        AccountWorker(
+            account,
+            shared,
+            delay=delay_between_tweets,
+            burst=burst,
+            jitter=jitter,
+            keep_media=keep_media,
+            extra_media_wait=extra_media_wait,
+            fast_post=fast_post,
+            text_entry=text_entry,
+        )
+        for account in accounts
+    ]
+    for worker in workers:
+        worker.start()
+
+    with shared["lock"]:
+        shared["queue"].enqueue(tweets_data)
+        pending = shared["queue"].pending()
+
+    for worker in workers:
+        worker.ready.wait()
+    healthy = [worker for worker in workers if worker.poster.logged_in]
+    if healthy:
+        dispatcher = Dispatcher(healthy, policy)
+        logger.info(f"Posting with {len(healthy)} of {len(workers)} accounts ({policy} dispatch).")
+    else:
+        logger.error(f"No account could log in; {len(pending)} tweets stay queued for the next run.")
+        pending = []
+
+    # Workers start posting while the remaining tweets are still being rephrased
+    for i, item in enumerate(pending, 1):
+        with shared["lock"]:
+            skip_reason = shared["ledger"].skip_reason(item["tweet"])
+        if skip_reason:
+            logger.info(f"Skipping tweet {i}: {skip_reason}")
+            with shared["lock"]:
+                shared["queue"].mark(item, "skipped")
+            continue
+
+        prepared = prepare_post(item["tweet"], i, shared["manifest"], rephrase, logger, media_prep)
+        if prepared is None:
+            with shared["lock"]:
+                shared["queue"].mark(item, "skipped")
+            continue
+        dispatcher.assign(item["tweet"]).inbox.put((item, prepared))
+
+    for worker in workers:
+        worker.inbox.put(None)
+    for worker in workers:
+        worker.join()
+
+    logger.log_table(
+        ["Account", "Posted", "Failed", "Success", "Mean latency", "p95 latency"],
+        [worker.stats_row() for worker in workers],
+        title="Per-account posting stats",
+    )
@@ -0,0 +1,330 @@
+import time
+
+from logger import Logger
+from driver_profiler import profiler
+
+# Pipeline stages shared by the CLI subcommands. Each stage imports the
+# modules it needs when it runs, so a command only pays the import cost of
+# the stages it actually uses.
+
+logger = Logger("Pipeline", "app.log")
+
+# Modules each subcommand ends up importing; used by the startup benchmark
+STAGE_MODULES = {
+    "scrape": ["twitter_scraper", "tweet_export"],
+    "download": ["twitter_downloader", "tweet_export"],
+    "rephrase": ["twitter_rephraser", "tweet_export"],
+    "post": ["twitter_poster", "selector_registry", "tweet_export"],
+    "reparse": ["card_parser", "tweet_export"],
+    "run": ["twitter_scraper", "twitter_downloader", "twitter_rephraser", "twitter_poster", "selector_registry", "tweet_export"],
+    "query": ["tweet_store", "tweet_export"],
+    "serve": ["job_api", "daemon", "twitter_scraper", "twitter_downloader", "twitter_rephraser", "twitter_poster", "selector_registry", "tweet_export"],
+    "daemon": ["daemon", "twitter_scraper", "twitter_downloader", "twitter_rephraser", "twitter_poster", "selector_registry", "tweet_export"],
+}
+
+
+class LoginError(RuntimeError):
+    """Login failed and could not be completed without a person at the keyboard"""
+
+
+def create_proxy_pool(source, max_failures=3):
+    """Load proxies from a file or comma-separated list and health-check them"""
+    if not source:
+        return None
+    from proxy_pool import ProxyPool, load_proxies
+
+    pool = ProxyPool(load_proxies(source), max_failures=max_failures)
+    if not pool.health_check():
+        logger.warning("No proxy passed the health check; connecting directly.")
+    return pool
+
+
+def create_media_prep(enabled=False, workers=None, max_side=2048, quality=82, target_kb=None):
+    """Process pool that recompresses images ahead of posting, or None if disabled"""
+    if not enabled:
+        return None
+    from media_prep import MediaPrep
+
+    return MediaPrep(workers=workers, max_side=max_side, quality=quality, target_kb=target_kb, logger=logger)
+
+
+def create_scraper(mail=None, username=None, password=None, dedup_threshold=0.9, archive_cards=False, proxy_pool=None):
+    from twitter_scraper import Twitter_Scraper
+
+    return Twitter_Scraper(
+        mail=mail,
+        username=username,
+        password=password,
+        dedup_threshold=dedup_threshold,
+        archive_cards=archive_cards,
+        proxy_pool=proxy_pool,
+    )
+
+
+def scrape(
+    scraper,
+    max_tweets=50,
+    no_tweets_limit=False,
+    username=None,
+    hashtag=None,
+    query=None,
+    latest=False,
+    top=False,
+    poster_details=False,
+    sync=False,
+    sync_overlap=3,
+):
+    """Scrape one target with an already logged-in scraper and return the tweet dicts"""
+    scraper.scrape_tweets(
+        max_tweets=max_tweets,
+        no_tweets_limit=no_tweets_limit,
+        scrape_username=username,
+        scrape_hashtag=hashtag,
+        scrape_query=query,
+        scrape_latest=latest,
+        scrape_top=top,
+        scrape_poster_details=poster_details,
+        sync=sync,
+        sync_overlap=sync_overlap,
+    )
+    return scraper.get_tweets()
+
+
+def scrape_sharded(
+    scraper,
+    create_worker,
+    query,
+    since,
+    until=None,
+    window_days=7,
+    workers=2,
+    window_tweets=200,
+    adaptive=True,
+    latest=True,
+):
+    """
+    Scrape `query` over [since, until) as parallel date windows. `scraper` must
+    be logged in; `create_worker()` builds the extra browsers. Returns the
+    merged tweets, which also become `scraper.data` so save_to_csv() works.
+    """
+    from datetime import date, timedelta
+    from search_shards import ShardedSearch, date_windows
+
+    # until: is exclusive, so default to tomorrow to include today
+    until = until or (date.today() + timedelta(days=1)).isoformat()
+    search = ShardedSearch(scraper, create_worker, workers=workers, window_tweets=window_tweets, adaptive=adaptive)
+    tweets = search.run(query, date_windows(since, until, window_days), latest=latest)
+    scraper.data = tweets
+    return tweets
+
+
+def save_tweets(scraper, storage="csv", db_path=None):
+    """
+    Save a scraper's tweets to a new CSV, the SQLite archive, or both.
+    Returns the CSV path, or None when only the archive is written.
+    """
+    csv_path = None
+    if storage in ("csv", "both"):
+        csv_path = scraper.save_to_csv()
+    if storage in ("sqlite", "both"):
+        from tweet_store import TweetStore, TWEET_DB_PATH
+
+        tweets = scraper.get_tweets()
+        with TweetStore(db_path or TWEET_DB_PATH) as store:
+            known = store.known_ids(tweet.get('tweet_id') for tweet in tweets)
+            written = store.upsert(tweets)
+            total = store.count()
+        logger.info(f"Archived {written} tweets ({written - len(known)} new, {total} total) in {db_path or TWEET_DB_PATH}")
+    return csv_path
+
+
+def show_tweets(tweets, title="Scraped Tweets Summary"):
+    rows = [[tweet.get('user', ''), tweet.get('content', ''), tweet.get('tweet_link', '')] for tweet in tweets]
+    logger.log_table(["User", "Content", "Tweet Link"], rows, title=title)
+
+
+def filter_with_ledger(tweets, ledger):
+    """Drop tweets the ledger already has a final outcome for"""
+    unposted_tweets = []
+    for tweet in tweets:
+        skip_reason = ledger.skip_reason(tweet)
+        if skip_reason:
+            logger.info(f"Skipping {tweet.get('tweet_link', '')}: {skip_reason}")
+        else:
+            unposted_tweets.append(tweet)
+    if len(unposted_tweets) < len(tweets):
+        logger.info(f"Ledger skipped {len(tweets) - len(unposted_tweets)} already-handled tweets.")
+    return unposted_tweets
+
+
+def download_media(tweets, proxy_pool=None, browsers=1, download_workers=4):
+    from twitter_downloader import download_twitter_video
+
+    linked_tweets = [tweet for tweet in tweets if tweet.get('tweet_link', '')]
+    tweet_links = [tweet['tweet_link'] for tweet in linked_tweets]
+    users = [tweet.get('user', '') for tweet in linked_tweets]
+    images_done = [tweet['tweet_link'] for tweet in linked_tweets if tweet.get('images_downloaded')]
+    download_twitter_video(
+        tweet_links,
+        users,
+        images_done=images_done,
+        proxy_pool=proxy_pool,
+        browsers=browsers,
+        download_workers=download_workers,
+    )
+
+
+class IdleWork:
+    """
+    Work the scraper can do while it waits out a rate limit: fetching card
+    images straight from the media CDN and rephrasing through the local
+    Ollama server, neither of which touches the rate-limited timeline.
+    Works through `get_tweets()` one tweet at a time until the deadline.
+    Images are recorded in the media manifest, which is where the poster
+    looks for them.
+    """
+    def __init__(self, get_tweets, download=True, rephrase=True, proxy_pool=None, manifest=None):
+        self.get_tweets = get_tweets
+        self.proxy_pool = proxy_pool
+        self.download = download
+        self.rephrase = rephrase
+        self.manifest = manifest
+
+    def __call__(self, deadline):
+        from tweet_export import tweet_id_from_link
+
+        for tweet in list(self.get_tweets()):
+            if time.time() >= deadline:
+                return
+            tweet_id = tweet.get('tweet_id') or tweet_id_from_link(tweet.get('tweet_link', ''))
+            if self.download and tweet.get('media_urls') and not tweet.get('images_downloaded') and tweet_id:
+                self._download_images(tweet, tweet_id)
+            elif self.rephrase and tweet.get('content') and not tweet.get('rephrased'):
+                from twitter_rephraser import rephrase_text_with_ollama
+
+                # Never run past the deadline the rate-limit wait handed over
+                rephrased = rephrase_text_with_ollama(tweet['content'], timeout=max(1, deadline - time.time()))
+                if rephrased:
+                    tweet['rephrased'] = rephrased
+
+    def _download_images(self, tweet, tweet_id):
+        from twitter_downloader import MediaDownloader
+        from media_manifest import MediaManifest
+
+        if self.manifest is None:
+            self.manifest = MediaManifest()
+        MediaDownloader(tweet['media_urls'], manifest=self.manifest, proxy_pool=self.proxy_pool).download(tweet.get('user') or "twitter_media", tweet_id)
+        # Only skip the images in download_media once all of them are in the manifest
+        images = [entry for entry in self.manifest.lookup(tweet_id) if entry["type"] == "image"]
+        if len(images) >= len(tweet['media_urls']):
+            tweet['images_downloaded'] = True
+
+
+def rephrase(tweets, on_progress=None):
+    """
+    Add a 'rephrased' text to every tweet that doesn't have one yet.
+    Tweets Ollama fails on are left without one, so a later run retries them.
+    `on_progress(done, total)` is called after each tweet.
+    """
+    from twitter_rephraser import rephrase_text_with_ollama
+
+    for i, tweet in enumerate(tweets, 1):
+        if not tweet.get('rephrased') and tweet.get('content'):
+            logger.info(f"Rephrasing tweet {i}/{len(tweets)}")
+            rephrased = rephrase_text_with_ollama(tweet['content'])
+            if rephrased:
+                tweet['rephrased'] = rephrased
+        if on_progress is not None:
+            on_progress(i, len(tweets))
+    return tweets
+
+
+def to_post_data(tweets):
+    """Convert scraped tweet dicts into the records the posters consume"""
+    from tweet_export import tweet_id_from_link
+
+    tweets_data = []
+    for tweet in tweets:
+        tweet_link = tweet.get('tweet_link', '')
+        tweet_data = {
+            "text": tweet.get('content', ''),
+            "media_urls": tweet.get('media_urls', []),
+            "user": tweet.get('user', ''),
+            "tweet_link": tweet_link,
+        }
+        tweet_id = tweet.get('tweet_id') or tweet_id_from_link(tweet_link)
+        if tweet_id:
+            tweet_data["tweet_id"] = tweet_id
+        if tweet.get('rephrased'):
+            tweet_data["rephrased"] = tweet['rephrased']
+        tweets_data.append(tweet_data)
+    return tweets_data
+
+
+def post(
+    tweets_data,
+    username=None,
+    password=None,
+    mail=None,
+    driver=None,
+    accounts=None,
+    dispatch="round-robin",
+    delay=60,
+    burst=1,
+    jitter=0.1,
+    keep_media=False,
+    fast_post=False,
+    text_entry="insert",
+    ledger=None,
+    media_prep=None,
+):
+    """
+    Post tweets from one account (reusing `driver` if it is already logged in)
+    or, when `accounts` is given, from several accounts concurrently.
+    """
+    if accounts:
+        from multi_account import post_tweets_multi_account
+
+        post_tweets_multi_account(
+            accounts,
+            tweets_data,
+            policy=dispatch,
+            delay_between_tweets=delay,
+            burst=burst,
+            keep_media=keep_media,
+            jitter=jitter,
+            fast_post=fast_post,
+            text_entry=text_entry,
+            ledger=ledger,
+            media_prep=media_prep,
+        )
+        return
+
+    from twitter_poster import post_tweets_with_selenium, Twitter_Poster
+
+    poster = Twitter_Poster(
+        driver=driver,
+        username=username,
+        password=password,
+        mail=mail,
+        fast_post=fast_post,
+        text_entry=text_entry,
+    )
+    if driver is not None:
+        poster.logged_in = True
+    else:
+        with profiler.phase("login"):
+            if not poster.login():
+                raise LoginError("Login failed, nothing was posted.")
+
+    with profiler.phase("post"):
+        post_tweets_with_selenium(
+            poster,
+            tweets_data,
+            delay_between_tweets=delay,
+            keep_media=keep_media,
+            burst=burst,
+            jitter=jitter,
+            ledger=ledger,
+            media_prep=media_prep,
+        )
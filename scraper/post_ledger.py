@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import hashlib
+
+POST_LEDGER_PATH = "./state/post_ledger.json"
+
+
+def content_hash(text):
+    """Hash of the whitespace- and case-normalized tweet text"""
+    normalized = " ".join((text or "").lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class PostLedger:
+    """
+    Idempotency ledger of what has already been posted.
+
+    Entries are keyed by source tweet ID and indexed by content hash, so a
+    rerun can skip completed work with a dict lookup before any media
+    download or rephrase happens. Failed posts stay eligible for retry until
+    they reach `max_attempts`. With `enforce=False` outcomes are still
+    recorded but nothing is skipped.
+    """
+    def __init__(self, path=POST_LEDGER_PATH, max_attempts=3, enforce=True):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.enforce = enforce
+        self.entries = {}
+        self.by_hash = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.entries = json.load(f)
+        self.by_hash = {entry["content_hash"]: key for key, entry in self.entries.items()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+    def _key(self, tweet, text_hash):
+        return str(tweet.get("tweet_id") or text_hash)
+
+    def _text(self, tweet):
+        return tweet.get("text", tweet.get("content", ""))
+
+    def _entry(self, tweet):
+        text_hash = content_hash(self._text(tweet))
+        entry = self.entries.get(self._key(tweet, text_hash))
+        if entry is None:
+            key = self.by_hash.get(text_hash)
+            entry = self.entries.get(key) if key is not None else None
+        return entry
+
+    def status(self, tweet):
+        """'posted', 'failed', or None if the tweet has no recorded outcome"""
+        entry = self._entry(tweet)
+        return entry["status"] if entry else None
+
+    def skip_reason(self, tweet):
+        """Return why a tweet should not be processed again, or None if it should"""
+        if not self.enforce:
+            return None
+        entry = self._entry(tweet)
+        if entry is None:
+            return None
+        if entry["status"] == "posted":
+            return "already posted"
+        if entry["attempts"] >= self.max_attempts:
+            return f"failed {entry['attempts']} times"
+        return None
+
+    def record(self, tweet, success, error=None):
+        """Store the outcome of a post attempt"""
+        text_hash = content_hash(self._text(tweet))
+        key = self._key(tweet, text_hash)
+        entry = self.entries.get(key, {"attempts": 0})
+        entry.update(
+            content_hash=text_hash,
+            status="posted" if success else "failed",
+            attempts=entry["attempts"] + 1,
+            updated_at=time.time(),
+        )
+        if error:
+            entry["error"] = str(error)
+        self.entries[key] = entry
+        self.by_hash[text_hash] = key
+        self.save()
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import random
+import hashlib
+
+POST_QUEUE_PATH = "./state/post_queue.json"
+
+
+class TokenBucket:
+    """
+    Token bucket pacing measured from actual post timestamps.
+
+    `rate` is the sustained number of posts per second, `burst` the number of
+    posts allowed back to back, and `jitter` a fraction of the sustained
+    interval added at random to each wait.
+    """
+    def __init__(self, rate, burst=1, jitter=0.0, post_times=None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self.tokens = float(self.burst)
+        self.updated_at = None
+        for post_time in sorted(post_times or []):
+            self.consume(post_time)
+
+    def _refill(self, now):
+        if self.updated_at is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def available(self, now=None):
+        self._refill(time.time() if now is None else now)
+        return self.tokens
+
+    def wait_time(self, now=None):
+        """Seconds until a token is available, plus jitter"""
+        tokens = self.available(now)
+        if tokens >= 1:
+            return 0.0
+        wait = (1 - tokens) / self.rate
+        if self.jitter:
+            wait += random.uniform(0, self.jitter / self.rate)
+        return wait
+
+    def consume(self, now=None):
+        self._refill(time.time() if now is None else now)
+        self.tokens -= 1
+
+    def projected_drain(self, depth, now=None):
+        """Seconds needed to post `depth` queued items at the current pace"""
+        backlog = depth - self.available(now)
+        return max(0.0, backlog / self.rate)
+
+
+def queue_item_id(tweet):
+    """Stable ID for a queued tweet: the source tweet ID, or a hash of link and text"""
+    if tweet.get("tweet_id"):
+        return str(tweet["tweet_id"])
+    raw = f"{tweet.get('tweet_link', '')}\n{tweet.get('text', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class PostQueue:
+    """
+    Durable post queue stored as a JSON file.
+
+    Items keep their status (pending/posted/failed) so a run that exits
+    part-way resumes with the remaining items, and recent post timestamps are
+    kept so pacing carries over between runs.
+    """
+    def __init__(self, path=POST_QUEUE_PATH, history_size=50):
+        self.path = path
+        self.history_size = history_size
+        self.items = []
+        self.post_times = []
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        self.items = stored.get("items", [])
+        self.post_times = stored.get("post_times", [])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"items": self.items, "post_times": self.post_times}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def enqueue(self, tweets):
+        """Add tweets to the queue, skipping ones that are already pending"""
+        pending_ids = {item["id"] for item in self.items if item["status"] == "pending"}
+        added = 0
+        for tweet in tweets:
+            item_id = queue_item_id(tweet)
+            if item_id in pending_ids:
+                continue
+            self.items.append({
+                "id": item_id,
+                "tweet": tweet,
+                "status": "pending",
+                "enqueued_at": time.time(),
+            })
+            pending_ids.add(item_id)
+            added += 1
+        self.save()
+        return added
+
+    def pending(self):
+        return [item for item in self.items if item["status"] == "pending"]
+
+    def depth(self):
+        return len(self.pending())
+
+    def mark(self, item, status, posted_at=None):
+        item["status"] = status
+        item["finished_at"] = posted_at or time.time()
+        if status == "posted":
+            self.post_times = (self.post_times + [item["finished_at"]])[-self.history_size:]
+        # Finished items are only kept as a short history
+        finished = [i for i in self.items if i["status"] != "pending"]
+        if len(finished) > self.history_size:
+            drop = {id(i) for i in finished[:-self.history_size]}
+            self.items = [i for i in self.items if id(i) not in drop]
+        self.save()
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from logger import Logger
+from metrics import registry as metrics
+
+PROXY_STATE_PATH = "./state/proxy_pool.json"
+HEALTH_CHECK_URL = "https://twitter.com/robots.txt"
+# Latency assumed for a proxy that has not been measured yet
+UNKNOWN_LATENCY = 2.0
+
+PROXY_REQUESTS = metrics.counter("proxy_requests_total", "Requests made through pooled proxies, by status")
+PROXIES_ACTIVE = metrics.gauge("proxies_active", "Proxies in the pool that have not been retired")
+
+
+def load_proxies(source):
+    """Proxy URLs from a file (one per line, '#' comments) or a comma-separated string"""
+    if os.path.exists(source):
+        with open(source, "r", encoding="utf-8") as f:
+            entries = [line.strip() for line in f]
+    else:
+        entries = [entry.strip() for entry in source.split(",")]
+    return [entry if "://" in entry else f"http://{entry}" for entry in entries if entry and not entry.startswith("#")]
+
+
+class ProxyStats:
+    def __init__(self, url, latency=None, successes=0, failures=0, consecutive_failures=0, retired=False):
+        self.url = url
+        self.latency = latency
+        self.successes = successes
+        self.failures = failures
+        self.consecutive_failures = consecutive_failures
+        self.retired = retired
+        self.in_use = 0
+
+    @property
+    def error_rate(self):
+        total = self.successes + self.failures
+        return self.failures / total if total else 0.0
+
+    @property
+    def score(self):
+        """Expected cost of using this proxy; lower is better"""
+        latency = self.latency if self.latency is not None else UNKNOWN_LATENCY
+        return latency * (1 + 4 * self.error_rate)
+
+    def to_dict(self):
+        return {
+            "latency": self.latency,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "retired": self.retired,
+        }
+
+
+class ProxyPool:
+    """
+    Pool of proxies scored by latency and error rate.
+
+    Browsers and download sessions each `acquire()` a proxy, preferring the
+    least-used, best-scoring one so load spreads across the pool, and report
+    outcomes with `record()`. A proxy is retired after `max_failures`
+    consecutive failures. Scores persist between runs in ./state.
+    """
+    def __init__(self, proxies, path=PROXY_STATE_PATH, max_failures=3, timeout=10):
+        self.logger = Logger("ProxyPool", "proxy_pool.log")
+        self.path = path
+        self.max_failures = max_failures
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+        saved = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        self.proxies = {url: ProxyStats(url, **saved.get(url, {})) for url in proxies}
+        # Retirement is per run: a proxy retired last time gets another chance
+        for stats in self.proxies.values():
+            stats.retired = False
+            stats.consecutive_failures = 0
+        PROXIES_ACTIVE.set(len(self.proxies))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            data = {url: stats.to_dict() for url, stats in self.proxies.items()}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def active(self):
+        with self._lock:
+            return [stats for stats in self.proxies.values() if not stats.retired]
+
+    def health_check(self, url=HEALTH_CHECK_URL, workers=8):
+        """Probe every active proxy concurrently; proxies that fail are retired for this run"""
+        def check(stats):
+            started = time.perf_counter()
+            try:
+                response = requests.get(url, proxies={"http": stats.url, "https": stats.url}, timeout=self.timeout)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            self.record(stats.url, ok, time.perf_counter() - started if ok else None)
+            if not ok:
+                with self._lock:
+                    stats.retired = True
+
+        proxies = self.active()
+        if not proxies:
+            return []
+        with ThreadPoolExecutor(max_workers=min(workers, len(proxies))) as executor:
+            list(executor.map(check, proxies))
+        self.save()
+        healthy = self.active()
+        PROXIES_ACTIVE.set(len(healthy))
+        self.logger.info(f"Proxy health check: {len(healthy)}/{len(self.proxies)} usable")
+        for stats in sorted(healthy, key=lambda stats: stats.score)[:5]:
+            self.logger.debug(f"{stats.url}: {1000 * (stats.latency or 0):.0f}ms, {100 * stats.error_rate:.0f}% errors")
+        return healthy
+
+    def acquire(self):
+        """Best available proxy URL, or None once every proxy is retired"""
+        with self._lock:
+            candidates = [stats for stats in self.proxies.values() if not stats.retired]
+            if not candidates:
+                return None
+            stats = min(candidates, key=lambda stats: (stats.in_use, stats.score))
+            stats.in_use += 1
+            return stats.url
+
+    def is_retired(self, url):
+        with self._lock:
+            return url in self.proxies and self.proxies[url].retired
+
+    def release(self, url):
+        with self._lock:
+            if url in self.proxies:
+                self.proxies[url].in_use = max(0, self.proxies[url].in_use - 1)
+
+    def record(self, url, ok, latency=None):
+        """Record one request's outcome; retires the proxy after repeated failures"""
+        if url not in self.proxies:
+            return
+        PROXY_REQUESTS.inc(status="ok" if ok else "failed")
+        with self._lock:
+            stats = self.proxies[url]
+            if ok:
+                stats.successes += 1
+                stats.consecutive_failures = 0
+                if latency is not None:
+                    stats.latency = latency if stats.latency is None else 0.7 * stats.latency + 0.3 * latency
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures < self.max_failures or stats.retired:
+                return
+            stats.retired = True
+            active = sum(1 for other in self.proxies.values() if not other.retired)
+        PROXIES_ACTIVE.set(active)
+        self.logger.warning(f"Retired proxy {url} after {self.max_failures} consecutive failures ({active} left)")
+
+    def session(self):
+        """A requests session bound to the best available proxy (direct if none are left)"""
+        return ProxySession(self)
+
+
+class ProxySession(requests.Session):
+    """requests.Session that routes through one pooled proxy and reports each outcome"""
+    def __init__(self, pool):
+        super().__init__()
+        self.pool = pool
+        self.proxy = pool.acquire()
+        if self.proxy:
+            self.proxies = {"http": self.proxy, "https": self.proxy}
+
+    def request(self, method, url, *args, **kwargs):
+        if self.proxy and self.pool.is_retired(self.proxy):
+            self.pool.release(self.proxy)
+            self.proxy = self.pool.acquire()
+            self.proxies = {"http": self.proxy, "https": self.proxy} if self.proxy else {}
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self.pool.record(self.proxy, False)
+            raise
+        # 403/429 from the target usually means this IP is being throttled
+        self.pool.record(self.proxy, response.status_code not in (403, 429) and response.status_code < 500, time.perf_counter() - started)
+        return response
+
+    def close(self):
+        if self.proxy:
+            self.pool.release(self.proxy)
+            self.proxy = None
+        super().close()
+
+
+def firefox_proxy_preferences(proxy):
+    """Firefox about:config preferences for a manual proxy (Firefox ignores --proxy-server)"""
+    parsed = urlparse(proxy if "://" in proxy else f"http://{proxy}")
+    host, port = parsed.hostname, parsed.port or 8080
+    preferences = {"network.proxy.type": 1}
+    if parsed.scheme.startswith("socks"):
+        preferences.update({
+            "network.proxy.socks": host,
+            "network.proxy.socks_port": port,
+            "network.proxy.socks_version": 4 if parsed.scheme == "socks4" else 5,
+            "network.proxy.socks_remote_dns": True,
+        })
+    else:
+        preferences.update({
+            "network.proxy.http": host,
+            "network.proxy.http_port": port,
+            "network.proxy.ssl": host,
+            "network.proxy.ssl_port": port,
+        })
+    return preferences
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import random
+import threading
+import statistics
+
+RATE_LIMIT_STATE_PATH = "./state/rate_limit.json"
+
+# One round trip that reports both rate-limit signals: the timeline's Retry
+# button, and 429 responses from the API seen through the Resource Timing API
+# (responseStatus is not exposed by every browser; the button still works).
+# Entries are cleared after each probe so only new responses are counted.
+RATE_LIMIT_PROBE_SCRIPT = """
+const retry = [...document.querySelectorAll('span')].some(span => span.textContent === 'Retry');
+let throttled = 0;
+if (window.performance && performance.getEntriesByType) {
+    throttled = performance.getEntriesByType('resource')
+        .filter(entry => entry.responseStatus === 429).length;
+    performance.clearResourceTimings();
+}
+return {retry: retry, throttled: throttled};
+"""
+
+
+class RateLimitBackoff:
+    """
+    Exponential backoff with jitter for the scroll loop's rate-limit stalls.
+
+    The first wait of a stall is the median of recently observed recovery
+    times (persisted across runs), so a typical stall is cleared in one wait
+    rather than several fixed 58s sleeps; each further attempt doubles it, up
+    to `cap`. A stall is abandoned after `max_stall` seconds. Time spent
+    waiting is tracked so it can be reported, along with how much of it was
+    used for other work.
+    """
+    def __init__(self, path=RATE_LIMIT_STATE_PATH, base=15.0, cap=300.0, jitter=0.25, max_stall=900.0, history_size=20):
+        self.path = path
+        self.base = base
+        self.cap = cap
+        self.jitter = jitter
+        self.max_stall = max_stall
+        self.history_size = history_size
+        self.recoveries = []
+        self.stalls = 0
+        self.lost_seconds = 0.0
+        self.reclaimed_seconds = 0.0
+        # Sharded scrapes share one instance across browser threads
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.recoveries = json.load(f).get("recoveries", [])[-self.history_size:]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"recoveries": self.recoveries}, f)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def probe(driver):
+        """Return (limited, reason) for the page the driver is on"""
+        signals = driver.execute_script(RATE_LIMIT_PROBE_SCRIPT) or {}
+        if signals.get("retry"):
+            return True, "retry button"
+        if signals.get("throttled"):
+            return True, f"{signals['throttled']} HTTP 429 responses"
+        return False, None
+
+    def delay(self, attempt):
+        """Seconds to wait before retry number `attempt` (0-based) of a stall"""
+        estimate = statistics.median(self.recoveries) if self.recoveries else self.base
+        delay = min(self.cap, max(1.0, estimate) * (2 ** attempt))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self, seconds, idle_work=None):
+        """
+        Sleep for `seconds`, first handing the time to `idle_work(deadline)`
+        so non-network work can run while the browser is throttled.
+        """
+        started = time.time()
+        deadline = started + seconds
+        reclaimed = 0.0
+        if idle_work is not None:
+            idle_work(deadline)
+            reclaimed = min(time.time(), deadline) - started
+        remaining = deadline - time.time()
+        if remaining > 0:
+            time.sleep(remaining)
+        with self._lock:
+            self.reclaimed_seconds += reclaimed
+            self.lost_seconds += time.time() - started
+
+    def end_stall(self, seconds, recovered):
+        """Count a finished stall; only recovered ones feed the delay estimate"""
+        with self._lock:
+            self.stalls += 1
+            if recovered:
+                self.recoveries = (self.recoveries + [round(seconds, 1)])[-self.history_size:]
+                self.save()
+
+    def summary(self):
+        return (
+            f"{self.stalls} stalls, {self.lost_seconds:.0f}s waiting, "
+            f"{self.reclaimed_seconds:.0f}s of it used for other work, "
+            f"{self.lost_seconds - self.reclaimed_seconds:.0f}s lost"
+        )
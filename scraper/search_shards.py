@@ -0,0 +1,139 @@
+import queue
+import threading
+from datetime import date, timedelta
+
+from logger import Logger
+from driver_profiler import profiler
+
+
+def date_windows(since, until, days=7):
+    """Split [since, until) into consecutive windows of at most `days` days"""
+    start = date.fromisoformat(since)
+    end = date.fromisoformat(until)
+    windows = []
+    while start < end:
+        window_end = min(start + timedelta(days=days), end)
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end
+    return windows
+
+
+def split_window(window):
+    """Halve a window, or return None if it is a single day"""
+    start, end = date.fromisoformat(window[0]), date.fromisoformat(window[1])
+    days = (end - start).days
+    if days < 2:
+        return None
+    middle = start + timedelta(days=days // 2)
+    return (window[0], middle.isoformat()), (middle.isoformat(), window[1])
+
+
+def shard_query(query, window):
+    return f"{query} since:{window[0]} until:{window[1]}"
+
+
+class ShardedSearch:
+    """
+    Scrape a search over a date range as independent since:/until: windows.
+
+    Windows are taken from a shared queue by `workers` scrapers, each with its
+    own browser. The first scraper must already be logged in; the others reuse
+    its session cookies. With `adaptive`, a window that fills its
+    `window_tweets` budget is assumed to hold more and is split in half and
+    requeued, so dense periods get finer windows. Results are merged and
+    deduplicated by status ID.
+    """
+    def __init__(self, scraper, create_scraper, workers=2, window_tweets=200, adaptive=True):
+        self.logger = Logger("ShardedSearch", "twitter_scraper.log")
+        self.scraper = scraper
+        self.create_scraper = create_scraper
+        self.workers = max(1, workers)
+        self.window_tweets = window_tweets
+        self.adaptive = adaptive
+        self.tweets_by_id = {}
+        self.windows_done = 0
+        self._lock = threading.Lock()
+
+    def run(self, query, windows, latest=True):
+        pending = queue.Queue()
+        for window in windows:
+            pending.put(window)
+
+        # Near-duplicate filtering runs once over the merged results instead of per browser
+        dedup_index, self.scraper.dedup_index = self.scraper.dedup_index, None
+
+        cookies = self.scraper.export_cookies()
+        scrapers = [self.scraper]
+        for _ in range(min(self.workers, len(windows)) - 1):
+            worker_scraper = self.create_scraper()
+            worker_scraper.import_cookies(cookies)
+            scrapers.append(worker_scraper)
+        for scraper in scrapers:
+            # Rich allows only one live progress display at a time
+            scraper.show_progress = False
+            scraper.backoff = self.scraper.backoff
+
+        self.logger.info(f"Scraping {len(windows)} date windows of '{query}' with {len(scrapers)} browsers...")
+        threads = [
+            threading.Thread(target=self._work, args=(scraper, query, pending, latest), name=f"shard-{i}", daemon=True)
+            for i, scraper in enumerate(scrapers, 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for scraper in scrapers[1:]:
+            scraper.quit()
+        self.scraper.show_progress = True
+        self.scraper.dedup_index = dedup_index
+
+        tweets = list(self.tweets_by_id.values())
+        if dedup_index is not None:
+            tweets = [
+                tweet for tweet in tweets
+                if dedup_index.check_and_add(tweet.get('tweet_id') or tweet.get('tweet_link'), tweet.get('content'), tweet.get('media_urls')) is None
+            ]
+            dedup_index.save()
+        self.logger.info(f"Sharded search done: {self.windows_done} windows, {len(tweets)} unique tweets")
+        return tweets
+
+    def _work(self, scraper, query, pending, latest):
+        with profiler.phase("scrape"):
+            while True:
+                try:
+                    window = pending.get(timeout=1)
+                except queue.Empty:
+                    # Other workers may still split a dense window into new ones
+                    if pending.unfinished_tasks == 0:
+                        return
+                    continue
+                try:
+                    self._scrape_window(scraper, query, window, latest, pending)
+                finally:
+                    pending.task_done()
+
+    def _scrape_window(self, scraper, query, window, latest, pending):
+        try:
+            scraper.scrape_tweets(
+                max_tweets=self.window_tweets,
+                scrape_query=shard_query(query, window),
+                scrape_latest=latest,
+                scrape_top=not latest,
+            )
+        except Exception as e:
+            self.logger.error(f"Window {window[0]}..{window[1]} failed: {e}")
+            return
+
+        tweets = scraper.get_tweets()
+        halves = split_window(window) if self.adaptive and len(tweets) >= self.window_tweets else None
+        with self._lock:
+            for tweet in tweets:
+                self.tweets_by_id.setdefault(tweet.get('tweet_id') or tweet.get('tweet_link'), tweet)
+            self.windows_done += 1
+        if halves:
+            self.logger.info(f"Window {window[0]}..{window[1]} is dense, splitting it")
+            for half in halves:
+                pending.put(half)
+        else:
+            self.logger.info(f"Window {window[0]}..{window[1]}: {len(tweets)} tweets")
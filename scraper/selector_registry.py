@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import atexit
+import threading
+
+from selenium.common.exceptions import TimeoutException
+
+from metrics import registry as metrics
+
+SELECTOR_STATE_PATH = "./state/selectors.json"
+# Seconds between saves of the learned stats; the rest are saved at exit
+SAVE_INTERVAL = 60
+
+# Fallback chains in their original order; the registry learns a better one.
+# Each candidate is (strategy, selector) with strategy "css" or "xpath".
+SELECTOR_CHAINS = {
+    "compose_button": [
+        ("css", "a[data-testid='SideNav_NewTweet_Button']"),
+        ("xpath", "//div[@role='textbox' and @aria-label]"),
+    ],
+    "tweet_input": [
+        ("css", "div[data-testid='tweetTextarea_0']"),
+        ("xpath", "//div[@role='textbox' and @contenteditable='true']"),
+    ],
+    "tweet_button": [
+        ("xpath", "//*[contains(@data-testid, 'tweetButton') and not(@aria-disabled='true')]"),
+        ("xpath", "//*[contains(@data-testid, 'tweetButton') and (contains(., 'Tweet') or contains(., 'Post'))]"),
+    ],
+}
+
+# Checks every candidate in one round trip and returns [index, element] for
+# the first one (in the given order) that matches, or null. With `clickable`,
+# hidden and disabled elements don't count.
+PROBE_SCRIPT = """
+const candidates = arguments[0], clickable = arguments[1];
+const usable = el => !clickable || (el.getClientRects().length > 0 && !el.disabled && el.getAttribute('aria-disabled') !== 'true');
+for (let i = 0; i < candidates.length; i++) {
+    const [strategy, selector] = candidates[i];
+    let matches = [];
+    if (strategy === 'css') {
+        matches = document.querySelectorAll(selector);
+    } else {
+        const found = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (let j = 0; j < found.snapshotLength; j++) matches.push(found.snapshotItem(j));
+    }
+    for (const el of matches) {
+        if (usable(el)) return [i, el];
+    }
+}
+return null;
+"""
+
+SELECTOR_LOOKUPS = metrics.counter("selector_lookups_total", "Selector chain lookups, by chain and outcome")
+SELECTOR_SECONDS = metrics.histogram("selector_lookup_seconds", "Time for a selector chain to find its element, by chain")
+
+
+class SelectorStats:
+    def __init__(self, hits=0, misses=0, recent=None, latency=None, last_hit=None):
+        self.hits = hits
+        self.misses = misses
+        # Moving average of hit (1) / miss (0), so a selector that just broke drops quickly
+        self.recent = recent
+        self.latency = latency
+        self.last_hit = last_hit
+
+    @property
+    def hit_rate(self):
+        return self.recent if self.recent is not None else 0.5
+
+    def record(self, hit, seconds=None):
+        if hit:
+            self.hits += 1
+            self.last_hit = time.time()
+            if seconds is not None:
+                self.latency = seconds if self.latency is None else 0.7 * self.latency + 0.3 * seconds
+        else:
+            self.misses += 1
+        self.recent = float(hit) if self.recent is None else 0.6 * self.recent + 0.4 * float(hit)
+
+    def to_dict(self):
+        return {"hits": self.hits, "misses": self.misses, "recent": self.recent, "latency": self.latency, "last_hit": self.last_hit}
+
+
+class SelectorRegistry:
+    """
+    Fallback selector chains that reorder themselves from experience.
+
+    Every lookup probes all of a chain's candidates in a single
+    execute_script call, so a selector that stopped matching costs nothing
+    extra instead of a full WebDriverWait timeout before the next one is
+    tried. Per-selector hit rate and latency persist across runs in ./state,
+    and candidates are probed best first, so when several match, the one
+    that has been working wins. Stats are saved at most every
+    `save_interval` seconds; the shared registry saves once more at exit.
+    """
+    def __init__(self, path=SELECTOR_STATE_PATH, chains=None, save_interval=SAVE_INTERVAL):
+        self.path = path
+        self.chains = chains or SELECTOR_CHAINS
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.stats = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self.stats = {
+                name: {selector: SelectorStats(**values) for selector, values in selectors.items()}
+                for name, selectors in saved.items()
+            }
+
+    def save(self):
+        """Write the stats if anything changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {name: {selector: stats.to_dict() for selector, stats in selectors.items()} for name, selectors in self.stats.items()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _stats(self, name, selector):
+        return self.stats.setdefault(name, {}).setdefault(selector, SelectorStats())
+
+    def ordered(self, name):
+        """
+        The chain's candidates, best first: highest hit rate, then lowest
+        latency (unproven selectors last), then original order
+        """
+        def rank(candidate):
+            stats = self._stats(name, candidate[1])
+            latency = stats.latency if stats.latency is not None else float("inf")
+            return (-stats.hit_rate, latency)
+
+        with self._lock:
+            return sorted(self.chains[name], key=rank)
+
+    def probe(self, driver, name, clickable=False):
+        """One round trip: the best matching element of the chain right now, or None"""
+        candidates = self.ordered(name)
+        result = driver.execute_script(PROBE_SCRIPT, [list(candidate) for candidate in candidates], clickable)
+        if not result:
+            return None, candidates
+        return (candidates[result[0]], result[1]), candidates
+
+    def find(self, driver, name, timeout=10, clickable=False, poll=0.25):
+        """
+        Wait up to `timeout` seconds for any candidate of the chain and return
+        its element. Raises TimeoutException like WebDriverWait when none shows up.
+        """
+        started = time.perf_counter()
+        deadline = started + timeout
+        while True:
+            found, candidates = self.probe(driver, name, clickable)
+            if found is not None:
+                candidate, element = found
+                self._record(name, candidates, candidate, time.perf_counter() - started)
+                return element
+            if time.perf_counter() >= deadline:
+                self._record(name, candidates, None, timeout)
+                raise TimeoutException(f"No selector in the '{name}' chain matched within {timeout}s")
+            time.sleep(poll)
+
+    def _record(self, name, candidates, winner, seconds):
+        """Credit the selector that matched and charge the ones probed before it"""
+        with self._lock:
+            for candidate in candidates:
+                hit = candidate == winner
+                self._stats(name, candidate[1]).record(hit, seconds)
+                if hit:
+                    break
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.save_interval
+        if winner is None:
+            SELECTOR_LOOKUPS.inc(chain=name, outcome="miss")
+        else:
+            SELECTOR_LOOKUPS.inc(chain=name, outcome="hit" if winner == self.chains[name][0] else "fallback_hit")
+            SELECTOR_SECONDS.observe(seconds, chain=name)
+        if due:
+            self.save()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_registry():
+    """Process-wide registry, so every poster in a multi-account run learns from the others"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SelectorRegistry()
+            atexit.register(_shared.save)
+        return _shared
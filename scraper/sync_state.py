@@ -0,0 +1,77 @@
+import os
+import json
+import time
+
+SYNC_STATE_PATH = "./state/sync_state.json"
+
+
+def sync_target_key(scraper_details):
+    """Stable key for what a scrape targets, e.g. 'username:elonmusk' or 'query:python:Latest'"""
+    kind = (scraper_details.get("type") or "Home").lower()
+    if kind == "username":
+        return f"username:{scraper_details['username'].lower()}"
+    if kind == "hashtag":
+        return f"hashtag:{scraper_details['hashtag'].lower()}:{scraper_details['tab']}"
+    if kind == "query":
+        return f"query:{scraper_details['query']}:{scraper_details['tab']}"
+    return "home"
+
+
+def _status_id(tweet):
+    try:
+        return int(tweet.get("tweet_id") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class SyncState:
+    """
+    Per-target high-water marks for incremental scraping.
+
+    Each target remembers the newest status ID and timestamp seen so far.
+    Status IDs are time-ordered, so a card with an ID at or below the mark was
+    already scraped. A mark only moves forward once a run has scrolled back
+    down to it, so new tweets are never skipped when a run stops early.
+    """
+    def __init__(self, path=SYNC_STATE_PATH):
+        self.path = path
+        self.marks = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.marks = json.load(f)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.marks, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def mark(self, target):
+        return self.marks.get(target)
+
+    def is_seen(self, tweet, mark):
+        """True if the tweet is at or below the target's high-water mark"""
+        if not mark:
+            return False
+        status_id = _status_id(tweet)
+        if status_id:
+            return status_id <= int(mark["newest_id"])
+        date_time = tweet.get("date_time")
+        return bool(date_time and mark.get("newest_time") and date_time <= mark["newest_time"])
+
+    def advance(self, target, tweets):
+        """Move the target's mark up to the newest of `tweets`; returns the new mark"""
+        newest = max(tweets, key=_status_id, default=None)
+        current = self.marks.get(target)
+        if newest is None or not _status_id(newest):
+            return current
+        if current and _status_id(newest) <= int(current["newest_id"]):
+            return current
+        self.marks[target] = {
+            "newest_id": str(_status_id(newest)),
+            "newest_time": newest.get("date_time"),
+            "updated_at": time.time(),
+        }
+        self.save()
+        return self.marks[target]
@@ -17,6 +17,7 @@ class Tweet:
     ) -> None:
         self.card = card
         self.error = False
+        self.is_ad = False
         self.tweet = None
 
         try:
@@ -106,6 +107,16 @@ class Tweet:
             self.tweet_link = ""
             self.tweet_id = ""
 
+        try:
+            self.media_urls = [
+                img.get_attribute("src")
+                for img in card.find_elements(
+                    "xpath", './/img[contains(@src, "pbs.twimg.com/media")]'
+                )
+            ]
+        except StaleElementReferenceException:
+            self.media_urls = []
+
         self.following_cnt = "0"
         self.followers_cnt = "0"
         self.user_id = None
@@ -205,7 +216,10 @@ class Tweet:
             'user': self.user,
             'handle': self.handle,
             'content': self.content,
-            'tweet_link': self.tweet_link
+            'tweet_link': self.tweet_link,
+            'tweet_id': self.tweet_id,
+            'media_urls': self.media_urls,
+            'date_time': self.date_time,
             }
 
         pass
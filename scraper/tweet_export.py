@@ -0,0 +1,64 @@
+import os
+import re
+import csv
+import glob
+from datetime import datetime
+
+from lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+CSV_COLUMNS = {
+    "Name": "user",
+    "Handle": "handle",
+    "Content": "content",
+    "Tweet Link": "tweet_link",
+}
+OPTIONAL_CSV_COLUMNS = {
+    "Timestamp": "date_time",
+    "Rephrased": "rephrased",
+}
+
+
+def tweets_to_columns(tweets):
+    """Column-oriented view of scraped tweet dicts, keyed by CSV header"""
+    columns = {header: [tweet[key] for tweet in tweets] for header, key in CSV_COLUMNS.items()}
+    for header, key in OPTIONAL_CSV_COLUMNS.items():
+        if any(key in tweet for tweet in tweets):
+            columns[header] = [tweet.get(key, "") for tweet in tweets]
+    return columns
+
+
+def tweet_id_from_link(tweet_link):
+    match = re.search(r'/status/(\d+)', tweet_link or "")
+    return match.group(1) if match else None
+
+
+def latest_tweets_csv(folder_path="./tweets/"):
+    """Most recently written CSV in the tweets folder, or None"""
+    files = glob.glob(os.path.join(folder_path, "*.csv"))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def read_tweets_csv(file_path):
+    """Read a CSV written by write_tweets_csv back into tweet dicts"""
+    keys = {**CSV_COLUMNS, **OPTIONAL_CSV_COLUMNS}
+    tweets = []
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            tweet = {key: row[header] for header, key in keys.items() if header in row}
+            tweet["tweet_id"] = tweet_id_from_link(tweet.get("tweet_link"))
+            tweets.append(tweet)
+    return tweets
+
+
+def write_tweets_csv(tweets, folder_path="./tweets/", file_path=None):
+    """Write scraped tweets to a timestamped CSV file and return its path"""
+    if file_path is None:
+        os.makedirs(folder_path, exist_ok=True)
+        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        file_path = os.path.join(folder_path, f"{current_time}_tweets_1-{len(tweets)}.csv")
+
+    df = pd.DataFrame(tweets_to_columns(tweets))
+    df.to_csv(file_path, index=False, encoding="utf-8")
+    return file_path
@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import sqlite3
+
+from tweet_export import tweet_id_from_link
+
+TWEET_DB_PATH = "./state/tweets.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    tweet_id   TEXT PRIMARY KEY,
+    tweet_link TEXT,
+    user       TEXT,
+    handle     TEXT,
+    content    TEXT,
+    date_time  TEXT,
+    media_urls TEXT,
+    rephrased  TEXT,
+    first_seen REAL,
+    last_seen  REAL
+);
+CREATE INDEX IF NOT EXISTS tweets_handle ON tweets (handle COLLATE NOCASE, date_time);
+CREATE INDEX IF NOT EXISTS tweets_date_time ON tweets (date_time);
+"""
+
+# Later scrapes refresh a tweet's fields but never erase a rephrase or timestamp
+UPSERT = """
+INSERT INTO tweets (tweet_id, tweet_link, user, handle, content, date_time, media_urls, rephrased, first_seen, last_seen)
+VALUES (:tweet_id, :tweet_link, :user, :handle, :content, :date_time, :media_urls, :rephrased, :seen, :seen)
+ON CONFLICT (tweet_id) DO UPDATE SET
+    tweet_link = excluded.tweet_link,
+    user = excluded.user,
+    handle = excluded.handle,
+    content = excluded.content,
+    date_time = COALESCE(excluded.date_time, tweets.date_time),
+    media_urls = excluded.media_urls,
+    rephrased = COALESCE(excluded.rephrased, tweets.rephrased),
+    last_seen = excluded.last_seen
+"""
+
+
+class TweetStore:
+    """
+    SQLite archive of every scraped tweet, keyed by status ID.
+
+    Runs in WAL mode, so the query command and the job API can read while a
+    scrape writes. Upserts are batched into one transaction per `batch_size`
+    tweets. Indexes on handle and date make lookups by author or time range
+    cheap regardless of how many runs the archive holds.
+    """
+    def __init__(self, path=TWEET_DB_PATH, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def upsert(self, tweets):
+        """Insert new tweets and refresh known ones; returns how many rows were written"""
+        seen = time.time()
+        rows = []
+        for tweet in tweets:
+            tweet_id = tweet.get("tweet_id") or tweet_id_from_link(tweet.get("tweet_link"))
+            if not tweet_id:
+                continue
+            rows.append({
+                "tweet_id": str(tweet_id),
+                "tweet_link": tweet.get("tweet_link", ""),
+                "user": tweet.get("user", ""),
+                "handle": tweet.get("handle", ""),
+                "content": tweet.get("content", ""),
+                "date_time": tweet.get("date_time") if tweet.get("date_time") not in (None, "", "skip") else None,
+                "media_urls": json.dumps(tweet.get("media_urls") or []),
+                "rephrased": tweet.get("rephrased") or None,
+                "seen": seen,
+            })
+        for start in range(0, len(rows), self.batch_size):
+            with self.connection:
+                self.connection.executemany(UPSERT, rows[start:start + self.batch_size])
+        return len(rows)
+
+    def known_ids(self, tweet_ids):
+        """The subset of `tweet_ids` already in the archive"""
+        tweet_ids = [str(tweet_id) for tweet_id in tweet_ids if tweet_id]
+        known = set()
+        for start in range(0, len(tweet_ids), self.batch_size):
+            batch = tweet_ids[start:start + self.batch_size]
+            placeholders = ",".join("?" * len(batch))
+            known.update(row[0] for row in self.connection.execute(f"SELECT tweet_id FROM tweets WHERE tweet_id IN ({placeholders})", batch))
+        return known
+
+    def query(self, handle=None, since=None, until=None, contains=None, rephrased=None, limit=None, oldest_first=False):
+        """
+        Tweets matching every given filter, newest first. `since`/`until` are
+        ISO dates compared against the tweet timestamp; `rephrased` selects
+        tweets with (True) or without (False) a stored rephrase.
+        """
+        clauses, params = [], []
+        if handle:
+            clauses.append("handle = ? COLLATE NOCASE")
+            params.append(handle if handle.startswith("@") else f"@{handle}")
+        if since:
+            clauses.append("date_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("date_time < ?")
+            params.append(until)
+        if contains:
+            clauses.append("content LIKE ?")
+            params.append(f"%{contains}%")
+        if rephrased is not None:
+            clauses.append("rephrased IS NOT NULL" if rephrased else "rephrased IS NULL")
+
+        sql = "SELECT * FROM tweets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY date_time {'ASC' if oldest_first else 'DESC'}, CAST(tweet_id AS INTEGER) {'ASC' if oldest_first else 'DESC'}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._tweet(row) for row in self.connection.execute(sql, params)]
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+
+    @staticmethod
+    def _tweet(row):
+        tweet = {key: row[key] for key in ("tweet_id", "tweet_link", "user", "handle", "content") if row[key] is not None}
+        tweet["media_urls"] = json.loads(row["media_urls"] or "[]")
+        if row["date_time"]:
+            tweet["date_time"] = row["date_time"]
+        if row["rephrased"]:
+            tweet["rephrased"] = row["rephrased"]
+        return tweet
@@ -1,74 +1,113 @@
 import os
 import requests
 import re
-import bs4
 import time
-import glob
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from alive_progress import alive_bar, config_handler
-from tqdm import tqdm
 from logger import Logger
+from lazy import lazy_import
+from media_manifest import MediaManifest
+from metrics import registry as metrics
+from driver_profiler import profiler
 
 from selenium.webdriver.chrome.options import Options
 
+bs4 = lazy_import("bs4")
+webdriver_manager_chrome = lazy_import("webdriver_manager.chrome")
 
 logger = Logger("MediaDownloader", "media_downloader.log")
 
-def download_twitter_video(tweet_links, usernames):
-    """Download media from tweet links"""
+DOWNLOADS = metrics.counter("media_downloads_total", "Media files downloaded, by type and status")
+DOWNLOAD_BYTES = metrics.counter("media_download_bytes_total", "Bytes of media downloaded, by type")
+DOWNLOAD_SECONDS = metrics.histogram("media_download_seconds", "Time to download one media file, by type")
+
+# Upper bound on concurrent headless browsers, whatever --browsers asks for
+MAX_BROWSERS = int(os.getenv("REPHRASEX_MAX_BROWSERS", "8"))
+
+# One round trip per poll: whether the tweet has rendered, its image URLs and whether it has a video
+MEDIA_PROBE_SCRIPT = """
+return {
+    ready: document.querySelector('article') !== null,
+    images: [...document.querySelectorAll("img[src*='pbs.twimg.com/media']")].map(img => img.src),
+    video: document.querySelector("video, div[data-testid='videoPlayer']") !== null,
+};
+"""
+
+def http_session(proxy_pool=None):
+    """A requests session, routed through the best pooled proxy when a pool is given"""
+    return proxy_pool.session() if proxy_pool is not None else requests.Session()
+
+
+def download_twitter_video(
+    tweet_links,
+    usernames,
+    manifest=None,
+    images_done=None,
+    proxy_pool=None,
+    browsers=1,
+    download_workers=4,
+):
+    """
+    Download media from tweet links, where usernames[i] is the author of tweet_links[i].
+    Links in `images_done` already had their images fetched and are only checked for videos.
+
+    Each tweet is visited once by one of `browsers` headless browsers, and the
+    media it finds is handed straight to a pool of `download_workers` download
+    threads, so downloading overlaps with extracting the remaining tweets.
+    """
     if not tweet_links or len(tweet_links) == 0:
         logger.error("No tweet links provided for media download.")
         return
 
-    logger.info(f"Extracting media from {len(tweet_links)} tweets...")
-
-    # Create a Scrape instance to get image links from tweets
-    scraper = TweetMediaScraper(tweet_links)
-    image_links_by_tweet = scraper.get_image_links_by_tweet()
+    manifest = manifest or MediaManifest()
+    username_by_link = dict(zip(tweet_links, usernames))
+    images_done = set(images_done or ())
+    counts = {"images": 0, "videos": 0}
+    counts_lock = threading.Lock()
+    jobs = []
 
-    # Check for videos in the tweets
-    video_links_by_tweet = scraper.get_video_links_by_tweet()
-
-    total_image_count = sum(len(links) for links in image_links_by_tweet.values())
-    total_video_count = sum(len(links) for links in video_links_by_tweet.values())
+    logger.info(f"Extracting media from {len(tweet_links)} tweets...")
 
-    if total_image_count == 0 and total_video_count == 0:
+    def download_videos(video_links, username, tweet_id):
+        with http_session(proxy_pool) as session:
+            for video_url in video_links:
+                download_tweet_video(video_url, username, tweet_id, manifest=manifest, session=session, show_progress=False)
+
+    with ThreadPoolExecutor(max_workers=max(1, download_workers), thread_name_prefix="media-download") as downloads, \
+         logger.progress_bar(total=len(tweet_links), description="Extracting media") as progress:
+
+        def on_media(tweet_url, image_links, video_links):
+            tweet_id = extract_tweet_id(tweet_url)
+            username = username_by_link.get(tweet_url) or "twitter_media"
+            if tweet_url in images_done:
+                image_links = []
+            with counts_lock:
+                counts["images"] += len(image_links)
+                counts["videos"] += len(video_links)
+
+            if image_links:
+                logger.info(f"Downloading {len(image_links)} image(s) for tweet ID: {tweet_id} from user: {username}")
+                downloader = MediaDownloader(image_links, manifest=manifest, proxy_pool=proxy_pool, show_progress=False)
+                jobs.append(downloads.submit(downloader.download, username, tweet_id))
+            if video_links:
+                logger.info(f"Downloading videos for tweet ID: {tweet_id} from user: {username}")
+                jobs.append(downloads.submit(download_videos, video_links, username, tweet_id))
+            progress.update(1)
+
+        TweetMediaScraper(tweet_links, proxy_pool, browsers=browsers).extract(on_media)
+        for job in jobs:
+            job.result()
+
+    if counts["images"] == 0 and counts["videos"] == 0:
         logger.error("No media found in the provided tweets.")
         return
 
-    logger.info(f"Found {total_image_count} images and {total_video_count} videos across {len(tweet_links)} tweets.")
-
-    # Download the images for each tweet
-    for tweet_url, image_links in image_links_by_tweet.items():
-        if not image_links:
-            continue
-
-        tweet_id = extract_tweet_id(tweet_url)
-       
-        username_index = tweet_links.index(tweet_url) if tweet_url in tweet_links else 0
-        username = usernames[username_index] if username_index < len(usernames) else "twitter_media"
-
-        logger.info(f"Downloading {len(image_links)} image(s) for tweet ID: {tweet_id} from user: {username}")
-        downloader = MediaDownloader(image_links)
-        downloader.download(username, tweet_id)
-
-    # Download the videos for each tweet
-    for tweet_url, video_links in video_links_by_tweet.items():
-        if not video_links:
-            continue
-
-        tweet_id = extract_tweet_id(tweet_url)
-        username_index = tweet_links.index(tweet_url) if tweet_url in tweet_links else 0
-        username = usernames[username_index] if username_index < len(usernames) else "twitter_media"
-
-        logger.info(f"Downloading videos for tweet ID: {tweet_id} from user: {username}")
-        for video_url in video_links:
-            download_tweet_video(video_url, username, tweet_id)
-
+    logger.info(f"Found {counts['images']} images and {counts['videos']} videos across {len(tweet_links)} tweets.")
     logger.info("Media downloaded successfully to images/ directory.")
     return
 
@@ -79,30 +118,33 @@ def extract_tweet_id(tweet_url):
         return match.group(1)
     return None
 
-def download_video(url, file_name) -> None:
+def download_video(url, file_name, session=None, show_progress=True) -> None:
     """Download a video from a URL into a filename using an indeterminate spinner."""
-    response = requests.get(url, stream=True)
+    response = (session or requests).get(url, stream=True)
     block_size = 1024  # 1KB
     download_path = file_name
 
 
-    with open(download_path, "wb") as file, logger.indeterminate_spinner(f"Downloading {os.path.basename(file_name)}") as spinner:
+    with open(download_path, "wb") as file, \
+         logger.indeterminate_spinner(f"Downloading {os.path.basename(file_name)}", disable=not show_progress) as spinner, \
+         DOWNLOAD_SECONDS.time(type="video"):
         for data in response.iter_content(block_size):
             file.write(data)
+            DOWNLOAD_BYTES.inc(len(data), type="video")
 
         spinner.set_description("Download complete!")
     
     logger.info(f"Video downloaded successfully to {download_path}!")
 
 
-def download_tweet_video(url, username, tweet_id=None):
+def download_tweet_video(url, username, tweet_id=None, manifest=None, session=None, show_progress=True):
     """Download a Twitter video using an external service."""
     try:
         video_dir = f"./images/{username}/videos"
         os.makedirs(video_dir, exist_ok=True)
         
         api_url = f"https://twitsave.com/info?url={url}"
-        response = requests.get(api_url)
+        response = (session or requests).get(api_url)
         data = bs4.BeautifulSoup(response.text, "html.parser")
 
         download_button = data.find("div", class_="origin-top-right")
@@ -120,105 +162,154 @@ def download_tweet_video(url, username, tweet_id=None):
 
         if highest_quality_url:
             full_path = os.path.join(video_dir, file_name)
-            download_video(highest_quality_url, full_path)
+            download_video(highest_quality_url, full_path, session=session, show_progress=show_progress)
+            DOWNLOADS.inc(type="video", status="ok")
+            if manifest is not None:
+                manifest.add(tweet_id, full_path, user=username, media_type="video")
             return full_path
         else:
             logger.error(f"No valid video URL found for {url}")
+            DOWNLOADS.inc(type="video", status="failed")
             return None
 
     except Exception as e:
+        DOWNLOADS.inc(type="video", status="failed")
         logger.error(f"Failed to download video from {url}. Error: {e}", exc_info=True)
         return None
 
 class TweetMediaScraper:
-    def __init__(self, urls):
+    def __init__(self, urls, proxy_pool=None, browsers=1):
         self.urls = urls
+        self.proxy_pool = proxy_pool
+        self.browsers = browsers
+        self.visited = False
         self.image_links_by_tweet = {}
         self.video_links_by_tweet = {}
+        self._lock = threading.Lock()
 
-    def get_image_links_by_tweet(self):
-        """Get image links for each tweet URL"""
+    def _chrome_options(self):
+        """Headless Chrome options and the pooled proxy they route through (or None)"""
         chrome_options = Options()
         chrome_options.add_argument("--headless")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--log-level=3")
         chrome_options.add_argument("--no-sandbox")
+        proxy = self.proxy_pool.acquire() if self.proxy_pool is not None else None
+        if proxy:
+            chrome_options.add_argument(f"--proxy-server={proxy}")
+        return chrome_options, proxy
+
+    def extract(self, on_media=None):
+        """
+        Visit every URL exactly once, spread over up to `browsers` headless
+        browsers (capped at MAX_BROWSERS), collecting image and video links.
+        `on_media(url, image_links, video_links)` is called from the browser
+        threads as soon as each tweet is done.
+        """
+        workers = max(1, min(self.browsers, MAX_BROWSERS, len(self.urls)))
+        pending = queue.Queue()
+        for url in self.urls:
+            pending.put(url)
 
         try:
-            logger.info("Setting up Chrome driver for media extraction (images)...")
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            for i, url in enumerate(self.urls, 1):
-                logger.info(f"Processing tweet {i}/{len(self.urls)}: {url}")
-                self.image_links_by_tweet[url] = self.get_images_from_tweet(driver, url)
-            driver.quit()
-            return self.image_links_by_tweet
+            driver_path = webdriver_manager_chrome.ChromeDriverManager().install()
         except Exception as e:
-            logger.error(f"Error setting up Chrome driver for images: {e}", exc_info=True)
-            return {}
+            logger.error(f"Error setting up Chrome driver for media extraction: {e}", exc_info=True)
+            return
+
+        def worker(number):
+            # The profiler phase is per thread, so each browser thread enters its own
+            with profiler.phase("media"):
+                chrome_options, proxy = self._chrome_options()
+                try:
+                    driver = profiler.instrument(webdriver.Chrome(service=Service(driver_path), options=chrome_options))
+                except Exception as e:
+                    logger.error(f"Error starting media browser {number}: {e}", exc_info=True)
+                    if proxy:
+                        self.proxy_pool.release(proxy)
+                    return
+
+                try:
+                    while True:
+                        try:
+                            url = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        logger.info(f"Processing tweet {len(self.urls) - pending.qsize()}/{len(self.urls)}: {url}")
+                        image_links, video_links = self.get_media_from_tweet(driver, url)
+                        with self._lock:
+                            self.image_links_by_tweet[url] = image_links
+                            self.video_links_by_tweet[url] = video_links
+                        if on_media is not None:
+                            on_media(url, image_links, video_links)
+                finally:
+                    driver.quit()
+                    if proxy:
+                        self.proxy_pool.release(proxy)
+
+        logger.info(f"Setting up {workers} Chrome driver(s) for media extraction...")
+        threads = [threading.Thread(target=worker, args=(i,), name=f"media-browser-{i}") for i in range(1, workers + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.visited = True
+
+        if not pending.empty():
+            logger.error(f"{pending.qsize()} tweets were not visited because no media browser could start.")
+
+    def get_image_links_by_tweet(self):
+        """Get image links for each tweet URL"""
+        if not self.visited:
+            self.extract()
+        return self.image_links_by_tweet
 
     def get_video_links_by_tweet(self):
         """Get video links for each tweet URL"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_argument("--no-sandbox")
-
-        try:
-            logger.info("Setting up Chrome driver for media extraction (videos)...")
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            for i, url in enumerate(self.urls, 1):
-                logger.info(f"Checking for videos in tweet {i}/{len(self.urls)}: {url}")
-                self.video_links_by_tweet[url] = self.get_videos_from_tweet(driver, url)
-            driver.quit()
-            return self.video_links_by_tweet
-        except Exception as e:
-            logger.error(f"Error setting up Chrome driver for video extraction: {e}", exc_info=True)
-            return {}
-
-    def get_images_from_tweet(self, driver, tweet_url):
-        """Extract image links from a tweet"""
-        try:
-            driver.get(tweet_url)
-            time.sleep(5)
-            images = driver.find_elements(By.CSS_SELECTOR, "img[src*='pbs.twimg.com/media']")
-            links = [img.get_attribute('src') for img in images]
-            if links:
-                logger.info(f"Found {len(links)} images in tweet.")
-            else:
-                logger.info("No images found in tweet.")
-            return links
-        except Exception as e:
-            logger.error(f"Error fetching images from {tweet_url}: {e}", exc_info=True)
-            return []
-
-    def get_videos_from_tweet(self, driver, tweet_url):
-        """Extract video links from a tweet"""
+        if not self.visited:
+            self.extract()
+        return self.video_links_by_tweet
+
+    def get_media_from_tweet(self, driver, tweet_url, timeout=10, settle=1.5):
+        """
+        Load a tweet once and return (image_links, video_links). Polls instead
+        of sleeping a fixed 5 seconds: once the tweet renders, it returns when
+        the media found has not changed for `settle` seconds, so later images
+        of a multi-image tweet are not missed. Never waits past `timeout`.
+        """
         try:
             driver.get(tweet_url)
-            time.sleep(5)
-            videos = driver.find_elements(By.CSS_SELECTOR, "video")
-            video_links = []
-            if videos:
-                logger.info(f"Found {len(videos)} video elements in tweet.")
-                video_links = [tweet_url]
+            started = time.time()
+            found = None
+            stable_since = None
+            media = {}
+            while time.time() - started < timeout:
+                media = driver.execute_script(MEDIA_PROBE_SCRIPT) or {}
+                if media.get("ready"):
+                    current = (len(media.get("images") or []), bool(media.get("video")))
+                    if current != found:
+                        found, stable_since = current, time.time()
+                    elif time.time() - stable_since >= settle:
+                        break
+                time.sleep(0.25)
+
+            image_links = media.get("images") or []
+            video_links = [tweet_url] if media.get("video") else []
+            if image_links or video_links:
+                logger.info(f"Found {len(image_links)} images and {'a' if video_links else 'no'} video in tweet.")
             else:
-                video_players = driver.find_elements(By.CSS_SELECTOR, "div[data-testid='videoPlayer']")
-                if video_players:
-                    logger.info(f"Found {len(video_players)} video players in tweet.")
-                    video_links = [tweet_url]
-                else:
-                    logger.info("No videos found in tweet.")
-            return video_links
+                logger.info("No media found in tweet.")
+            return image_links, video_links
         except Exception as e:
-            logger.error(f"Error fetching videos from {tweet_url}: {e}", exc_info=True)
-            return []
+            logger.error(f"Error fetching media from {tweet_url}: {e}", exc_info=True)
+            return [], []
 
 class MediaDownloader:
-    def __init__(self, urls):
+    def __init__(self, urls, manifest=None, proxy_pool=None, show_progress=True):
         self.urls = urls
+        self.manifest = manifest
+        self.proxy_pool = proxy_pool
+        self.show_progress = show_progress
 
     def sanitize_filename(self, filename):
         return re.sub(r'[<>:"/\\|?*]', '', filename)
@@ -233,35 +324,44 @@ class MediaDownloader:
             logger.info(f"Created '{folder_path}' directory")
 
         logger.info(f"Downloading {len(self.urls)} media files for tweet {'ID: ' + tweet_id if tweet_id else ''}...")
-        for i, link in enumerate(self.urls, 1):
-            try:
-                logger.info(f"Downloading file {i}/{len(self.urls)}")
-                r = requests.get(link, allow_redirects=True, stream=True)
-                if r.status_code != 200:
-                    logger.error(f"Failed to download {link} - Status code: {r.status_code}")
-                    continue
-                base_filename = link.split("/")[-1].split('?')[0]
-                if tweet_id:
-                    filename_parts = os.path.splitext(base_filename)
-                    sanitized_filename = f"{self.sanitize_filename(filename_parts[0])}_tweet{tweet_id}{filename_parts[1]}"
-                else:
-                    sanitized_filename = self.sanitize_filename(base_filename)
-                file_path = os.path.join(folder_path, sanitized_filename)
-                if not os.path.splitext(file_path)[1]:
-                    file_path += ".jpg"
-
-                total_size = int(r.headers.get('content-length', 0))
-                block_size = 1024  # 1KB
-
-                with open(file_path, 'wb') as f, \
-                     logger.progress_bar(total=total_size if total_size > 0 else None, 
-                                           description=f"Downloading {sanitized_filename[:25]}") as progress:
-                    for data in r.iter_content(block_size):
-                        f.write(data)
-                        progress.update(advance=len(data))
+        with http_session(self.proxy_pool) as session:
+            for i, link in enumerate(self.urls, 1):
+                try:
+                    logger.info(f"Downloading file {i}/{len(self.urls)}")
+                    r = session.get(link, allow_redirects=True, stream=True)
+                    if r.status_code != 200:
+                        logger.error(f"Failed to download {link} - Status code: {r.status_code}")
+                        DOWNLOADS.inc(type="image", status="failed")
+                        continue
+                    base_filename = link.split("/")[-1].split('?')[0]
+                    if tweet_id:
+                        filename_parts = os.path.splitext(base_filename)
+                        sanitized_filename = f"{self.sanitize_filename(filename_parts[0])}_tweet{tweet_id}{filename_parts[1]}"
+                    else:
+                        sanitized_filename = self.sanitize_filename(base_filename)
+                    file_path = os.path.join(folder_path, sanitized_filename)
+                    if not os.path.splitext(file_path)[1]:
+                        file_path += ".jpg"
+
+                    total_size = int(r.headers.get('content-length', 0))
+                    block_size = 1024  # 1KB
+
+                    with open(file_path, 'wb') as f, \
+                         logger.progress_bar(total=total_size if total_size > 0 else None, 
+                                               description=f"Downloading {sanitized_filename[:25]}",
+                                           disable=not self.show_progress) as progress, \
+                         DOWNLOAD_SECONDS.time(type="image"):
+                        for data in r.iter_content(block_size):
+                            f.write(data)
+                            progress.update(advance=len(data))
+                            DOWNLOAD_BYTES.inc(len(data), type="image")
                         
-                logger.info(f"Downloaded: {file_path}")
-            except Exception as e:
-                logger.error(f"Error downloading {link}: {e}", exc_info=True)
+                    DOWNLOADS.inc(type="image", status="ok")
+                    logger.info(f"Downloaded: {file_path}")
+                    if self.manifest is not None:
+                        self.manifest.add(tweet_id, file_path, user=folder)
+                except Exception as e:
+                    DOWNLOADS.inc(type="image", status="failed")
+                    logger.error(f"Error downloading {link}: {e}", exc_info=True)
 
         logger.info("Download complete.")
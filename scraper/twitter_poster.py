@@ -1,7 +1,7 @@
-import time
 import os
-import glob
-from rich.panel import Panel
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -9,26 +9,64 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 from selenium.webdriver.common.keys import Keys
 from logger import Logger
+from flight_recorder import FlightRecorder
+from media_manifest import MediaManifest
+from post_queue import PostQueue, TokenBucket
+from post_ledger import PostLedger
+from metrics import registry as metrics
+from driver_profiler import profiler
+from selector_registry import shared_registry
 from selenium.webdriver.chrome.options import Options
 
 chrome_options = Options()
 chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
 chrome_options.add_argument("--log-level=1")
 
+TWITTER_HOME_URL = "https://twitter.com/home"
+TWITTER_COMPOSE_URL = "https://twitter.com/compose/post"
+
+TEXT_ENTRY_MODES = ("insert", "paste", "keys")
+# The browser runs on this machine, so its select-all shortcut follows our platform
+SELECT_ALL_KEY = Keys.COMMAND if sys.platform == "darwin" else Keys.CONTROL
+
+POSTS = metrics.counter("poster_posts_total", "Post attempts, by status")
+POST_SECONDS = metrics.histogram("poster_post_seconds", "Time from opening the composer to a confirmed post")
+UPLOAD_SECONDS = metrics.histogram("poster_upload_wait_seconds", "Time from attaching a media file to its upload finishing, by type")
+UPLOAD_BYTES = metrics.counter("poster_upload_bytes_total", "Bytes of media attached to posts, by type")
+
+# Inserts the whole string in one input event so the composer's editor state
+# updates exactly as it would for a real paste/IME commit.
+INSERT_TEXT_SCRIPT = """
+const el = arguments[0], text = arguments[1], mode = arguments[2];
+el.focus();
+if (mode === 'paste') {
+    const data = new DataTransfer();
+    data.setData('text/plain', text);
+    el.dispatchEvent(new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true}));
+} else {
+    document.execCommand('insertText', false, text);
+}
+return el.innerText;
+"""
+
 class Twitter_Poster:
-    def __init__(self, driver=None, username=None, password=None, mail=None):
+    def __init__(self, driver=None, username=None, password=None, mail=None, fast_post=False, text_entry="insert", selectors=None):
         self.driver = driver
         self.username = username
         self.password = password
         self.mail = mail
         self.logged_in = False
+        self.fast_post = fast_post
+        self.text_entry = text_entry if text_entry in TEXT_ENTRY_MODES else "insert"
         self.logger = Logger("TwitterPoster", "twitter_poster.log")
+        self.recorder = FlightRecorder(logger=self.logger)
+        self.selectors = selectors or shared_registry()
 
     def login(self):
         """Log in to Twitter"""
         if self.driver is None:
             self.logger.info("No driver provided. Using the default Chrome driver.")
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = profiler.instrument(webdriver.Chrome(options=chrome_options))
 
         try:
             # Open Twitter login page
@@ -93,292 +131,459 @@ class Twitter_Poster:
             self.logger.error("Not logged in. Please log in first.")
             return False
 
+        started_at = time.time()
+        success = self._post_tweet(text, media_paths, extra_media_wait)
+        POSTS.inc(status="ok" if success else "failed")
+        POST_SECONDS.observe(time.time() - started_at)
+        return success
+
+    def _post_tweet(self, text, media_paths, extra_media_wait):
         try:
-            self.logger.info("Navigating to Twitter home page.")
-            self.driver.get("https://twitter.com/home")
-            time.sleep(3)
+            self.recorder.mark()
+            if self.fast_post:
+                tweet_input = self._open_composer_fast()
+            else:
+                tweet_input = self._open_composer()
+            self.recorder.record(self.driver, "composer_ready", capture_dom=False)
+
+            # Enter tweet text
+            self._enter_text(tweet_input, text)
+            self.logger.info(f"Entered tweet text: {text[:30]}...")
+            self.recorder.record(self.driver, "text_entered", capture_dom=False, chars=len(text))
+            if not self.fast_post:
+                time.sleep(1)
 
-            debug_dir = "./debug_screenshots"
-            if not os.path.exists(debug_dir):
-                os.makedirs(debug_dir)
-                self.logger.info(f"Created debug directory: {debug_dir}")
+            return self._attach_media_and_submit(media_paths, extra_media_wait, tweet_input)
 
-            # Try clicking the compose tweet button if available
+        except Exception as e:
+            self.logger.error(f"❌ Failed to post tweet")
+            self.recorder.dump(self.driver, "post_failed")
+            return False
+
+    def _enter_text(self, tweet_input, text):
+        """
+        Insert the tweet text in one step and confirm the composer holds it,
+        falling back to typing it key by key.
+        """
+        if self.text_entry != "keys":
             try:
-                compose_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "a[data-testid='SideNav_NewTweet_Button']"))
-                )
+                composer_text = self.driver.execute_script(INSERT_TEXT_SCRIPT, tweet_input, text, self.text_entry)
+                if " ".join((composer_text or "").split()) == " ".join(text.split()):
+                    return
+                self.logger.warning(f"Composer text didn't match after '{self.text_entry}' insertion, falling back to send_keys.")
+            except Exception as e:
+                self.logger.warning(f"Bulk text insertion failed ({e}), falling back to send_keys.")
+            # The insertion may have left part of the text behind either way
+            self._clear_text(tweet_input)
+
+        tweet_input.send_keys(text)
+
+    def _probe_now(self, name, clickable=False):
+        """Return the best element of a selector chain without waiting, or None"""
+        found, _ = self.selectors.probe(self.driver, name, clickable)
+        return found[1] if found else None
+
+    def _open_composer_fast(self):
+        """
+        Reuse the composer already on screen, open it from the side nav, or as a
+        last resort navigate to the lightweight compose route.
+        """
+        tweet_input = self._probe_now("tweet_input")
+
+        if tweet_input is None:
+            compose_button = self._probe_now("compose_button", clickable=True)
+            if compose_button is not None:
                 compose_button.click()
-                self.logger.info("Found and clicked the compose button.")
-            except (TimeoutException, NoSuchElementException):
                 try:
-                    compose_area = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "//div[@role='textbox' and @aria-label]"))
-                    )
-                    compose_area.click()
-                    self.logger.info("Clicked on the compose area directly.")
-                except (TimeoutException, NoSuchElementException):
-                    self.logger.error("Could not find compose button. UI might have changed or you're already on the compose page.")
+                    tweet_input = self.selectors.find(self.driver, "tweet_input", timeout=3, clickable=True)
+                except TimeoutException:
+                    tweet_input = None
 
-            time.sleep(2)
+        if tweet_input is None:
+            self.logger.info("Compose UI not found, navigating to the compose route.")
+            self.driver.get(TWITTER_COMPOSE_URL)
+            tweet_input = self.selectors.find(self.driver, "tweet_input", timeout=10, clickable=True)
+
+        self._reset_composer(tweet_input)
+        return tweet_input
 
-            # Locate the tweet input area
+    def _reset_composer(self, tweet_input):
+        """Clear leftover text and attachments from a reused composer"""
+        for remove_button in self.driver.find_elements(By.CSS_SELECTOR, "button[aria-label='Remove media']"):
             try:
-                tweet_input = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "div[data-testid='tweetTextarea_0']"))
-                )
-                tweet_input.click()
-                self.logger.info("Found tweet input area.")
-            except (TimeoutException, NoSuchElementException):
-                try:
-                    tweet_input = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "//div[@role='textbox' and @contenteditable='true']"))
-                    )
-                    tweet_input.click()
-                    self.logger.info("Found tweet input with alternative selector.")
-                except (TimeoutException, NoSuchElementException):
-                    self.logger.error("Could not find tweet input field.")
-                    self.driver.save_screenshot(f"{debug_dir}/no_tweet_input_{time.time()}.png")
-                    raise Exception("Could not find tweet input field")
+                remove_button.click()
+            except Exception:
+                pass
 
-            time.sleep(1)
+        tweet_input.click()
+        if tweet_input.text.strip():
+            self._clear_text(tweet_input)
 
-            # Enter tweet text
-            tweet_input.send_keys(text)
-            self.logger.info(f"Entered tweet text: {text[:30]}...")
-            time.sleep(1)
-
-            has_video = False
-            has_media = False
-
-            # Upload media if provided
-            if media_paths and len(media_paths) > 0:
-                valid_media_paths = []
-                for media_path in media_paths:
-                    if os.path.exists(media_path):
-                        valid_media_paths.append(media_path)
-                        if media_path.lower().endswith(('.mp4', '.mov', '.avi', '.webm')):
-                            has_video = True
-                    else:
-                        self.logger.warning(f"Media file does not exist: {media_path}")
-
-                for media_path in valid_media_paths[:4]:
+    def _clear_text(self, tweet_input):
+        tweet_input.send_keys(SELECT_ALL_KEY, "a")
+        tweet_input.send_keys(Keys.DELETE)
+
+    def _open_composer(self):
+        """Load the home page and locate the tweet input through the fallback chain"""
+        self.logger.info("Navigating to Twitter home page.")
+        self.driver.get(TWITTER_HOME_URL)
+        time.sleep(3)
+
+        # Click the compose button, or the compose area directly, whichever the chain finds first
+        try:
+            compose_button = self.selectors.find(self.driver, "compose_button", timeout=10, clickable=True)
+            compose_button.click()
+            self.logger.info("Found and clicked the compose button.")
+        except (TimeoutException, NoSuchElementException):
+            self.logger.error("Could not find compose button. UI might have changed or you're already on the compose page.")
+
+        time.sleep(2)
+
+        # Locate the tweet input area
+        try:
+            tweet_input = self.selectors.find(self.driver, "tweet_input", timeout=10, clickable=True)
+            tweet_input.click()
+            self.logger.info("Found tweet input area.")
+        except (TimeoutException, NoSuchElementException):
+            self.logger.error("Could not find tweet input field.")
+            self.recorder.dump(self.driver, "no_tweet_input")
+            raise Exception("Could not find tweet input field")
+
+        time.sleep(1)
+        return tweet_input
+
+    def _attach_media_and_submit(self, media_paths, extra_media_wait, tweet_input):
+        """Attach media, wait for uploads and click the Tweet/Post button"""
+        has_video = False
+        has_media = False
+
+        # Upload media if provided
+        if media_paths and len(media_paths) > 0:
+            valid_media_paths = []
+            for media_path in media_paths:
+                if os.path.exists(media_path):
+                    valid_media_paths.append(media_path)
+                    if media_path.lower().endswith(('.mp4', '.mov', '.avi', '.webm')):
+                        has_video = True
+                else:
+                    self.logger.warning(f"Media file does not exist: {media_path}")
+
+            for media_path in valid_media_paths[:4]:
+                try:
+                    media_button = WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "input[data-testid='fileInput']"))
+                    )
+                    absolute_path = os.path.abspath(media_path)
+                    media_type = "video" if media_path.lower().endswith(('.mp4', '.mov', '.avi', '.webm')) else "image"
+                    attached_at = time.perf_counter()
+                    media_button.send_keys(absolute_path)
+                    UPLOAD_BYTES.inc(os.path.getsize(media_path), type=media_type)
+                    self.logger.info(f"Attached media: {media_path}")
+                    self.recorder.record(self.driver, "media_attached", capture_dom=False, path=media_path)
+                    has_media = True
+                    if not self.fast_post:
+                        time.sleep(2)
                     try:
-                        media_button = WebDriverWait(self.driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "input[data-testid='fileInput']"))
+                        upload_progress = WebDriverWait(self.driver, 5).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='progressBar']"))
                         )
-                        absolute_path = os.path.abspath(media_path)
-                        media_button.send_keys(absolute_path)
-                        self.logger.info(f"Attached media: {media_path}")
-                        has_media = True
-                        time.sleep(2)
+                        self.logger.info(f"Upload in progress for: {media_path}")
+                        WebDriverWait(self.driver, 60 if has_video else 30).until_not(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='progressBar']"))
+                        )
+                        self.logger.info(f"Media upload completed for: {media_path}")
+                        UPLOAD_SECONDS.observe(time.perf_counter() - attached_at, type=media_type)
+                    except (TimeoutException, NoSuchElementException):
                         try:
-                            upload_progress = WebDriverWait(self.driver, 5).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='progressBar']"))
-                            )
-                            self.logger.info(f"Upload in progress for: {media_path}")
-                            WebDriverWait(self.driver, 60 if has_video else 30).until_not(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='progressBar']"))
+                            WebDriverWait(self.driver, 10).until(
+                                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='attachments']"))
                             )
-                            self.logger.info(f"Media upload completed for: {media_path}")
+                            self.logger.info(f"Media attachment confirmed for: {media_path}")
                         except (TimeoutException, NoSuchElementException):
-                            try:
-                                WebDriverWait(self.driver, 10).until(
-                                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='attachments']"))
-                                )
-                                self.logger.info(f"Media attachment confirmed for: {media_path}")
-                            except (TimeoutException, NoSuchElementException):
-                                self.logger.warning(f"Couldn't confirm media attachment for: {media_path}")
-                    except Exception as e:
-                        self.logger.error(f"Failed to attach media {media_path}: {e}", exc_info=True)
-                        self.driver.save_screenshot(f"{debug_dir}/media_upload_failed_{time.time()}.png")
-            else:
-                self.logger.info("No media files to attach.")
-
-            if has_video:
-                extra_wait = extra_media_wait
-                self.logger.info(f"Detected video upload - waiting extra {extra_wait} seconds for processing...")
-                time.sleep(extra_wait)
-                try:
-                    processing_indicator = self.driver.find_element(By.XPATH, 
-                        "//*[contains(text(), 'Processing') or contains(text(), 'Uploading')]")
-                    if processing_indicator:
-                        self.logger.info("Video still processing, waiting up to 60 more seconds...")
-                        end_time = time.time() + 60
-                        while time.time() < end_time:
-                            try:
-                                processing = self.driver.find_element(By.XPATH, 
-                                    "//*[contains(text(), 'Processing') or contains(text(), 'Uploading')]")
-                                self.logger.info("Still processing, waiting...")
-                                time.sleep(5)
-                            except NoSuchElementException:
-                                self.logger.info("Processing complete!")
-                                break
-                except NoSuchElementException:
-                    self.logger.info("No processing indicator found, proceeding.")
-
-            self.driver.save_screenshot(f"{debug_dir}/before_post_button_{time.time()}.png")
-            
-            # Retry mechanism for clicking the Tweet/Post button
-            tweet_button_enabled = False
-            max_attempts = 10
-            attempts = 0
-            
-            while not tweet_button_enabled and attempts < max_attempts:
-                try:
-                    tweet_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, 
-                            "//*[contains(@data-testid, 'tweetButton') and not(@aria-disabled='true')]"))
-                    )
-                    # Scroll element into view
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", tweet_button)
-                    # Try clicking using JavaScript
-                    self.driver.execute_script("arguments[0].click();", tweet_button)
-                    tweet_button_enabled = True
-                    self.logger.info("Tweet button is enabled and clicked!")
-                except ElementClickInterceptedException as e:
-                    attempts += 1
-                    self.logger.info(f"Tweet button click intercepted, retrying... (attempt {attempts}/{max_attempts})")
-                    time.sleep(2)
-                except (TimeoutException, NoSuchElementException):
-                    attempts += 1
-                    self.logger.info(f"Tweet button not enabled yet, waiting... (attempt {attempts}/{max_attempts})")
-                    time.sleep(3)
-            
-            if not tweet_button_enabled and has_media:
-                self.logger.warning("Tweet button may not be enabled but proceeding anyway...")
+                            self.logger.warning(f"Couldn't confirm media attachment for: {media_path}")
+                except Exception as e:
+                    self.logger.error(f"Failed to attach media {media_path}: {e}", exc_info=True)
+                    self.recorder.dump(self.driver, "media_upload_failed")
+        else:
+            self.logger.info("No media files to attach.")
 
-            # Fallback method if the retry loop did not click the button
+        if has_video:
+            extra_wait = extra_media_wait
+            self.logger.info(f"Detected video upload - waiting extra {extra_wait} seconds for processing...")
+            time.sleep(extra_wait)
             try:
-                self.logger.info("Attempting to locate the Tweet/Post button with a combined XPath selector...")
-                tweet_button = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, "//*[contains(@data-testid, 'tweetButton') and (contains(., 'Tweet') or contains(., 'Post'))]"))
-                )                
-                self.driver.execute_script("arguments[0].click();", tweet_button)
-                self.logger.info("Found the Tweet/Post button using combined XPath!")
+                processing_indicator = self.driver.find_element(By.XPATH, 
+                    "//*[contains(text(), 'Processing') or contains(text(), 'Uploading')]")
+                if processing_indicator:
+                    self.logger.info("Video still processing, waiting up to 60 more seconds...")
+                    end_time = time.time() + 60
+                    while time.time() < end_time:
+                        try:
+                            processing = self.driver.find_element(By.XPATH, 
+                                "//*[contains(text(), 'Processing') or contains(text(), 'Uploading')]")
+                            self.logger.info("Still processing, waiting...")
+                            time.sleep(5)
+                        except NoSuchElementException:
+                            self.logger.info("Processing complete!")
+                            break
+            except NoSuchElementException:
+                self.logger.info("No processing indicator found, proceeding.")
+
+        self.recorder.record(self.driver, "before_post_button", has_media=has_media, has_video=has_video)
+        
+        # Retry mechanism for clicking the Tweet/Post button
+        tweet_button_enabled = False
+        max_attempts = 10
+        attempts = 0
+        
+        while not tweet_button_enabled and attempts < max_attempts:
+            try:
+                tweet_button = self.selectors.find(self.driver, "tweet_button", timeout=5, clickable=True)
+                # Scroll element into view
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", tweet_button)
+                # Try clicking using JavaScript
                 self.driver.execute_script("arguments[0].click();", tweet_button)
-                self.logger.info("Clicked the button using JavaScript.")
-                time.sleep(5)
-                self.logger.success("Tweet posted successfully!")
-                return True
-            except Exception as e:
-                self.logger.warning(f"Combined XPath selector fallback failed: {e}", exc_info = True)
-                
-            self.logger.error("❌ Failed to find and click the Tweet button")
-            self.driver.save_screenshot(f"{debug_dir}/tweet_button_not_found_{time.time()}.png")
-            return False
+                tweet_button_enabled = True
+                self.logger.info("Tweet button is enabled and clicked!")
+            except ElementClickInterceptedException as e:
+                attempts += 1
+                self.logger.info(f"Tweet button click intercepted, retrying... (attempt {attempts}/{max_attempts})")
+                time.sleep(2)
+            except (TimeoutException, NoSuchElementException):
+                attempts += 1
+                self.logger.info(f"Tweet button not enabled yet, waiting... (attempt {attempts}/{max_attempts})")
+                time.sleep(3)
+        
+        if tweet_button_enabled and self.fast_post:
+            return self._wait_for_post_confirmation(tweet_input)
 
+        if not tweet_button_enabled and has_media:
+            self.logger.warning("Tweet button may not be enabled but proceeding anyway...")
+
+        # Fallback method if the retry loop did not click the button
+        try:
+            self.logger.info("Attempting to locate the Tweet/Post button without waiting for it to be enabled...")
+            tweet_button = self.selectors.find(self.driver, "tweet_button", timeout=10)
+            self.driver.execute_script("arguments[0].click();", tweet_button)
+            self.logger.info("Found the Tweet/Post button!")
+            self.driver.execute_script("arguments[0].click();", tweet_button)
+            self.logger.info("Clicked the button using JavaScript.")
+            time.sleep(5)
+            self.logger.success("Tweet posted successfully!")
+            return True
         except Exception as e:
-            self.logger.error(f"❌ Failed to post tweet")
-            debug_dir = "./debug_screenshots"
-            if not os.path.exists(debug_dir):
-                os.makedirs(debug_dir)
-            self.driver.save_screenshot(f"{debug_dir}/post_failed_{time.time()}.png")
+            self.logger.warning(f"Tweet/Post button fallback failed: {e}", exc_info = True)
+            
+        self.logger.error("❌ Failed to find and click the Tweet button")
+        self.recorder.dump(self.driver, "tweet_button_not_found")
+        return False
+
+    def _wait_for_post_confirmation(self, tweet_input, timeout=10):
+        """Wait for the composer to close or the "post sent" toast instead of a fixed sleep"""
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.any_of(
+                    EC.staleness_of(tweet_input),
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='toast']")),
+                )
+            )
+            self.logger.success("Tweet posted successfully!")
+            return True
+        except TimeoutException:
+            self.logger.error("❌ Tweet button was clicked but the post was not confirmed")
+            self.recorder.dump(self.driver, "post_not_confirmed")
             return False
 
 
-def post_tweets_with_selenium(poster, tweets_data, delay_between_tweets=60, keep_media=False, extra_media_wait=10):
+def prepare_post(tweet, i, manifest, rephrase, logger, media_prep=None):
+    """
+    Rephrase a queued tweet and look up its media.
+
+    Returns a dict with the text to post, the media files and whether any of
+    them is a video, or None if the tweet has no text. With `media_prep`,
+    images are recompressed before they are returned.
+    """
+    tweet_text = tweet.get('text', '')
+    if not tweet_text:
+        logger.warning(f"Skipping tweet {i}: Empty text")
+        return None
+
+    logger.panel(
+        f"Original Tweet {i}: {tweet_text}",
+        title=f"[bold cyan]Original Tweet {i}[/bold cyan]",
+        style="cyan"
+    )
+
+    if tweet.get('rephrased'):
+        rephrased_text = tweet['rephrased']
+    elif rephrase is not None:
+        try:
+            rephrased_text = rephrase(tweet_text)
+            if rephrased_text:
+                logger.panel(
+                    f"Rephrased Tweet {i}: {rephrased_text}",
+                    title=f"[bold green]Rephrased Tweet {i}[/bold green]",
+                    style="green"
+                )
+            else:
+                logger.warning(f"Could not rephrase tweet {i}. Using original text instead.")
+                rephrased_text = tweet_text
+        except Exception as e:
+            logger.error(f"Error rephrasing tweet {i}: {e}. Using original text instead.", exc_info=True)
+            rephrased_text = tweet_text
+    else:
+        rephrased_text = tweet_text
+        logger.info(f"Using original text for tweet {i} (rephrasing not available)")
+
+    media_files = []
+    has_video = False
+
+    tweet_id = tweet.get('tweet_id')
+    if tweet_id:
+        media_entries = manifest.lookup(tweet_id)[:4]
+        if media_entries:
+            media_files = [entry['path'] for entry in media_entries]
+            has_video = any(entry['type'] == 'video' for entry in media_entries)
+            logger.info(f"Found {len(media_files)} media files for tweet {tweet_id}")
+            for file in media_files:
+                logger.info(f"  - {os.path.basename(file)}")
+        else:
+            logger.info(f"No media files found for tweet {tweet_id}")
+
+    prepared = {
+        "text": rephrased_text,
+        "media_files": media_files,
+        "has_video": has_video,
+        "tweet_id": tweet_id,
+    }
+    if media_prep is not None:
+        media_prep.optimize(prepared, manifest)
+    return prepared
+
+
+def cleanup_media(prepared, manifest, logger):
+    """Delete a posted tweet's media files and record the removal in the manifest"""
+    for file_path in prepared["media_files"]:
+        if os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+                manifest.remove(prepared["tweet_id"], file_path)
+                logger.info(f"Deleted media file: {file_path}")
+            except Exception as e:
+                logger.error(f"Failed to delete media file {file_path}: {e}", exc_info=True)
+
+
+def post_tweets_with_selenium(
+    poster,
+    tweets_data,
+    delay_between_tweets=60,
+    keep_media=False,
+    extra_media_wait=10,
+    manifest=None,
+    queue=None,
+    burst=1,
+    jitter=0.1,
+    ledger=None,
+    media_prep=None,
+):
     """
     Post rephrased tweets using Selenium browser automation.
 
+    Tweets are appended to a durable post queue and drained with token-bucket
+    pacing; the next item is rephrased and its media looked up while waiting
+    for the current one's slot.
+
     Args:
         poster: The Twitter_Poster instance.
         tweets_data: List of tweet data dictionaries.
-        delay_between_tweets: Seconds to wait between tweets.
+        delay_between_tweets: Sustained seconds between posts.
         keep_media: Whether to keep media files after posting.
         extra_media_wait: Additional seconds to wait for media uploads.
+        manifest: MediaManifest used to look up downloaded media by tweet ID.
+        queue: PostQueue to drain (defaults to the on-disk queue).
+        burst: Number of posts allowed back to back.
+        jitter: Random extra wait, as a fraction of delay_between_tweets.
+        ledger: PostLedger recording outcomes so reruns skip posted tweets.
+        media_prep: Optional MediaPrep that recompresses images ahead of posting.
     """
     logger = Logger("PostTweets", "post_tweets.log")
+    manifest = manifest or MediaManifest()
+    queue = queue or PostQueue()
+    ledger = ledger or PostLedger()
     try:
-        from twitter_rephraser import rephrase_text_with_ollama
-        rephrase_function_available = True
+        from twitter_rephraser import rephrase_text_with_ollama as rephrase
         logger.info("Rephrase function found. Tweets will be rephrased.")
     except ImportError:
         logger.warning("Rephrase function not available. Using original text.")
-        rephrase_function_available = False
-    
-    for i, tweet in enumerate(tweets_data, 1):
-        tweet_text = tweet.get('text', '')
-        if not tweet_text:
-            logger.warning(f"Skipping tweet {i}: Empty text")
-            continue
-            
-        panel_original = Panel(
-            f"Original Tweet {i}: {tweet_text}",
-            title=f"[bold cyan]Original Tweet {i}[/bold cyan]",
-            style="cyan"
-        )
-        logger.console.print(panel_original)
-
-        if rephrase_function_available:
-            try:
-                rephrased_text = rephrase_text_with_ollama(tweet_text)
-                panel_rephrased = Panel(
-                    f"Rephrased Tweet {i}: {rephrased_text}",
-                    title=f"[bold green]Rephrased Tweet {i}[/bold green]",
-                    style="green"
-                )
-                logger.console.print(panel_rephrased)
-            except Exception as e:
-                logger.error(f"Error rephrasing tweet {i}: {e}. Using original text instead.", exc_info=True)
-                rephrased_text = tweet_text
+        rephrase = None
+
+    added = queue.enqueue(tweets_data)
+    pending = queue.pending()
+    if len(pending) > added:
+        logger.info(f"Resuming {len(pending) - added} queued tweets from a previous run.")
+
+    # Settle already-handled tweets before anything is rephrased or prepared for them
+    unposted = []
+    for item in pending:
+        skip_reason = ledger.skip_reason(item["tweet"])
+        if skip_reason:
+            logger.info(f"Skipping {item['tweet'].get('tweet_link') or item['id']}: {skip_reason}")
+            queue.mark(item, "skipped")
         else:
-            rephrased_text = tweet_text
-            logger.info(f"Using original text for tweet {i} (rephrasing not available)")
-
-        media_files = []
-        has_video = False
-        
-        if 'user' in tweet and tweet['user'] and 'tweet_id' in tweet and tweet['tweet_id']:
-            username = tweet['user']
-            tweet_id = tweet['tweet_id']
-            media_dir = f"./images/{username}"
-            if os.path.exists(media_dir):
-                logger.info(f"Looking for media files for tweet ID {tweet_id} from {username}")
-                tweet_specific_media = []
-                for ext in ['*.jpg', '*.jpeg', '*.png', '*.mp4', '*.gif']:
-                    tweet_specific_media.extend(glob.glob(os.path.join(media_dir, f"*_tweet{tweet_id}*{ext}")))
-                    if ext == '*.mp4':
-                        video_files = glob.glob(os.path.join(media_dir, f"*_tweet{tweet_id}*{ext}"))
-                        if video_files:
-                            has_video = True
-                            logger.info(f"Detected video file(s) for tweet {tweet_id}")
-                videos_dir = os.path.join(media_dir, "videos")
-                if os.path.exists(videos_dir):
-                    for ext in ['*.mp4', '*.mov', '*.avi', '*.webm']:
-                        video_files = glob.glob(os.path.join(videos_dir, f"*_tweet{tweet_id}*{ext}"))
-                        tweet_specific_media.extend(video_files)
-                        if video_files:
-                            has_video = True
-                            logger.info(f"Detected video file(s) in videos directory for tweet {tweet_id}")
-                if tweet_specific_media:
-                    logger.info(f"Found {len(tweet_specific_media)} media files for tweet {tweet_id}")
-                    for file in tweet_specific_media[:4]:
-                        logger.info(f"  - {os.path.basename(file)}")
-                    media_files = tweet_specific_media[:4]
-                else:
-                    logger.info(f"No media files found for tweet {tweet_id}")
-            else:
-                logger.info(f"No media directory found for user {username}")
+            unposted.append(item)
+    if len(unposted) < len(pending):
+        logger.info(f"Ledger skipped {len(pending) - len(unposted)} already-handled tweets.")
+    pending = unposted
+
+    bucket = TokenBucket(
+        rate=1 / max(delay_between_tweets, 0.001),
+        burst=burst,
+        jitter=jitter,
+        post_times=queue.post_times,
+    )
+
+    counts = {"posted": 0, "failed": 0, "skipped": 0}
+    # Periodic one-line summaries; in batch mode these replace the per-tweet panels
+    with ThreadPoolExecutor(max_workers=1) as executor, logger.progress_summary(total=len(pending), description="Posting") as progress:
+        def advance(outcome):
+            counts[outcome] += 1
+            progress.set_description(f"Posting ({counts['posted']} posted, {counts['failed']} failed, {counts['skipped']} skipped)")
+            progress.update()
+
+        next_prepared = executor.submit(prepare_post, pending[0]["tweet"], 1, manifest, rephrase, logger, media_prep) if pending else None
+
+        for i, item in enumerate(pending, 1):
+            prepared = next_prepared.result()
+            # Prepare the following tweet while waiting for this one's slot
+            if i < len(pending):
+                next_prepared = executor.submit(prepare_post, pending[i]["tweet"], i + 1, manifest, rephrase, logger, media_prep)
+
+            if prepared is None:
+                queue.mark(item, "skipped")
+                advance("skipped")
+                continue
+
+            depth = len(pending) - i + 1
+            wait = bucket.wait_time()
+            logger.info(
+                f"Queue depth: {depth} | next post in {wait:.0f}s | "
+                f"projected drain: {bucket.projected_drain(depth) + wait:.0f}s"
+            )
+            if wait > 0:
+                time.sleep(wait)
 
-        wait_time = extra_media_wait if has_video else 0
-        
-        success = poster.post_tweet(rephrased_text, media_files, extra_media_wait=wait_time)
+            wait_time = extra_media_wait if prepared["has_video"] else 0
+            success = poster.post_tweet(prepared["text"], prepared["media_files"], extra_media_wait=wait_time)
 
-        if success:
-            logger.info(f"Tweet {i} posted successfully!")
-        else:
-            logger.error(f"Failed to post tweet {i}.")
+            bucket.consume()
+            ledger.record(item["tweet"], success)
+            if success:
+                queue.mark(item, "posted")
+                logger.info(f"Tweet {i} posted successfully!")
+            else:
+                queue.mark(item, "failed")
+                logger.error(f"Failed to post tweet {i}.")
+            advance("posted" if success else "failed")
 
-        if not keep_media and media_files:
-            for file_path in media_files:
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Deleted media file: {file_path}")
-                    except Exception as e:
-                        logger.error(f"Failed to delete media file {file_path}: {e}", exc_info=True)
-
-        if i < len(tweets_data):
-            logger.info(f"Waiting {delay_between_tweets} seconds before posting next tweet...")
-            time.sleep(delay_between_tweets)
+            if not keep_media and prepared["media_files"]:
+                cleanup_media(prepared, manifest, logger)
@@ -4,11 +4,42 @@ import time
 import json
 from urllib.parse import urlparse
 from logger import Logger
+from metrics import registry as metrics
 
 logger = Logger("TwitterRephraser", "twitter_rephraser.log")
+
+REPHRASE_REQUESTS = metrics.counter("rephrase_requests_total", "Rephrase calls to Ollama, by status")
+REPHRASE_SECONDS = metrics.histogram("rephrase_latency_seconds", "Latency of one rephrase call")
+
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")  # Default Ollama API endpoint
+# How long Ollama keeps the model loaded after a request, e.g. "30m" (server default if unset)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE")
+
+# Reused across calls so long runs keep one connection to Ollama open
+session = requests.Session()
+
+
+def warm_up(keep_alive=None):
+    """Load the model into memory ahead of the first rephrase; returns True if Ollama answered"""
+    global OLLAMA_KEEP_ALIVE
+    if keep_alive:
+        OLLAMA_KEEP_ALIVE = keep_alive
+    payload = {"model": "llama3.2"}
+    if OLLAMA_KEEP_ALIVE:
+        payload["keep_alive"] = OLLAMA_KEEP_ALIVE
+    try:
+        response = session.post(OLLAMA_API_URL, json=payload, timeout=120)
+        return response.status_code == 200
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Could not warm up Ollama: {e}")
+        return False
+
 # Rephrase Text using Ollama with llama3.2 locally
-def rephrase_text_with_ollama(text):
-    OLLAMA_API_URL = "http://localhost:11434/api/generate"  # Default Ollama API endpoint
+def rephrase_text_with_ollama(text, timeout=None):
+    """
+    Rephrased text, or None if Ollama could not rephrase it (callers keep
+    the original and retry later). `timeout` bounds the request in seconds.
+    """
     
     # Prepare the prompt for the rephrasing task
     prompt = f"Rephrase the following tweet while keeping its meaning intact. Do not add any extra text, explanations, or headers—just return the rephrased tweet, make sure the rephrased tweet doesn't exceed 270 characters long. Here is the tweet: {text}"
@@ -18,6 +49,8 @@ def rephrase_text_with_ollama(text):
         "prompt": prompt,
         "stream": False  # We want the complete response at once
     }
+    if OLLAMA_KEEP_ALIVE:
+        payload["keep_alive"] = OLLAMA_KEEP_ALIVE
     
     try:
         # Convert payload to JSON string
@@ -25,13 +58,15 @@ def rephrase_text_with_ollama(text):
         
         # Use requests library with explicit JSON content
         headers = {"Content-Type": "application/json"}
-        response = requests.post(OLLAMA_API_URL, data=payload_json, headers=headers)
+        with REPHRASE_SECONDS.time():
+            response = session.post(OLLAMA_API_URL, data=payload_json, headers=headers, timeout=timeout)
         
         # Check for errors in the HTTP response
         if response.status_code != 200:
             logger.error(f"Ollama API returned status code {response.status_code}")
             logger.error(f"Response: {response.text}")
-            return text
+            REPHRASE_REQUESTS.inc(status="http_error")
+            return None
         
         # Parse the JSON response
         try:
@@ -39,18 +74,22 @@ def rephrase_text_with_ollama(text):
             if "response" in result:
                 rephrased_text = result["response"].strip()
                 logger.info("Successfully rephrased text.")
+                REPHRASE_REQUESTS.inc(status="ok")
                 return rephrased_text
             else:
                 logger.error("Unexpected response format from Ollama API.")
                 logger.debug(f"Response: {result}")
-                return text
+                REPHRASE_REQUESTS.inc(status="bad_response")
+                return None
         except json.JSONDecodeError:
             logger.error("Failed to parse JSON response from Ollama API")
             logger.debug(f"Raw response: {response.text}")
-            return text
+            REPHRASE_REQUESTS.inc(status="bad_response")
+            return None
             
     except requests.exceptions.RequestException as e:
         logger.error(f"Error connecting to Ollama: {e}")
+        REPHRASE_REQUESTS.inc(status="connection_error")
         if hasattr(e, 'response') and e.response is not None:
             logger.debug(f"Error details: {e.response.text}")
-        return text  # Return original text if rephrasing fails
+        return None
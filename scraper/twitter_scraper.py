@@ -1,9 +1,8 @@
 import os
 import sys
 import logging
-import pandas as pd
-from datetime import datetime
-from time import sleep
+from time import sleep, time
+from urllib.parse import quote
 
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
@@ -20,23 +19,47 @@ from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.support.ui import WebDriverWait
 
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-
-from logger import Logger
+from logger import Logger, batch_enabled
+from pipeline import LoginError
+from lazy import lazy_import
 from fake_headers import Headers
 from tweet import Tweet
 from scroller import Scroller
+from dedup import NearDuplicateIndex
+from card_archive import CardArchive
+from rate_limit import RateLimitBackoff
+from sync_state import SyncState, sync_target_key
+from proxy_pool import firefox_proxy_preferences
+from tweet_export import tweets_to_columns, write_tweets_csv
+from metrics import registry as metrics
+from driver_profiler import profiler
 
 from selenium.webdriver.chrome.options import Options
 
+# Only needed when Firefox is unavailable and ChromeDriver has to be downloaded
+webdriver_manager_chrome = lazy_import("webdriver_manager.chrome")
+
 TWITTER_LOGIN_URL = "https://twitter.com/i/flow/login"
 
+TWEETS_SCRAPED = metrics.counter("scraper_tweets_total", "Tweets kept after extraction")
+CARDS_PARSED = metrics.counter("scraper_cards_parsed_total", "Tweet cards run through extraction")
+CARDS_SKIPPED = metrics.counter("scraper_cards_skipped_total", "Tweet cards dropped after extraction, by reason")
+CARD_PARSE_SECONDS = metrics.histogram("scraper_card_parse_seconds", "Time to extract one tweet card")
+RATE_LIMIT_WAITS = metrics.counter("scraper_rate_limit_waits_total", "Backoff waits while the timeline was rate limited")
+RATE_LIMIT_SECONDS = metrics.counter("scraper_rate_limit_seconds_total", "Seconds spent in rate-limit stalls")
+SCRAPE_RATE = metrics.gauge("scraper_tweets_per_second", "Tweets kept per second over the last scrape")
+
 # Suppress unwanted debug logs from Selenium and related libraries
 logging.getLogger("selenium").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 
+def search_url(query, latest=True):
+    """Search page URL for a query; `#`, spaces and `:` are escaped so they reach `q`"""
+    url = f"https://twitter.com/search?q={quote(query, safe='')}&src=typed_query"
+    return url + "&f=live" if latest else url
+
+
 class Twitter_Scraper:
     def __init__(
         self,
@@ -51,6 +74,9 @@ class Twitter_Scraper:
         scrape_latest=True,
         scrape_top=False,
         proxy=None,
+        dedup_threshold=None,
+        archive_cards=False,
+        proxy_pool=None,
     ):
         # Initialize our logger instance
         self.logger = Logger("TwitterScraper", "twitter_scraper.log")
@@ -73,9 +99,25 @@ class Twitter_Scraper:
             "poster_details": False,
         }
         self.max_tweets = max_tweets
+        self.dedup_index = None
+        if dedup_threshold is not None:
+            self.dedup_index = NearDuplicateIndex(threshold=dedup_threshold)
+        self.card_archive = CardArchive() if archive_cards else None
+        self.archive_source = None
+        self.backoff = RateLimitBackoff()
+        self.sync_state = None
+        self.show_progress = True
+        # Optional callable(deadline) run while waiting out a rate limit
+        self.idle_work = None
         
         self.router = self.go_to_home
         self.headless = False  # Non-headless mode for manual interaction
+        # A proxy taken from the pool is released, with the session's outcome, in quit()
+        self.proxy_pool = proxy_pool
+        self.proxy_failed = False
+        if proxy is None and proxy_pool is not None:
+            proxy = proxy_pool.acquire()
+        self.proxy = proxy
         self.driver = self._get_driver(proxy)
         self.actions = ActionChains(self.driver)
         self.scroller = Scroller(self.driver)
@@ -143,7 +185,9 @@ class Twitter_Scraper:
         browser_option.add_argument(f"--user-agent={header}")
 
         if proxy is not None:
-            browser_option.add_argument(f"--proxy-server={proxy}")
+            self.logger.info(f"Using proxy {proxy}")
+            for name, value in firefox_proxy_preferences(proxy).items():
+                browser_option.set_preference(name, value)
 
         if self.headless:
             browser_option.add_argument("--headless")
@@ -152,36 +196,78 @@ class Twitter_Scraper:
             self.logger.info("Initializing WebDriver...")
             driver = webdriver.Firefox(options=browser_option)
             self.logger.info("WebDriver setup complete.")
-            return driver
+            return profiler.instrument(driver)
         except WebDriverException:
             try:
                 self.logger.info("Downloading ChromeDriver as fallback...")
-                chromedriver_path = ChromeDriverManager().install()
+                chromedriver_path = webdriver_manager_chrome.ChromeDriverManager().install()
                 chrome_service = ChromeService(executable_path=chromedriver_path)
+                chrome_option = ChromeOptions()
+                for argument in browser_option.arguments:
+                    chrome_option.add_argument(argument)
+                if proxy is not None:
+                    chrome_option.add_argument(f"--proxy-server={proxy}")
                 self.logger.info("Initializing ChromeDriver...")
-                driver = webdriver.Chrome(service=chrome_service, options=browser_option)
+                driver = webdriver.Chrome(service=chrome_service, options=chrome_option)
                 self.logger.info("WebDriver setup complete.")
-                return driver
+                return profiler.instrument(driver)
             except Exception as e:
                 self.logger.error(f"Error setting up WebDriver: {e}")
+                self.record_proxy_failure()
+                self.release_proxy()
                 sys.exit(1)
 
-    def login(self):
+    def record_proxy_failure(self):
+        """Count a browser or navigation failure against this session's proxy"""
+        if self.proxy_pool is not None and self.proxy and not self.proxy_failed:
+            self.proxy_failed = True
+            self.proxy_pool.record(self.proxy, False)
+
+    def release_proxy(self):
+        if self.proxy_pool is not None and self.proxy:
+            if not self.proxy_failed:
+                self.proxy_pool.record(self.proxy, True)
+            self.proxy_pool.release(self.proxy)
+            self.proxy = None
+
+    def quit(self):
+        """Close the browser and hand the proxy back to the pool with the session's outcome"""
+        try:
+            self.driver.quit()
+        except Exception as e:
+            self.logger.debug(f"Error closing the browser: {e}")
+        self.release_proxy()
+
+    def login(self, interactive=None):
+        """
+        Log in, prompting on the terminal unless `interactive` is False (the
+        default in batch mode), in which case failures raise LoginError.
+        """
+        if interactive is None:
+            interactive = not batch_enabled()
         self.logger.info("Logging in to Twitter...")
         try:
             self.driver.maximize_window()
             self.driver.get(TWITTER_LOGIN_URL)
             
-            # Ask user for login method
-            self.logger.info("Options:\n1. Manual login (recommended for troubleshooting)\n2. Automatic login (using provided credentials)")
-            choice = input("Select login method (1 or 2): ")
-
-            if choice == "2" and self.username and self.password:
+            if not interactive:
+                # Nobody can answer prompts: log in with the credentials or fail
+                if not (self.username and self.password):
+                    raise LoginError("Batch mode needs a username and password for automatic login.")
                 self.logger.info("Attempting automatic login...")
-                self._attempt_automatic_login()
+                if not self._attempt_automatic_login(interactive=False):
+                    raise LoginError("Automatic login failed.")
             else:
-                self.logger.info("Manual login mode activated. Follow the instructions in the browser window.")
-                input("\nPress Enter once you've successfully logged in...")
+                # Ask user for login method
+                self.logger.info("Options:\n1. Manual login (recommended for troubleshooting)\n2. Automatic login (using provided credentials)")
+                choice = input("Select login method (1 or 2): ")
+
+                if choice == "2" and self.username and self.password:
+                    self.logger.info("Attempting automatic login...")
+                    self._attempt_automatic_login()
+                else:
+                    self.logger.info("Manual login mode activated. Follow the instructions in the browser window.")
+                    input("\nPress Enter once you've successfully logged in...")
 
             # Verify login by checking cookies
             cookies = self.driver.get_cookies()
@@ -200,6 +286,8 @@ class Twitter_Scraper:
                         auth_token = cookie["value"]
                         break
 
+                if auth_token is None and not interactive:
+                    raise LoginError("No auth_token cookie after login.")
                 if auth_token is None:
                     self.logger.warning("Could not detect login token. Please verify if you're properly logged in.")
                     self.logger.info("Are you successfully logged in? (y/n): ")
@@ -210,10 +298,34 @@ class Twitter_Scraper:
             self.logger.info("Login Successful.")
         except Exception as e:
             self.logger.error(f"Login Failed: {e}")
+            if isinstance(e, WebDriverException):
+                self.record_proxy_failure()
+            if isinstance(e, LoginError):
+                raise
+            if not interactive:
+                raise LoginError(str(e)) from e
             sys.exit(1)
 
-    def _attempt_automatic_login(self):
-        """Attempt to login automatically using stored credentials"""
+    def export_cookies(self):
+        """Session cookies of this logged-in browser, for sharing with other workers"""
+        return self.driver.get_cookies()
+
+    def import_cookies(self, cookies):
+        """Log this browser in by copying another worker's session cookies"""
+        self.driver.get("https://twitter.com/")
+        for cookie in cookies:
+            cookie = {key: value for key, value in cookie.items() if key in ("name", "value", "domain", "path", "secure", "httpOnly", "expiry", "sameSite")}
+            try:
+                self.driver.add_cookie(cookie)
+            except WebDriverException as e:
+                self.logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+        self.driver.get("https://twitter.com/home")
+
+    def _attempt_automatic_login(self, interactive=True):
+        """
+        Attempt to login automatically using stored credentials. Unless
+        `interactive`, never prompts: anything needing a human returns False.
+        """
         try:
             # Input username
             input_attempt = 0
@@ -250,6 +362,9 @@ class Twitter_Scraper:
             # Handle verification challenge if present
             try:
                 self.driver.find_element("xpath", "//input[@data-testid='ocfEnterTextTextInput']")
+                if not interactive:
+                    self.logger.error("Verification challenge detected, which a non-interactive login cannot complete.")
+                    return False
                 self.logger.info("Verification challenge detected. Please complete it manually.")
                 input("\nPress Enter once you've completed the verification...")
             except NoSuchElementException:
@@ -259,7 +374,8 @@ class Twitter_Scraper:
 
         except Exception as e:
             self.logger.error(f"Error during automatic login: {e}")
-            input("\nPress Enter to continue with manual login...")
+            if interactive:
+                input("\nPress Enter to continue with manual login...")
             return False
 
     def go_to_home(self):
@@ -290,12 +406,18 @@ class Twitter_Scraper:
             self.logger.error("Query is not set.")
             sys.exit(1)
         else:
-            url = f"https://twitter.com/search?q={self.scraper_details['query']}&src=typed_query"
-            if self.scraper_details["tab"] == "Latest":
-                url += "&f=live"
-            self.driver.get(url)
+            self.driver.get(search_url(self.scraper_details["query"], latest=self.scraper_details["tab"] == "Latest"))
             sleep(3)
 
+    @staticmethod
+    def is_out_of_order(card):
+        """
+        Retweet and pinned cards carry a social context line ("... reposted",
+        "Pinned"); their status ID is the original tweet's, not a position in
+        this timeline, so they must not count towards the sync stop.
+        """
+        return bool(card.find_elements("xpath", './/*[@data-testid="socialContext"]'))
+
     def get_tweet_cards(self):
         self.tweet_cards = self.driver.find_elements("xpath", '//article[@data-testid="tweet" and not(@disabled)]')
 
@@ -318,6 +440,8 @@ class Twitter_Scraper:
         scrape_top=False,
         scrape_poster_details=False,
         router=None,
+        sync=False,
+        sync_overlap=3,
     ):
         self._config_scraper(
             max_tweets,
@@ -329,7 +453,12 @@ class Twitter_Scraper:
             scrape_poster_details,
         )
         router = router or self.router
-        router()
+        try:
+            router()
+        except WebDriverException:
+            self.record_proxy_failure()
+            raise
+        self.archive_source = self.driver.current_url if self.card_archive is not None else None
 
         if self.scraper_details["type"] == "Username":
             self.logger.info(f"Scraping Tweets from @{self.scraper_details['username']}...")
@@ -340,6 +469,19 @@ class Twitter_Scraper:
         elif self.scraper_details["type"] == "Home":
             self.logger.info("Scraping Tweets from Home...")
 
+        # In sync mode, stop once `sync_overlap` cards in a row are at or below the last run's mark
+        sync_target = sync_target_key(self.scraper_details) if sync else None
+        sync_mark = None
+        if sync_target:
+            self.sync_state = self.sync_state or SyncState()
+            sync_mark = self.sync_state.mark(sync_target)
+            if sync_mark:
+                self.logger.info(f"Syncing {sync_target} since status {sync_mark['newest_id']} ({sync_mark.get('newest_time')})")
+            if self.scraper_details["tab"] == "Top" or self.scraper_details["type"] == "Home":
+                self.logger.warning("This timeline is not chronological; sync may stop before older unseen tweets.")
+        seen_in_a_row = 0
+        caught_up = False
+
         # Accept cookies to remove the banner
         try:
             accept_cookies_btn = self.driver.find_element("xpath", "//span[text()='Refuse non-essential cookies']/../../..")
@@ -347,12 +489,13 @@ class Twitter_Scraper:
         except NoSuchElementException:
             pass
 
+        started_at = time()
+
         # Use logger's progress bar
-        with self.logger.progress_bar(total=self.max_tweets, description="Scraping Tweets") as progress:
+        with self.logger.progress_bar(total=self.max_tweets, description="Scraping Tweets", disable=not self.show_progress) as progress:
             refresh_count = 0
             added_tweets = 0
             empty_count = 0
-            retry_cnt = 0
 
             while self.scroller.scrolling:
                 try:
@@ -367,38 +510,51 @@ class Twitter_Scraper:
                                 if not self.scraper_details["poster_details"]:
                                     self.driver.execute_script("arguments[0].scrollIntoView();", card)
 
-                                tweet = Tweet(
-                                    card=card,
-                                    driver=self.driver,
-                                    actions=self.actions,
-                                    scrape_poster_details=self.scraper_details["poster_details"],
-                                )
+                                with CARD_PARSE_SECONDS.time():
+                                    tweet = Tweet(
+                                        card=card,
+                                        driver=self.driver,
+                                        actions=self.actions,
+                                        scrape_poster_details=self.scraper_details["poster_details"],
+                                    )
+                                CARDS_PARSED.inc()
+                                self.archive_card(card, tweet)
+                                if tweet.is_ad:
+                                    CARDS_SKIPPED.inc(reason="ad")
+                                elif tweet.error or tweet.tweet is None:
+                                    CARDS_SKIPPED.inc(reason="error")
                                 if tweet and not tweet.error and tweet.tweet is not None:
                                     if not tweet.is_ad:
+                                        if sync_mark and self.sync_state.is_seen(tweet.tweet, sync_mark):
+                                            CARDS_SKIPPED.inc(reason="synced")
+                                            if self.is_out_of_order(card):
+                                                continue
+                                            seen_in_a_row += 1
+                                            if seen_in_a_row >= sync_overlap:
+                                                self.logger.info("Reached tweets from the previous sync.")
+                                                caught_up = True
+                                                self.scroller.scrolling = False
+                                                break
+                                            continue
+                                        seen_in_a_row = 0
+                                        if self.is_near_duplicate(tweet):
+                                            CARDS_SKIPPED.inc(reason="duplicate")
+                                            continue
                                         self.data.append(tweet.tweet)
+                                        TWEETS_SCRAPED.inc()
                                         added_tweets += 1
-                                        progress.update(len(self.data))
+                                        progress.update(1)
                                         if len(self.data) >= self.max_tweets and not no_tweets_limit:
                                             self.scroller.scrolling = False
                                             break
                         except NoSuchElementException:
                             continue
 
-                    if len(self.data) >= self.max_tweets and not no_tweets_limit:
+                    if (len(self.data) >= self.max_tweets and not no_tweets_limit) or caught_up:
                         break
 
                     if added_tweets == 0:
-                        try:
-                            while retry_cnt < 15:
-                                retry_button = self.driver.find_element("xpath", "//span[text()='Retry']/../../..")
-                                progress.update(total=len(self.data), description=f"Waiting... (Retry: {retry_cnt})")
-                                sleep(58)
-                                retry_button.click()
-                                retry_cnt += 1
-                                sleep(2)
-                        except NoSuchElementException:
-                            retry_cnt = 0
-                            progress.update(len(self.data))
+                        self.wait_out_rate_limit(progress)
 
                         if empty_count >= 5:
                             if refresh_count >= 3:
@@ -420,6 +576,8 @@ class Twitter_Scraper:
                     break
                 except Exception as e:
                     self.logger.error(f"Error scraping tweets: {e}")
+                    if isinstance(e, WebDriverException):
+                        self.record_proxy_failure()
                     break
 
         if len(self.data) >= self.max_tweets or no_tweets_limit:
@@ -430,33 +588,104 @@ class Twitter_Scraper:
         if not no_tweets_limit:
             self.logger.info(f"Tweets: {len(self.data)} out of {self.max_tweets}")
 
+        SCRAPE_RATE.set(len(self.data) / max(time() - started_at, 0.001))
+
+        if sync_target:
+            if caught_up or sync_mark is None:
+                mark = self.sync_state.advance(sync_target, self.data)
+                self.logger.info(f"Sync: {len(self.data)} new tweets, mark now at status {mark['newest_id'] if mark else None}")
+            else:
+                self.logger.warning(
+                    f"Sync: stopped before reaching the previous mark, so it was not moved; "
+                    f"raise --tweets to close the gap for {sync_target}"
+                )
+        if self.backoff.stalls:
+            self.logger.info(f"Rate limits: {self.backoff.summary()}")
+
+        if self.card_archive is not None:
+            self.card_archive.flush()
+            self.logger.info(f"Archived {self.card_archive.written} raw cards to {self.card_archive.directory}")
+
+        if self.dedup_index is not None:
+            self.dedup_index.save()
+            self.logger.info(
+                f"Near-duplicates skipped: {self.dedup_index.skipped} "
+                f"(saved {self.dedup_index.skipped} media extractions, rephrase calls and posts)"
+            )
+
+    def wait_out_rate_limit(self, progress):
+        """
+        Back off with growing, jittered waits while the timeline is rate
+        limited, clicking Retry after each wait. Returns True once it clears.
+        """
+        limited, reason = self.backoff.probe(self.driver)
+        if not limited:
+            return False
+
+        self.logger.warning(f"Rate limited ({reason}), backing off...")
+        stall_started = time()
+        attempt = 0
+        while limited and time() - stall_started < self.backoff.max_stall:
+            progress.update(advance=0, waiting=True, retry_cnt=attempt)
+            RATE_LIMIT_WAITS.inc()
+            self.backoff.wait(self.backoff.delay(attempt), self.idle_work)
+            try:
+                self.driver.find_element("xpath", "//span[text()='Retry']/../../..").click()
+            except NoSuchElementException:
+                pass
+            sleep(2)
+            limited, reason = self.backoff.probe(self.driver)
+            attempt += 1
+
+        stall_seconds = time() - stall_started
+        RATE_LIMIT_SECONDS.inc(stall_seconds)
+        self.backoff.end_stall(stall_seconds, recovered=not limited)
+        if limited:
+            self.logger.warning(f"Still rate limited after {stall_seconds:.0f}s ({reason}), moving on")
+            return False
+        self.logger.info(f"Rate limit cleared after {stall_seconds:.0f}s")
+        return True
+
+    def archive_card(self, card, tweet):
+        """Keep the card's raw HTML so extraction can be re-run offline with `reparse`"""
+        if self.card_archive is None:
+            return
+        try:
+            html = card.get_attribute("outerHTML")
+        except StaleElementReferenceException:
+            return
+        self.card_archive.append(html, tweet_id=getattr(tweet, "tweet_id", None), source=self.archive_source)
+
+    def is_near_duplicate(self, tweet):
+        """Check a freshly extracted tweet against the persistent near-duplicate index"""
+        if self.dedup_index is None:
+            return False
+        duplicate_of = self.dedup_index.check_and_add(
+            tweet.tweet_id or tweet.tweet_link, tweet.content, tweet.media_urls
+        )
+        if duplicate_of is None:
+            return False
+        self.logger.debug(f"Skipping near-duplicate tweet {tweet.tweet_link} (matches {duplicate_of})")
+        return True
+
     def save_to_csv(self):
         self.logger.info("Saving Tweets to CSV...")
-        now = datetime.now()
         folder_path = "./tweets/"
 
         if not os.path.exists(folder_path):
             os.makedirs(folder_path)
             self.logger.info(f"Created Folder: {folder_path}")
 
-        data = {
-            "Name": [tweet['user'] for tweet in self.data],
-            "Handle": [tweet['handle'] for tweet in self.data],
-            "Content": [tweet['content'] for tweet in self.data],
-            "Tweet Link": [tweet['tweet_link'] for tweet in self.data],
-        }
+        data = tweets_to_columns(self.data)
 
         # Use log_table to display the DataFrame preview
         headers = list(data.keys())
         rows = list(zip(*data.values()))[:5]  # Preview first 5 rows
         self.logger.log_table(headers, rows, title="Tweet Data Preview")
 
-        df = pd.DataFrame(data)
-        current_time = now.strftime("%Y-%m-%d_%H-%M-%S")
-        file_path = f"{folder_path}{current_time}_tweets_1-{len(self.data)}.csv"
-        pd.set_option("display.max_colwidth", None)
-        df.to_csv(file_path, index=False, encoding="utf-8")
+        file_path = write_tweets_csv(self.data, folder_path)
         self.logger.info(f"CSV Saved: {file_path}")
+        return file_path
 
     def get_tweets(self):
         return self.data
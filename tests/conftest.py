@@ -0,0 +1,12 @@
+import os
+import sys
+import logging
+
+# The scraper modules import each other as top-level modules
+SCRAPER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scraper")
+if SCRAPER_DIR not in sys.path:
+    sys.path.insert(0, SCRAPER_DIR)
+
+from logger import configure_logging
+
+configure_logging(log_file=None, level=logging.WARNING, rich=False)
@@ -0,0 +1,92 @@
+import os
+
+from card_archive import CardArchive, archive_chunks, archive_members, card_key, read_chunk
+from card_parser import member_batches, reparse_archive
+
+
+def card_html(tweet_id, content, handle="@alice"):
+    return (
+        f'<article><div data-testid="User-Name"><span>Alice</span></div><span>{handle}</span>'
+        f'<a href="/alice/status/{tweet_id}"><time datetime="2024-01-0{tweet_id}T00:00:00.000Z">Jan</time></a>'
+        f'<div data-testid="tweetText"><span>{content}</span></div></article>'
+    )
+
+
+def make_archive(tmp_path, **kwargs):
+    return CardArchive(directory=str(tmp_path / "cards"), compression="gzip", **kwargs)
+
+
+def test_card_key():
+    assert card_key("<a href='/x/status/123'>", tweet_id=None) == "123"
+    assert card_key("<a>", tweet_id=7) == "7"
+    assert card_key("<div>ad</div>").startswith("sha1:")
+
+
+def test_lookup_reads_the_member_at_its_index_offset(tmp_path):
+    archive = make_archive(tmp_path, flush_records=2)
+    for tweet_id in (1, 2, 3):
+        archive.append(card_html(tweet_id, f"tweet {tweet_id}"), tweet_id=str(tweet_id), source="home")
+    assert archive.written == 2
+    archive.close()
+
+    members = archive_members(archive.directory)
+    assert [cards for *_, cards in members] == [2, 1]
+    # The second member starts where the first one ends
+    assert [offset for _, offset, _, _ in members] == [0, members[0][2]]
+    record = archive.lookup("3")
+    assert record["source"] == "home"
+    assert "tweet 3" in record["html"]
+    assert archive.lookup("missing") is None
+
+
+def test_newest_capture_wins_on_lookup(tmp_path):
+    archive = make_archive(tmp_path, flush_records=1)
+    archive.append(card_html(1, "first"), tweet_id="1")
+    archive.append(card_html(1, "edited"), tweet_id="1")
+    assert "edited" in archive.lookup("1")["html"]
+
+
+def test_full_chunk_rolls_over_to_a_new_one(tmp_path):
+    archive = make_archive(tmp_path, chunk_bytes=1, flush_records=1)
+    for tweet_id in (1, 2, 3):
+        archive.append(card_html(tweet_id, "text"), tweet_id=str(tweet_id))
+    chunks = archive_chunks(archive.directory)
+    assert [os.path.basename(chunk) for chunk in chunks] == [f"cards-0000{i}.jsonl.gz" for i in (1, 2, 3)]
+    assert [record["id"] for chunk in chunks for record in read_chunk(chunk)] == ["1", "2", "3"]
+    assert "text" in archive.lookup("2")["html"]
+
+    # A reopened archive appends to a fresh chunk instead of the full one
+    reopened = make_archive(tmp_path, chunk_bytes=1)
+    assert os.path.basename(reopened.chunk_path) == "cards-00004.jsonl.gz"
+
+
+def test_reading_does_not_create_an_archive(tmp_path):
+    directory = str(tmp_path / "none")
+    assert archive_chunks(directory) == []
+    assert archive_members(directory) == []
+    assert reparse_archive(directory) == ([], 0)
+    assert not os.path.exists(directory)
+
+
+def test_member_batches():
+    members = [("c", offset, 10, cards) for offset, cards in enumerate((400, 700, 100, 1000, 5))]
+    batches = member_batches(members, cards_per_task=1000)
+    assert [[member[3] for member in batch] for batch in batches] == [[400, 700], [100, 1000], [5]]
+    assert member_batches([]) == []
+
+
+def test_reparse_archive_keeps_the_newest_capture(tmp_path):
+    archive = make_archive(tmp_path, flush_records=2)
+    archive.append(card_html(1, "old text"), tweet_id="1")
+    archive.append(card_html(2, "second"), tweet_id="2")
+    archive.append(card_html(1, "new text"), tweet_id="1")
+    archive.append("<div>promoted</div>")
+    archive.close()
+
+    tweets, cards = reparse_archive(archive.directory, workers=2, cards_per_task=2)
+    assert cards == 4
+    by_id = {tweet["tweet_id"]: tweet for tweet in tweets}
+    assert sorted(by_id) == ["1", "2"]
+    assert by_id["1"]["content"] == "new text"
+    assert by_id["1"]["handle"] == "@alice"
+    assert by_id["1"]["tweet_link"] == "https://twitter.com/alice/status/1"
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from daemon import load_daemon_config
+
+
+def write_config(tmp_path, config):
+    path = tmp_path / "daemon.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+
+def test_defaults_are_filled_in(tmp_path):
+    config = load_daemon_config(write_config(tmp_path, {"targets": [{"username": "elonmusk"}]}))
+    assert config["interval_minutes"] == 60
+    assert config["download"] is True
+    assert config["post"] is True
+
+
+def test_explicit_settings_are_kept(tmp_path):
+    config = load_daemon_config(write_config(tmp_path, {
+        "interval_minutes": 15,
+        "post": False,
+        "targets": [{"hashtag": "python", "every_minutes": 180}, {}],
+    }))
+    assert config["interval_minutes"] == 15
+    assert config["post"] is False
+    assert config["targets"][0]["every_minutes"] == 180
+
+
+def test_missing_targets_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="no targets"):
+        load_daemon_config(write_config(tmp_path, {"targets": []}))
+
+
+def test_target_with_two_kinds_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="more than one"):
+        load_daemon_config(write_config(tmp_path, {"targets": [{"username": "a", "query": "b"}]}))
@@ -0,0 +1,41 @@
+from dedup import NearDuplicateIndex, extract_features, normalize_url, simhash, similarity
+
+
+def test_normalize_url_drops_scheme_query_and_fragment():
+    assert normalize_url("https://Example.com/post/?utm_source=x#top") == "example.com/post"
+
+
+def test_retweet_prefix_and_tracking_params_do_not_change_fingerprint():
+    original = extract_features("Big news today about the launch https://example.com/a?utm_source=tw")
+    retweet = extract_features("RT @someone: Big news today about the launch https://example.com/a?ref=rt")
+    assert simhash(original) == simhash(retweet)
+
+
+def test_similarity_bounds():
+    assert similarity(0, 0) == 1
+    assert similarity(0, (1 << 64) - 1) == 0
+
+
+def test_index_flags_near_duplicate_and_keeps_distinct(tmp_path):
+    index = NearDuplicateIndex(path=str(tmp_path / "dedup.json"))
+    assert index.check_and_add("1", "The quick brown fox jumps over the lazy dog near the river bank") is None
+    assert index.check_and_add("2", "RT @fox: The quick brown fox jumps over the lazy dog near the river bank") == "1"
+    assert index.check_and_add("3", "Completely unrelated tweet about baking sourdough bread at home") is None
+    assert index.skipped == 1
+
+
+def test_same_key_is_not_its_own_duplicate(tmp_path):
+    index = NearDuplicateIndex(path=str(tmp_path / "dedup.json"))
+    index.check_and_add("1", "one two three four five")
+    assert index.check_and_add("1", "one two three four five") is None
+    assert index.skipped == 0
+
+
+def test_index_persists_across_instances(tmp_path):
+    path = str(tmp_path / "state" / "dedup.json")
+    index = NearDuplicateIndex(path=path)
+    index.check_and_add("1", "Saved fingerprints survive a restart of the scraper")
+    index.save()
+
+    reloaded = NearDuplicateIndex(path=path)
+    assert reloaded.check_and_add("2", "Saved fingerprints survive a restart of the scraper") == "1"
@@ -0,0 +1,81 @@
+import os
+import json
+import stat
+import threading
+import http.client
+
+import pytest
+
+from job_api import JobAPI, JobStore
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = JobAPI(None, None, port=0, path=str(tmp_path / "jobs.json"), token_path=str(tmp_path / "api_token"))
+    thread = threading.Thread(target=api.server.serve_forever, daemon=True)
+    thread.start()
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
+
+
+def request(api, method, path, body=None, token=None, host=None, content_type="application/json"):
+    port = api.server.server_address[1]
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    headers = {"Host": host or f"127.0.0.1:{port}"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if body is not None:
+        headers["Content-Type"] = content_type
+        body = json.dumps(body)
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    status, data = response.status, json.loads(response.read())
+    connection.close()
+    return status, data
+
+
+def test_token_file_is_private(api):
+    assert stat.S_IMODE(os.stat(api.token_path).st_mode) == 0o600
+    with open(api.token_path, encoding="utf-8") as f:
+        assert f.read() == api.token
+
+
+def test_missing_or_wrong_token_is_rejected(api):
+    assert request(api, "GET", "/health")[0] == 401
+    assert request(api, "GET", "/health", token="wrong")[0] == 401
+    assert request(api, "POST", "/jobs", {"type": "scrape"}, token="wrong")[0] == 401
+    assert request(api, "GET", "/health", token=api.token)[0] == 200
+
+
+def test_foreign_host_is_rejected(api):
+    assert request(api, "GET", "/jobs", token=api.token, host="evil.example:8765")[0] == 403
+    assert request(api, "GET", "/jobs", token=api.token, host=f"localhost:{api.server.server_address[1]}")[0] == 200
+
+
+def test_post_needs_json_content_type(api):
+    status, _ = request(api, "POST", "/jobs", {"type": "scrape"}, token=api.token, content_type="text/plain")
+    assert status == 415
+    status, job = request(api, "POST", "/jobs", {"type": "scrape", "params": {"username": "a"}}, token=api.token)
+    assert status == 202
+    assert job["status"] == "queued"
+    assert request(api, "POST", "/jobs", {"type": "nope"}, token=api.token)[0] == 400
+
+
+def test_store_requeues_interrupted_jobs(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    store = JobStore(path)
+    job = store.submit("scrape", {})
+    store.take(threading.Event())
+    assert store.get(job["id"])["status"] == "running"
+
+    assert JobStore(path).get(job["id"])["status"] == "queued"
+
+
+def test_store_prunes_finished_history(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.json"), history_size=2)
+    jobs = [store.submit("scrape", {}) for _ in range(4)]
+    for job in jobs[:3]:
+        store.cancel(job["id"])
+    assert [job["id"] for job in store.list()] == [job["id"] for job in jobs[1:]]
+    assert store.counts() == {"cancelled": 2, "queued": 1}
@@ -0,0 +1,45 @@
+from post_ledger import PostLedger, content_hash
+
+
+def test_content_hash_ignores_case_and_whitespace():
+    assert content_hash("Hello   World\n") == content_hash("hello world")
+
+
+def test_posted_tweet_is_skipped(tmp_path):
+    ledger = PostLedger(path=str(tmp_path / "ledger.json"))
+    tweet = {"tweet_id": "1", "text": "hello"}
+    assert ledger.skip_reason(tweet) is None
+    ledger.record(tweet, success=True)
+    assert ledger.status(tweet) == "posted"
+    assert ledger.skip_reason(tweet) == "already posted"
+
+
+def test_same_text_under_another_id_is_skipped(tmp_path):
+    ledger = PostLedger(path=str(tmp_path / "ledger.json"))
+    ledger.record({"tweet_id": "1", "text": "Same words"}, success=True)
+    assert ledger.skip_reason({"tweet_id": "2", "text": "same   words"}) == "already posted"
+
+
+def test_failed_tweet_retries_until_max_attempts(tmp_path):
+    ledger = PostLedger(path=str(tmp_path / "ledger.json"), max_attempts=2)
+    tweet = {"tweet_id": "1", "text": "flaky"}
+    ledger.record(tweet, success=False, error="timeout")
+    assert ledger.status(tweet) == "failed"
+    assert ledger.skip_reason(tweet) is None
+    ledger.record(tweet, success=False)
+    assert ledger.skip_reason(tweet) == "failed 2 times"
+    assert ledger.entries["1"]["error"] == "timeout"
+
+
+def test_enforce_false_records_but_never_skips(tmp_path):
+    ledger = PostLedger(path=str(tmp_path / "ledger.json"), enforce=False)
+    tweet = {"tweet_id": "1", "text": "again"}
+    ledger.record(tweet, success=True)
+    assert ledger.status(tweet) == "posted"
+    assert ledger.skip_reason(tweet) is None
+
+
+def test_ledger_persists_across_instances(tmp_path):
+    path = str(tmp_path / "state" / "ledger.json")
+    PostLedger(path=path).record({"content": "from scraped content"}, success=True)
+    assert PostLedger(path=path).skip_reason({"text": "From scraped content"}) == "already posted"
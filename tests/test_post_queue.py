@@ -0,0 +1,70 @@
+import pytest
+
+from post_queue import PostQueue, TokenBucket, queue_item_id
+
+
+def test_token_bucket_allows_burst_then_waits_for_refill():
+    bucket = TokenBucket(rate=0.5, burst=2)
+    bucket.consume(100.0)
+    assert bucket.wait_time(100.0) == 0.0
+    bucket.consume(100.0)
+    assert bucket.wait_time(100.0) == pytest.approx(2.0)
+    assert bucket.wait_time(101.0) == pytest.approx(1.0)
+    assert bucket.wait_time(102.0) == 0.0
+
+
+def test_token_bucket_never_holds_more_than_burst():
+    bucket = TokenBucket(rate=1.0, burst=3)
+    bucket.consume(0.0)
+    assert bucket.available(1000.0) == 3
+
+
+def test_token_bucket_replays_post_history():
+    bucket = TokenBucket(rate=0.1, burst=1, post_times=[100.0])
+    assert bucket.wait_time(105.0) == pytest.approx(5.0)
+
+
+def test_token_bucket_jitter_is_bounded():
+    bucket = TokenBucket(rate=1.0, burst=1, jitter=0.5)
+    bucket.consume(0.0)
+    for _ in range(20):
+        assert 1.0 <= bucket.wait_time(0.0) <= 1.5
+
+
+def test_projected_drain():
+    bucket = TokenBucket(rate=0.5, burst=1)
+    assert bucket.projected_drain(5, now=0.0) == pytest.approx(8.0)
+    assert bucket.projected_drain(0, now=0.0) == 0.0
+
+
+def test_queue_item_id_prefers_tweet_id():
+    assert queue_item_id({"tweet_id": 42, "text": "hi"}) == "42"
+    assert queue_item_id({"text": "hi"}) == queue_item_id({"text": "hi"})
+    assert queue_item_id({"text": "hi"}) != queue_item_id({"text": "bye"})
+
+
+def test_enqueue_skips_pending_duplicates(tmp_path):
+    queue = PostQueue(path=str(tmp_path / "queue.json"))
+    assert queue.enqueue([{"tweet_id": "1"}, {"tweet_id": "2"}, {"tweet_id": "1"}]) == 2
+    assert queue.enqueue([{"tweet_id": "2"}]) == 0
+    assert queue.depth() == 2
+
+
+def test_queue_resumes_remaining_items_and_post_times(tmp_path):
+    path = str(tmp_path / "state" / "queue.json")
+    queue = PostQueue(path=path)
+    queue.enqueue([{"tweet_id": "1"}, {"tweet_id": "2"}])
+    queue.mark(queue.pending()[0], "posted", posted_at=123.0)
+
+    resumed = PostQueue(path=path)
+    assert [item["id"] for item in resumed.pending()] == ["2"]
+    assert resumed.post_times == [123.0]
+
+
+def test_finished_items_are_trimmed_to_history_size(tmp_path):
+    queue = PostQueue(path=str(tmp_path / "queue.json"), history_size=2)
+    queue.enqueue([{"tweet_id": str(i)} for i in range(5)])
+    for item in queue.pending()[:4]:
+        queue.mark(item, "posted")
+    assert [item["id"] for item in queue.items] == ["2", "3", "4"]
+    assert len(queue.post_times) == 2
@@ -0,0 +1,77 @@
+from proxy_pool import ProxyPool, firefox_proxy_preferences, load_proxies
+
+
+def make_pool(tmp_path, proxies, **kwargs):
+    return ProxyPool(proxies, path=str(tmp_path / "proxy_pool.json"), **kwargs)
+
+
+def test_load_proxies_from_string_and_file(tmp_path):
+    assert load_proxies("1.2.3.4:8080, socks5://5.6.7.8:1080,") == ["http://1.2.3.4:8080", "socks5://5.6.7.8:1080"]
+
+    path = tmp_path / "proxies.txt"
+    path.write_text("# office\nhttp://a:1\n\nb:2\n", encoding="utf-8")
+    assert load_proxies(str(path)) == ["http://a:1", "http://b:2"]
+
+
+def test_acquire_prefers_least_used_then_best_score(tmp_path):
+    pool = make_pool(tmp_path, ["http://fast", "http://slow"])
+    pool.record("http://fast", True, 0.1)
+    pool.record("http://slow", True, 1.0)
+    assert pool.acquire() == "http://fast"
+    assert pool.acquire() == "http://slow"
+    assert pool.acquire() == "http://fast"
+    pool.release("http://fast")
+    pool.release("http://fast")
+    assert pool.acquire() == "http://fast"
+
+
+def test_errors_raise_the_score(tmp_path):
+    pool = make_pool(tmp_path, ["http://flaky", "http://steady"])
+    pool.record("http://flaky", True, 0.5)
+    pool.record("http://flaky", False)
+    pool.record("http://steady", True, 0.8)
+    assert pool.acquire() == "http://steady"
+
+
+def test_retired_after_max_consecutive_failures(tmp_path):
+    pool = make_pool(tmp_path, ["http://bad", "http://good"], max_failures=2)
+    pool.record("http://bad", False)
+    pool.record("http://bad", True)
+    pool.record("http://bad", False)
+    assert not pool.is_retired("http://bad")
+    pool.record("http://bad", False)
+    assert pool.is_retired("http://bad")
+    assert [pool.acquire(), pool.acquire()] == ["http://good", "http://good"]
+
+    pool.record("http://good", False)
+    pool.record("http://good", False)
+    assert pool.acquire() is None
+
+
+def test_scores_persist_but_retirement_resets_on_reload(tmp_path):
+    pool = make_pool(tmp_path, ["http://a"], max_failures=1)
+    pool.record("http://a", True, 0.3)
+    pool.record("http://a", False)
+    assert pool.is_retired("http://a")
+    pool.save()
+
+    reloaded = make_pool(tmp_path, ["http://a", "http://new"])
+    stats = reloaded.proxies["http://a"]
+    assert (stats.successes, stats.failures, stats.latency) == (1, 1, 0.3)
+    assert not stats.retired
+    assert stats.consecutive_failures == 0
+    assert reloaded.proxies["http://new"].latency is None
+
+
+def test_firefox_proxy_preferences():
+    http = firefox_proxy_preferences("http://10.0.0.1:3128")
+    assert http["network.proxy.type"] == 1
+    assert (http["network.proxy.http"], http["network.proxy.http_port"]) == ("10.0.0.1", 3128)
+    assert (http["network.proxy.ssl"], http["network.proxy.ssl_port"]) == ("10.0.0.1", 3128)
+    assert firefox_proxy_preferences("10.0.0.1")["network.proxy.http_port"] == 8080
+
+    socks = firefox_proxy_preferences("socks4://10.0.0.2:1080")
+    assert (socks["network.proxy.socks"], socks["network.proxy.socks_port"]) == ("10.0.0.2", 1080)
+    assert socks["network.proxy.socks_version"] == 4
+    assert firefox_proxy_preferences("socks5://10.0.0.2:1080")["network.proxy.socks_version"] == 5
+    assert "network.proxy.http" not in socks
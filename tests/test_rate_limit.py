@@ -0,0 +1,41 @@
+import pytest
+
+from rate_limit import RateLimitBackoff
+
+
+def test_delay_starts_at_base_and_doubles_up_to_cap(tmp_path):
+    backoff = RateLimitBackoff(path=str(tmp_path / "rate_limit.json"), base=15.0, cap=100.0, jitter=0.0)
+    assert [backoff.delay(attempt) for attempt in range(4)] == [15.0, 30.0, 60.0, 100.0]
+
+
+def test_delay_uses_median_of_recoveries(tmp_path):
+    backoff = RateLimitBackoff(path=str(tmp_path / "rate_limit.json"), jitter=0.0)
+    for seconds in (10, 40, 20):
+        backoff.end_stall(seconds, recovered=True)
+    assert backoff.delay(0) == 20.0
+    assert backoff.delay(1) == 40.0
+
+
+def test_delay_jitter_stays_in_range(tmp_path):
+    backoff = RateLimitBackoff(path=str(tmp_path / "rate_limit.json"), base=20.0, jitter=0.25)
+    for _ in range(20):
+        assert 15.0 <= backoff.delay(0) <= 25.0
+
+
+def test_only_recovered_stalls_feed_the_estimate(tmp_path):
+    path = str(tmp_path / "state" / "rate_limit.json")
+    backoff = RateLimitBackoff(path=path, history_size=2)
+    backoff.end_stall(900, recovered=False)
+    for seconds in (5, 6, 7):
+        backoff.end_stall(seconds, recovered=True)
+    assert backoff.stalls == 4
+    assert RateLimitBackoff(path=path).recoveries == [6, 7]
+
+
+def test_wait_counts_time_reclaimed_by_idle_work(tmp_path):
+    backoff = RateLimitBackoff(path=str(tmp_path / "rate_limit.json"))
+    calls = []
+    backoff.wait(0.05, idle_work=calls.append)
+    assert len(calls) == 1
+    assert backoff.lost_seconds == pytest.approx(0.05, abs=0.05)
+    assert 0 <= backoff.reclaimed_seconds <= backoff.lost_seconds
@@ -0,0 +1,38 @@
+from urllib.parse import urlsplit, parse_qs
+
+from search_shards import date_windows, split_window, shard_query
+from twitter_scraper import search_url
+
+
+def test_date_windows_cover_range_without_gaps():
+    windows = date_windows("2024-01-01", "2024-01-20", days=7)
+    assert windows == [
+        ("2024-01-01", "2024-01-08"),
+        ("2024-01-08", "2024-01-15"),
+        ("2024-01-15", "2024-01-20"),
+    ]
+
+
+def test_date_windows_empty_when_since_not_before_until():
+    assert date_windows("2024-01-05", "2024-01-05") == []
+
+
+def test_split_window_halves_and_stops_at_one_day():
+    assert split_window(("2024-01-01", "2024-01-05")) == (("2024-01-01", "2024-01-03"), ("2024-01-03", "2024-01-05"))
+    assert split_window(("2024-01-01", "2024-01-02")) is None
+
+
+def test_shard_query():
+    assert shard_query("#python", ("2024-01-01", "2024-01-08")) == "#python since:2024-01-01 until:2024-01-08"
+
+
+def test_hashtag_shard_search_url_keeps_whole_query():
+    url = search_url(shard_query("#python", ("2024-01-01", "2024-01-08")))
+    parts = urlsplit(url)
+    assert parts.fragment == ""
+    assert parse_qs(parts.query)["q"] == ["#python since:2024-01-01 until:2024-01-08"]
+    assert parse_qs(parts.query)["f"] == ["live"]
+
+
+def test_search_url_top_tab():
+    assert "f=" not in search_url("selenium python", latest=False)
@@ -0,0 +1,47 @@
+import os
+
+from selector_registry import SelectorRegistry
+
+CHAINS = {"button": [("css", "a"), ("css", "b"), ("css", "c")]}
+
+
+def make_registry(tmp_path, **kwargs):
+    return SelectorRegistry(path=str(tmp_path / "selectors.json"), chains=CHAINS, **kwargs)
+
+
+def test_unproven_chain_keeps_original_order(tmp_path):
+    assert make_registry(tmp_path).ordered("button") == CHAINS["button"]
+
+
+def test_higher_hit_rate_wins_then_lower_latency(tmp_path):
+    registry = make_registry(tmp_path)
+    registry._record("button", CHAINS["button"], ("css", "c"), 0.5)
+    assert registry.ordered("button")[0] == ("css", "c")
+    # "a" and "b" end up with the same hit rate, so the faster one ranks first
+    registry._record("button", [("css", "b")], ("css", "b"), 0.1)
+    registry._record("button", [("css", "a")], ("css", "a"), 0.9)
+    registry._record("button", [("css", "c")], ("css", "c"), 0.5)
+    assert [candidate[1] for candidate in registry.ordered("button")] == ["c", "b", "a"]
+
+
+def test_selectors_without_latency_sort_after_measured_ones(tmp_path):
+    registry = make_registry(tmp_path)
+    registry._stats("button", "c").record(True, 3.0)
+    registry._stats("button", "a").recent = registry._stats("button", "c").recent
+    assert registry.ordered("button")[0] == ("css", "c")
+
+
+def test_lookups_are_saved_in_batches(tmp_path):
+    registry = make_registry(tmp_path, save_interval=3600)
+    registry._record("button", CHAINS["button"], ("css", "a"), 0.2)
+    assert not os.path.exists(registry.path)
+
+    registry.save()
+    reloaded = make_registry(tmp_path)
+    assert reloaded.stats["button"]["a"].hits == 1
+
+
+def test_save_is_due_after_interval(tmp_path):
+    registry = make_registry(tmp_path, save_interval=0)
+    registry._record("button", CHAINS["button"], ("css", "a"), 0.2)
+    assert os.path.exists(registry.path)
@@ -0,0 +1,40 @@
+from sync_state import SyncState, sync_target_key
+
+
+def test_sync_target_key():
+    assert sync_target_key({"type": "Username", "username": "ElonMusk"}) == "username:elonmusk"
+    assert sync_target_key({"type": "Hashtag", "hashtag": "Python", "tab": "Latest"}) == "hashtag:python:Latest"
+    assert sync_target_key({"type": "Query", "query": "selenium", "tab": "Top"}) == "query:selenium:Top"
+    assert sync_target_key({"type": None}) == "home"
+
+
+def test_is_seen_compares_status_ids_and_falls_back_to_time(tmp_path):
+    state = SyncState(path=str(tmp_path / "sync.json"))
+    mark = {"newest_id": "100", "newest_time": "2024-01-02T00:00:00.000Z"}
+    assert state.is_seen({"tweet_id": "99"}, mark)
+    assert state.is_seen({"tweet_id": "100"}, mark)
+    assert not state.is_seen({"tweet_id": "101"}, mark)
+    assert state.is_seen({"tweet_id": "", "date_time": "2024-01-01T00:00:00.000Z"}, mark)
+    assert not state.is_seen({"tweet_id": "", "date_time": "2024-01-03T00:00:00.000Z"}, mark)
+    assert not state.is_seen({"tweet_id": "1"}, None)
+
+
+def test_advance_only_moves_forward(tmp_path):
+    state = SyncState(path=str(tmp_path / "sync.json"))
+    mark = state.advance("home", [{"tweet_id": "5", "date_time": "t5"}, {"tweet_id": "9", "date_time": "t9"}])
+    assert mark["newest_id"] == "9"
+    assert state.advance("home", [{"tweet_id": "7"}])["newest_id"] == "9"
+    assert state.advance("home", [])["newest_id"] == "9"
+    assert state.advance("home", [{"tweet_id": "12", "date_time": "t12"}])["newest_time"] == "t12"
+
+
+def test_advance_ignores_tweets_without_ids(tmp_path):
+    state = SyncState(path=str(tmp_path / "sync.json"))
+    assert state.advance("home", [{"tweet_id": ""}, {"tweet_id": "ad"}]) is None
+    assert state.mark("home") is None
+
+
+def test_marks_persist_across_instances(tmp_path):
+    path = str(tmp_path / "state" / "sync.json")
+    SyncState(path=path).advance("username:a", [{"tweet_id": "42"}])
+    assert SyncState(path=path).mark("username:a")["newest_id"] == "42"
@@ -0,0 +1,53 @@
+import pytest
+
+from tweet_store import TweetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TweetStore(path=str(tmp_path / "state" / "tweets.db"), batch_size=2)
+    store.upsert([
+        {"tweet_id": "1", "handle": "@Alice", "content": "hello world", "date_time": "2024-01-01T10:00:00.000Z"},
+        {"tweet_id": "2", "handle": "@bob", "content": "selenium tips", "date_time": "2024-01-02T10:00:00.000Z", "rephrased": "tips"},
+        {"tweet_link": "https://twitter.com/alice/status/3", "handle": "@alice", "content": "more selenium", "date_time": "2024-01-03T10:00:00.000Z"},
+        {"handle": "@ad", "content": "no id, not stored"},
+    ])
+    yield store
+    store.close()
+
+
+def ids(tweets):
+    return [tweet["tweet_id"] for tweet in tweets]
+
+
+def test_upsert_skips_tweets_without_ids(store):
+    assert store.count() == 3
+    assert store.known_ids(["1", "3", "4", ""]) == {"1", "3"}
+
+
+def test_query_newest_first_and_oldest_first(store):
+    assert ids(store.query()) == ["3", "2", "1"]
+    assert ids(store.query(oldest_first=True, limit=2)) == ["1", "2"]
+
+
+def test_query_by_handle_ignores_case_and_at_sign(store):
+    assert ids(store.query(handle="ALICE")) == ["3", "1"]
+    assert ids(store.query(handle="@bob")) == ["2"]
+
+
+def test_query_date_range_and_text(store):
+    assert ids(store.query(since="2024-01-02", until="2024-01-03")) == ["2"]
+    assert ids(store.query(contains="selenium")) == ["3", "2"]
+
+
+def test_query_rephrased_filter(store):
+    assert ids(store.query(rephrased=True)) == ["2"]
+    assert ids(store.query(rephrased=False)) == ["3", "1"]
+
+
+def test_rescrape_keeps_rephrase_and_date(store):
+    store.upsert([{"tweet_id": "2", "handle": "@bob", "content": "selenium tips, edited", "date_time": "skip"}])
+    tweet = store.query(handle="bob")[0]
+    assert tweet["content"] == "selenium tips, edited"
+    assert tweet["rephrased"] == "tips"
+    assert tweet["date_time"] == "2024-01-02T10:00:00.000Z"